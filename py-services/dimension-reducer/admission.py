@@ -0,0 +1,274 @@
+"""
+Admission Control
+V11.0 Cosmos: Per-method concurrency limits, bounded wait queues and a memory budget
+
+Without admission control a handful of simultaneous umap_learning calls for large users
+can occupy every core and push the replica into OOM, taking the cheap umap_transform
+traffic down with them. Each reduction method gets its own concurrency limit and bounded
+FIFO wait queue, so transforms never queue behind fits, and all admitted work shares one
+memory budget estimated from n_samples x dims. Requests that cannot be admitted are
+rejected immediately (429 when the method's queue is full, 503 when the memory budget
+would be exceeded or the wait timed out) with a Retry-After hint instead of piling up.
+
+All state lives on the event loop; tickets must be released from it.
+"""
+
+import asyncio
+import logging
+import os
+from collections import deque
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Working-set multipliers over the float32 input (input copy, normalized copy, neighbour
+# search blocks, serialized model holding the raw data)
+_LEARNING_INPUT_COPIES = 6
+_TRANSFORM_INPUT_COPIES = 3
+_LINEAR_INPUT_COPIES = 2
+# kNN indices/distances plus UMAP's fuzzy graph (COO rows, cols, values) per neighbour
+_BYTES_PER_NEIGHBOUR = 64
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised when a request cannot be admitted; carries the HTTP status and Retry-After"""
+
+    def __init__(self, detail: str, status_code: int, retry_after_seconds: int):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+        self.retry_after_seconds = retry_after_seconds
+
+
+class MethodLimit:
+    """Concurrency limit and wait-queue bound of one method"""
+
+    def __init__(self, max_concurrent: int, max_queue: int):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+
+
+class AdmissionTicket:
+    """Slot and memory reservation of one admitted request; release() is idempotent"""
+
+    def __init__(self, controller: "AdmissionController", method: str, estimated_bytes: int):
+        self._controller = controller
+        self.method = method
+        self.estimated_bytes = estimated_bytes
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._controller._release(self)
+
+
+class _MethodState:
+    def __init__(self, limit: MethodLimit):
+        self.limit = limit
+        self.in_flight = 0
+        self.waiters: "deque[asyncio.Future]" = deque()
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_memory = 0
+        self.rejected_timeout = 0
+        self.max_wait_ms = 0.0
+
+
+class AdmissionController:
+    """
+    Admits requests per method and against a shared memory budget.
+
+    Args:
+        limits: Limit per method; methods without an entry use default_limit
+        default_limit: Limit for any other method
+        max_memory_bytes: Budget for the estimated working set of all admitted and queued
+            requests (0 disables the memory check). A request larger than the whole budget
+            is still admitted when nothing else is running, so it runs alone.
+        max_wait_seconds: How long a queued request waits for a slot before a 503
+        retry_after_seconds: Retry-After sent with rejections
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, MethodLimit],
+        default_limit: MethodLimit,
+        max_memory_bytes: int = 0,
+        max_wait_seconds: float = 30.0,
+        retry_after_seconds: int = 5,
+    ):
+        self._default_limit = default_limit
+        self._methods: Dict[str, _MethodState] = {method: _MethodState(limit) for method, limit in limits.items()}
+        self.max_memory_bytes = max(0, max_memory_bytes)
+        self.max_wait_seconds = max_wait_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self._reserved_bytes = 0
+
+    async def acquire(self, method: str, estimated_bytes: int = 0) -> AdmissionTicket:
+        """
+        Wait for a slot of method (FIFO) and reserve estimated_bytes of the memory budget.
+
+        Raises:
+            AdmissionRejected: Immediately if the queue is full or memory would be exceeded,
+                or after max_wait_seconds without a free slot
+        """
+        state = self._state(method)
+        ticket = self._reserve_memory(state, method, estimated_bytes)
+
+        if state.in_flight < state.limit.max_concurrent and not state.waiters:
+            state.in_flight += 1
+            state.admitted += 1
+            return ticket
+
+        if len(state.waiters) >= state.limit.max_queue:
+            self._reserved_bytes -= ticket.estimated_bytes
+            state.rejected_queue_full += 1
+            raise AdmissionRejected(
+                f"Too many concurrent {method} requests ({state.in_flight} running, {len(state.waiters)} queued)",
+                429, self.retry_after_seconds
+            )
+
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        state.waiters.append(waiter)
+        wait_start = loop.time()
+        try:
+            # The releasing request hands its slot over by resolving the future
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.max_wait_seconds)
+        except asyncio.TimeoutError:
+            if self._abandon(state, waiter):
+                self._reserved_bytes -= ticket.estimated_bytes
+                state.rejected_timeout += 1
+                raise AdmissionRejected(
+                    f"Timed out after {self.max_wait_seconds:.0f}s waiting for a {method} slot",
+                    503, self.retry_after_seconds
+                )
+            # Otherwise the slot was handed over just as the wait timed out
+        except BaseException:
+            # Cancelled (e.g. client disconnect): pass on a slot handed over meanwhile
+            if self._abandon(state, waiter):
+                self._reserved_bytes -= ticket.estimated_bytes
+            else:
+                ticket.release()
+            raise
+
+        state.admitted += 1
+        state.max_wait_ms = max(state.max_wait_ms, (loop.time() - wait_start) * 1000)
+        return ticket
+
+    def reserve(self, method: str, estimated_bytes: int = 0) -> AdmissionTicket:
+        """
+        Admit without waiting, for work that is queued elsewhere (e.g. /jobs/reduce).
+
+        Counts as in flight even above max_concurrent, so that /reduce callers of the same
+        method queue behind it, but is rejected when the method's running and queued work
+        already fills its limit and queue.
+        """
+        state = self._state(method)
+        if state.in_flight + len(state.waiters) >= state.limit.max_concurrent + state.limit.max_queue:
+            state.rejected_queue_full += 1
+            raise AdmissionRejected(
+                f"Too many concurrent {method} requests ({state.in_flight} running, {len(state.waiters)} queued)",
+                429, self.retry_after_seconds
+            )
+        ticket = self._reserve_memory(state, method, estimated_bytes)
+        state.in_flight += 1
+        state.admitted += 1
+        return ticket
+
+    def stats(self) -> dict:
+        return {
+            "max_memory_bytes": self.max_memory_bytes,
+            "reserved_memory_bytes": self._reserved_bytes,
+            "max_wait_seconds": self.max_wait_seconds,
+            "methods": {
+                method: {
+                    "max_concurrent": state.limit.max_concurrent,
+                    "max_queue": state.limit.max_queue,
+                    "in_flight": state.in_flight,
+                    "queued": len(state.waiters),
+                    "admitted": state.admitted,
+                    "rejected_queue_full": state.rejected_queue_full,
+                    "rejected_memory": state.rejected_memory,
+                    "rejected_timeout": state.rejected_timeout,
+                    "max_wait_ms": round(state.max_wait_ms, 3),
+                }
+                for method, state in sorted(self._methods.items())
+            },
+        }
+
+    def _state(self, method: str) -> _MethodState:
+        state = self._methods.get(method)
+        if state is None:
+            state = self._methods[method] = _MethodState(self._default_limit)
+        return state
+
+    def _reserve_memory(self, state: _MethodState, method: str, estimated_bytes: int) -> AdmissionTicket:
+        estimated_bytes = max(0, int(estimated_bytes))
+        if self.max_memory_bytes and self._reserved_bytes > 0 and self._reserved_bytes + estimated_bytes > self.max_memory_bytes:
+            state.rejected_memory += 1
+            raise AdmissionRejected(
+                f"Not enough memory to admit {method}: needs ~{estimated_bytes >> 20} MiB, "
+                f"{self._reserved_bytes >> 20} of {self.max_memory_bytes >> 20} MiB reserved",
+                503, self.retry_after_seconds
+            )
+        self._reserved_bytes += estimated_bytes
+        return AdmissionTicket(self, method, estimated_bytes)
+
+    def _abandon(self, state: _MethodState, waiter: asyncio.Future) -> bool:
+        """Withdraw a waiter; False if it was already handed a slot"""
+        if waiter.done() and not waiter.cancelled():
+            return False
+        waiter.cancel()
+        try:
+            state.waiters.remove(waiter)
+        except ValueError:
+            pass
+        return True
+
+    def _release(self, ticket: AdmissionTicket) -> None:
+        state = self._state(ticket.method)
+        self._reserved_bytes -= ticket.estimated_bytes
+        # Hand the slot straight to the oldest waiter, so in_flight stays unchanged, unless
+        # reserve() had pushed in_flight over the limit
+        while state.waiters and state.in_flight <= state.limit.max_concurrent:
+            waiter = state.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        state.in_flight -= 1
+
+
+def estimate_memory_bytes(method: str, n_samples: int, dims: int, n_neighbors: int = 15, landmark_count: Optional[int] = None) -> int:
+    """Rough peak working set of a reduction, from its size alone"""
+    if not n_samples or not dims:
+        return 0
+    input_bytes = n_samples * dims * 4
+    if method == "umap_learning":
+        fitted_rows = min(n_samples, landmark_count) if landmark_count else n_samples
+        fitted_bytes = fitted_rows * dims * 4
+        # Landmark fits only hold the landmarks plus one placement chunk per thread
+        input_share = fitted_bytes if landmark_count and landmark_count < n_samples else input_bytes
+        return input_share * _LEARNING_INPUT_COPIES + fitted_rows * n_neighbors * _BYTES_PER_NEIGHBOUR + dims * dims * 8
+    if method == "linear_transformation":
+        return input_bytes * _LINEAR_INPUT_COPIES
+    return input_bytes * _TRANSFORM_INPUT_COPIES
+
+
+def available_memory_bytes() -> int:
+    """Memory limit of this container (cgroup v2 or v1), else physical memory; 0 if unknown"""
+    limits = []
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        if value.isdigit():
+            limits.append(int(value))
+    try:
+        limits.append(os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES"))
+    except (ValueError, OSError, AttributeError):
+        pass
+    # cgroup v1 reports "no limit" as a huge number, which min() discards
+    return min(limits) if limits else 0
@@ -6,46 +6,197 @@ This service provides dimensionality reduction capabilities for the GraphProject
 converting high-dimensional embeddings into 3D coordinates for visualization.
 """
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
-from typing import List, Optional, Literal
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field, ValidationError
+from typing import Any, Callable, Dict, List, Optional, Literal
 import numpy as np
+import asyncio
+import json
 import logging
+import os
+import tempfile
 import time
 from contextlib import asynccontextmanager
 
+from admission import AdmissionController, AdmissionRejected, AdmissionTicket, MethodLimit, available_memory_bytes, estimate_memory_bytes
+from backends import BACKEND_AUTO, BACKEND_PCA, BACKEND_UMAP, LayoutBackend, ReducerBackend, get_backend, model_backend, select_backend
+from compact_model import CompactModelError, CompactUMAPModel, is_compact_model, load_compact_model, load_compact_model_file
+from drift import (
+    MIN_SCORED_ROWS,
+    OUT_OF_DISTRIBUTION_FRACTION,
+    TRUSTWORTHINESS_DROP,
+    DriftAccumulator,
+    DriftRows,
+    compute_baseline,
+    is_baseline,
+    model_baseline,
+    placement_baseline,
+    score_rows,
+    summarize_drift,
+)
+from fit_budget import EXACT_KNN_MAX_SAMPLES, plan_umap_fit
+from fast_transform import TRANSFORM_ENGINE_NUMPY, TRANSFORM_ENGINE_UMAP, cached_engine_nbytes, get_numpy_engine
+from jobs import JobManager, JobQueueFullError, ProgressCallback, ReductionJob
+from landmarks import place_in_chunks, select_landmarks
+from linear_projection import LinearProjection, LinearProjectionStore, fit_linear_projection, row_keys
+from pre_reduction import PreReducedUMAP, PreReducer, neighbourhood_preservation, pre_reduce
+from result_cache import ReductionResultCache, compute_result_key
+from streaming import (
+    FRAMES_CONTENT_TYPE,
+    NDJSON_CONTENT_TYPE,
+    StreamFormatError,
+    encode_message,
+    iter_messages,
+    iter_row_chunks,
+    stream_format,
+    stream_media_type,
+)
+from metrics import PROMETHEUS_CONTENT_TYPE, ReductionMetrics, StageTimer
+from micro_batching import TransformMicroBatcher
+from knn_graph import KnnGraph, KnnGraphStore, build_search_index, row_norms, update_knn_graph
+from warmup import LazyModule, WarmupState, configure_numba_cache, module_available
+from warm_start import align_to_previous, optimize_from_init, prepare_warm_start
+from model_registry import FittedModelRegistry
+from wire_format import (
+    MSGPACK_AVAILABLE,
+    MSGPACK_CONTENT_TYPE,
+    WireFormatError,
+    decode_batch_payload,
+    decode_reduce_payload,
+    encode_reduce_response,
+    is_msgpack_content_type,
+)
+
+# Numba keeps compiled kernels here across worker processes and process restarts ("" leaves
+# numba's default). The temp-dir default lives only as long as the container; the Dockerfile
+# sets it to a volume. Must be set before umap (and with it numba) is first imported
+REDUCER_NUMBA_CACHE_DIR = os.getenv("REDUCER_NUMBA_CACHE_DIR", os.path.join(tempfile.gettempdir(), "dimension-reducer-numba-cache"))
+configure_numba_cache(REDUCER_NUMBA_CACHE_DIR)
+
+# Heavy libraries are imported on first use (or by the warm-up) unless lazy imports are disabled
+REDUCER_LAZY_IMPORTS = os.getenv("REDUCER_LAZY_IMPORTS", "true").lower() in ("1", "true", "yes")
+
 # Import dimension reduction libraries
-try:
-    import umap
-    UMAP_AVAILABLE = True
-except ImportError:
-    UMAP_AVAILABLE = False
+umap = LazyModule("umap")
+UMAP_AVAILABLE = module_available("umap")
+if not UMAP_AVAILABLE:
     logging.warning("UMAP not available - install with: pip install umap-learn")
 
-try:
-    from sklearn.linear_model import Ridge
-    SKLEARN_AVAILABLE = True
-except ImportError:
-    SKLEARN_AVAILABLE = False
+SKLEARN_AVAILABLE = module_available("sklearn")
+if not SKLEARN_AVAILABLE:
     logging.warning("scikit-learn not available - install with: pip install scikit-learn")
 
-try:
-    import cloudpickle
-    CLOUDPICKLE_AVAILABLE = True
-except ImportError:
-    CLOUDPICKLE_AVAILABLE = False
-    cloudpickle = None
+CLOUDPICKLE_AVAILABLE = module_available("cloudpickle")
+cloudpickle = LazyModule("cloudpickle") if CLOUDPICKLE_AVAILABLE else None
+if not CLOUDPICKLE_AVAILABLE:
     logging.warning("cloudpickle not available - install with: pip install cloudpickle")
 
+if not REDUCER_LAZY_IMPORTS:
+    try:
+        if UMAP_AVAILABLE:
+            umap.load()
+        if cloudpickle is not None:
+            cloudpickle.load()
+    except ImportError as e:
+        UMAP_AVAILABLE = False
+        logging.warning(f"UMAP not available - import failed: {str(e)}")
+
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Fitted model registry configuration
+MODEL_REGISTRY_MAX_ENTRIES = int(os.getenv("MODEL_REGISTRY_MAX_ENTRIES", "32"))
+MODEL_REGISTRY_MAX_BYTES = int(os.getenv("MODEL_REGISTRY_MAX_BYTES", str(512 * 1024 * 1024)))
+MODEL_REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR") or None
+# Bound on the persisted models in MODEL_REGISTRY_DIR (least recently used files are deleted)
+MODEL_REGISTRY_DISK_MAX_BYTES = int(os.getenv("MODEL_REGISTRY_DISK_MAX_BYTES", str(4 * 1024 * 1024 * 1024)))
+
+# Job subsystem configuration (fits run in a process pool off the event loop)
+REDUCER_PROCESS_WORKERS = int(os.getenv("REDUCER_PROCESS_WORKERS", str(max(1, min(4, os.cpu_count() or 1)))))
+REDUCER_MAX_PENDING_JOBS = int(os.getenv("REDUCER_MAX_PENDING_JOBS", "16"))
+JOB_RESULT_TTL_SECONDS = float(os.getenv("JOB_RESULT_TTL_SECONDS", "3600"))
+JOB_RETRY_AFTER_SECONDS = int(os.getenv("JOB_RETRY_AFTER_SECONDS", "5"))
+# numba/BLAS threads per worker process; by default one core stays free for transforms
+REDUCER_WORKER_THREADS = int(os.getenv("REDUCER_WORKER_THREADS", str(max(1, (os.cpu_count() or 1) - 1))))
+
+# Admission control: per-method concurrency and wait-queue bounds (ADMISSION_<METHOD>_CONCURRENCY /
+# ADMISSION_<METHOD>_QUEUE) and a memory budget for the estimated working set of admitted work
+ADMISSION_MAX_MEMORY_BYTES = int(os.getenv("ADMISSION_MAX_MEMORY_BYTES", str(int(available_memory_bytes() * 0.7))))
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "30"))
+ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", str(JOB_RETRY_AFTER_SECONDS)))
+
+# Per-graph kNN reuse across refits
+KNN_GRAPH_CACHE_MAX_GRAPHS = int(os.getenv("KNN_GRAPH_CACHE_MAX_GRAPHS", "64"))
+
+# Landmark mode: fit on a sample, then place the remaining rows chunk by chunk
+LANDMARK_CHUNK_ROWS = int(os.getenv("LANDMARK_CHUNK_ROWS", "8192"))
+LANDMARK_PLACEMENT_THREADS = int(os.getenv("LANDMARK_PLACEMENT_THREADS", str(max(1, os.cpu_count() or 1))))
+# Placed rows sampled (besides the landmarks) for the ridge projection and drift baseline of a landmark fit
+LANDMARK_STATE_SAMPLE_ROWS = int(os.getenv("LANDMARK_STATE_SAMPLE_ROWS", "8192"))
+
+# Directory from which vectors_path inputs may be memory-mapped (unset disables vectors_path)
+REDUCER_INPUT_DIR = os.getenv("REDUCER_INPUT_DIR") or None
+
+# Per-graph ridge projections kept as sufficient statistics and updated between refits
+LINEAR_PROJECTION_MAX_GRAPHS = int(os.getenv("LINEAR_PROJECTION_MAX_GRAPHS", "32"))
+LINEAR_PROJECTION_MAX_BYTES = int(os.getenv("LINEAR_PROJECTION_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# Warm-started refits run fewer epochs at a lower learning rate to stay close to the previous layout
+WARM_START_EPOCHS = int(os.getenv("WARM_START_EPOCHS", "100"))
+WARM_START_LEARNING_RATE = float(os.getenv("WARM_START_LEARNING_RATE", "0.5"))
+
+# transform_engine="auto" uses the NumPy engine for small batches against moderately sized models
+NUMPY_TRANSFORM_MAX_BATCH = int(os.getenv("NUMPY_TRANSFORM_MAX_BATCH", "256"))
+NUMPY_TRANSFORM_MAX_TRAINING_ROWS = int(os.getenv("NUMPY_TRANSFORM_MAX_TRAINING_ROWS", "200000"))
+
+# Concurrent umap_transform requests for the same model_id are coalesced within this window (0 disables)
+TRANSFORM_BATCH_WINDOW_MS = float(os.getenv("TRANSFORM_BATCH_WINDOW_MS", "2"))
+TRANSFORM_BATCH_MAX_ROWS = int(os.getenv("TRANSFORM_BATCH_MAX_ROWS", "4096"))
+# Engines that place each row independently of the rest of its batch; only these coalesce
+_ROW_INDEPENDENT_TRANSFORM_ENGINES = (TRANSFORM_ENGINE_NUMPY, BACKEND_PCA)
+
+# Results of requests sent with use_result_cache, keyed by content hash (0 bytes disables)
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR") or None
+RESULT_CACHE_DISK_MAX_BYTES = int(os.getenv("RESULT_CACHE_DISK_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+
+# /reduce/stream transforms vectors in chunks of this many rows; single messages are bounded in size
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", "2048"))
+STREAM_MAX_MESSAGE_BYTES = int(os.getenv("STREAM_MAX_MESSAGE_BYTES", str(256 * 1024 * 1024)))
+
+# umap_transform scores drift on at most DRIFT_MAX_ROWS rows per batch against a baseline of
+# DRIFT_BASELINE_SAMPLE training rows, and recommends a refit once DRIFT_OOD_FRACTION of a batch
+# lies beyond the training p95 nearest-neighbour distance or trustworthiness drops by
+# DRIFT_TRUSTWORTHINESS_DROP (batches under DRIFT_MIN_ROWS rows never recommend one)
+DRIFT_MAX_ROWS = int(os.getenv("DRIFT_MAX_ROWS", "256"))
+DRIFT_BASELINE_SAMPLE = int(os.getenv("DRIFT_BASELINE_SAMPLE", "1024"))
+DRIFT_OOD_FRACTION = float(os.getenv("DRIFT_OOD_FRACTION", str(OUT_OF_DISTRIBUTION_FRACTION)))
+DRIFT_TRUSTWORTHINESS_DROP = float(os.getenv("DRIFT_TRUSTWORTHINESS_DROP", str(TRUSTWORTHINESS_DROP)))
+DRIFT_MIN_ROWS = int(os.getenv("DRIFT_MIN_ROWS", str(MIN_SCORED_ROWS)))
+
+# /reduce/batch: groups per request, and groups transformed concurrently (each on a thread-pool thread)
+BATCH_TRANSFORM_MAX_GROUPS = int(os.getenv("BATCH_TRANSFORM_MAX_GROUPS", "1024"))
+BATCH_TRANSFORM_PARALLELISM = int(os.getenv("BATCH_TRANSFORM_PARALLELISM", str(max(2, os.cpu_count() or 1))))
+
+# Fit time estimates of backend="auto" are multiplied by this (calibrate with benchmark.py on the target hardware)
+BACKEND_COST_SCALE = float(os.getenv("BACKEND_COST_SCALE", "1.0"))
+
+# Start-up warm-up: fit and transform a tiny synthetic dataset before /ready passes
+REDUCER_WARMUP = os.getenv("REDUCER_WARMUP", "true").lower() in ("1", "true", "yes")
+REDUCER_WARMUP_PROCESS_POOL = os.getenv("REDUCER_WARMUP_PROCESS_POOL", "true").lower() in ("1", "true", "yes")
+WARMUP_SAMPLES = int(os.getenv("WARMUP_SAMPLES", "300"))
+WARMUP_DIMENSIONS = int(os.getenv("WARMUP_DIMENSIONS", "64"))
+
 # Pydantic models
 class DimensionReductionRequest(BaseModel):
     vectors: List[List[float]] = Field(..., description="High-dimensional vectors to reduce")
-    method: Literal["umap_learning", "linear_transformation", "umap_transform"] = Field(default="umap_learning", description="Reduction method")
+    method: Literal["umap_learning", "linear_transformation", "umap_transform", "auto"] = Field(default="umap_learning", description="Reduction method; auto is umap_learning with backend auto")
     target_dimensions: int = Field(default=3, ge=2, le=3, description="Target dimensions (2 or 3)")
     n_neighbors: Optional[int] = Field(default=15, ge=2, description="Number of neighbors for UMAP")
     min_dist: Optional[float] = Field(default=0.8, ge=0.0, le=1.0, description="Minimum distance for UMAP")
@@ -56,6 +207,43 @@ class DimensionReductionRequest(BaseModel):
     transformation_matrix: Optional[List[List[float]]] = Field(default=None, description="4x4 transformation matrix for linear positioning")
     # V11.0 Cosmos: UMAP Transform parameters
     fitted_umap_model: Optional[List[int]] = Field(default=None, description="Serialized UMAP model as byte array for transform operations")
+    model_id: Optional[str] = Field(default=None, description="Registered model id from a previous umap_learning response; fitted_umap_model is only needed on a registry miss")
+    include_transformation_matrix: bool = Field(default=False, description="umap_transform with graph_id only: return the graph's ridge projection matrix after this transform's nodes were added to it")
+    drift_metrics: bool = Field(default=True, description="Score the umap_transform batch against the model's training baseline and return drift with refit_recommended")
+    drift_baseline: Optional[dict] = Field(default=None, description="model_metadata.drift_baseline of the model's umap_learning response; computed from the model when omitted")
+    # V11.0 Cosmos: Incremental refit parameters
+    graph_id: Optional[str] = Field(default=None, description="Stable id of the projected graph (e.g. user id); enables kNN graph reuse across umap_learning refits")
+    node_ids: Optional[List[str]] = Field(default=None, description="Node ids aligned with vectors; required together with graph_id for kNN graph reuse")
+    previous_coordinates: Optional[Dict[str, List[float]]] = Field(default=None, description="Previous coordinates keyed by node id; warm-starts umap_learning and aligns the result to the previous frame (requires node_ids)")
+    warm_start_epochs: Optional[int] = Field(default=None, ge=1, le=1000, description="Epochs for warm-started refits (defaults to WARM_START_EPOCHS)")
+    movement_threshold: float = Field(default=1.0, ge=0.0, description="Displacement above which a known node is listed in moved_node_ids")
+    # V11.0 Cosmos: Fitted model format
+    model_format: Literal["pickle", "compact"] = Field(default="pickle", description="Serialization of the fitted model: full cloudpickle or the compact transform-only format")
+    compact_model_dtype: Literal["float16", "float32"] = Field(default="float16", description="Storage dtype of training embeddings in compact models")
+    compact_model_compression: bool = Field(default=True, description="Compress compact models; uncompressed ones are memory-mapped when loaded from the registry directory")
+    compare_model_formats: bool = Field(default=False, description="Serialize both formats and report their size and load time in model_metadata")
+    pre_reduction: Optional[Literal["pca", "random_projection"]] = Field(default=None, description="Project vectors with randomized PCA or a sparse random projection before UMAP learning; the projector is stored with the model")
+    pre_reduction_dimensions: int = Field(default=64, ge=32, le=128, description="Output dimensions of the pre-reduction stage")
+    vectors_path: Optional[str] = Field(default=None, description="Server-local .npy file under REDUCER_INPUT_DIR to memory-map instead of sending vectors (send vectors as [])")
+    landmark_count: Optional[int] = Field(default=None, ge=100, description="Landmark mode: fit UMAP on this many representative rows and place the rest with the fitted model")
+    landmark_strategy: Literal["kmeans++", "stratified", "random"] = Field(default="kmeans++", description="How landmarks are selected")
+    landmark_chunk_rows: Optional[int] = Field(default=None, ge=256, description="Rows per placement chunk in landmark mode (defaults to LANDMARK_CHUNK_ROWS)")
+    transform_engine: Literal["auto", "umap", "numpy"] = Field(default="auto", description="umap_transform engine: UMAP's transform, the NumPy kNN-weighted placement, or auto by batch and model size")
+    use_result_cache: bool = Field(default=False, description="Return the cached result of an identical earlier request (same vectors, method, parameters and model) and cache this one")
+    include_stage_timings: bool = Field(default=False, description="Add a per-stage breakdown of the processing time (stage_timings_ms) to the response")
+    stream_chunk_rows: Optional[int] = Field(default=None, ge=1, le=65536, description="/reduce/stream only: rows transformed and returned per chunk (defaults to STREAM_CHUNK_ROWS)")
+    # V11.0 Cosmos: Layout backends
+    backend: Literal["umap", "pca", "tsne", "auto"] = Field(default="umap", description="Layout backend of umap_learning; auto picks the best backend expected to fit within time_budget_ms")
+    time_budget_ms: Optional[int] = Field(default=None, ge=1, description="Latency budget of the fit: backend auto picks the backend, and UMAP fits choose the epochs, NN-descent precision and threads expected to fit it")
+    tsne_perplexity: float = Field(default=30.0, gt=0.0, le=100.0, description="Perplexity of the tsne backend (capped at a third of n_samples)")
+    # V11.0 Cosmos: UMAP fit performance settings (left open ones are planned from time_budget_ms)
+    n_epochs: Optional[int] = Field(default=None, ge=10, le=2000, description="Epochs of a cold UMAP fit (UMAP's default: 500 up to 10k samples, 200 above)")
+    low_memory: bool = Field(default=True, description="Memory-lean NN-descent; false is faster on large inputs at a higher memory peak")
+    n_jobs: Optional[int] = Field(default=None, ge=-1, description="Threads of NN-descent and SGD (-1 for all worker threads); above 1 the fit runs unseeded, as UMAP only parallelizes unseeded fits")
+    deterministic: bool = Field(default=True, description="With false, time_budget_ms may run the fit unseeded on all worker threads")
+    nn_descent_n_trees: Optional[int] = Field(default=None, ge=1, le=256, description="Random projection trees initializing NN-descent on inputs above 4096 samples")
+    nn_descent_n_iters: Optional[int] = Field(default=None, ge=1, le=100, description="NN-descent iterations")
+    nn_descent_max_candidates: Optional[int] = Field(default=None, ge=4, le=256, description="NN-descent candidates per node and iteration")
 
 class DimensionReductionResponse(BaseModel):
     coordinates: List[List[float]] = Field(..., description="Reduced coordinates")
@@ -71,15 +259,167 @@ class DimensionReductionResponse(BaseModel):
     fitted_umap_model: Optional[List[int]] = Field(default=None, description="Serialized UMAP model as byte array")
     model_metadata: Optional[dict] = Field(default=None, description="Model size, training info, etc.")
     is_incremental: bool = Field(default=False, description="Whether this was an incremental update")
+    model_id: Optional[str] = Field(default=None, description="Registry id of the fitted model, usable in later umap_transform requests")
+    model_cache_hit: Optional[bool] = Field(default=None, description="Whether umap_transform resolved the model from the registry")
+    moved_node_ids: Optional[List[str]] = Field(default=None, description="Warm-started refits only: new nodes and known nodes that moved more than movement_threshold")
+    transform_engine: Optional[str] = Field(default=None, description="Engine that served umap_transform (umap or numpy, or pca / tsne for models of those backends)")
+    batched_requests: Optional[int] = Field(default=None, description="Number of concurrent umap_transform requests coalesced into the transform that served this one")
+    result_cache_hit: Optional[bool] = Field(default=None, description="Requests with use_result_cache only: whether the result was served from the result cache")
+    stage_timings_ms: Optional[Dict[str, float]] = Field(default=None, description="Requests with include_stage_timings only: milliseconds spent in each processing stage")
+    backend: Optional[str] = Field(default=None, description="umap_learning only: layout backend that produced the coordinates and model")
+    fit_settings: Optional[dict] = Field(default=None, description="umap_learning only: performance settings the fit ran with, its estimated and measured time and whether it met time_budget_ms")
+    drift: Optional[dict] = Field(default=None, description="umap_transform only: nearest-neighbour distance and trustworthiness of the batch against the training baseline, and whether they call for a refit")
+
+class BatchTransformRequest(BaseModel):
+    # Groups are validated one by one, so that an invalid group only fails itself
+    groups: List[dict] = Field(..., description="umap_transform requests with the /reduce fields (vectors, model_id or fitted_umap_model, node_ids, graph_id, transform_engine, ...) and an optional group_id echoed back")
+    include_stage_timings: bool = Field(default=False, description="Add the batch's per-stage breakdown (stage_timings_ms) to the response")
+
+class BatchGroupResult(BaseModel):
+    index: int = Field(..., description="Position of the group in the request")
+    group_id: Optional[str] = Field(default=None, description="group_id of the group, if it had one")
+    status: Literal["ok", "error"] = Field(..., description="Whether the group was transformed")
+    status_code: int = Field(..., description="HTTP status /reduce would have answered the group with")
+    error: Optional[str] = Field(default=None, description="Error detail of failed groups")
+    result: Optional[DimensionReductionResponse] = Field(default=None, description="The group's umap_transform result")
+
+class BatchTransformResponse(BaseModel):
+    results: List[BatchGroupResult] = Field(..., description="One result per group, in request order")
+    n_groups: int = Field(..., description="Number of groups")
+    n_failed: int = Field(..., description="Number of groups that failed")
+    n_samples: int = Field(..., description="Vectors transformed across all successful groups")
+    n_models: int = Field(..., description="Distinct models the groups resolved to")
+    processing_time_ms: int = Field(..., description="Processing time of the whole batch in milliseconds")
+    stage_timings_ms: Optional[Dict[str, float]] = Field(default=None, description="Requests with include_stage_timings only: milliseconds spent in each batch-level stage")
 
 class HealthResponse(BaseModel):
     status: str
     umap_available: bool
     sklearn_available: bool
+    msgpack_available: bool = False
     version: str = "1.0.0"
+    model_registry: Optional[dict] = None
+    jobs: Optional[dict] = None
+    knn_graphs: Optional[dict] = None
+    transform_batching: Optional[dict] = None
+    linear_projections: Optional[dict] = None
+    result_cache: Optional[dict] = None
+    warmup: Optional[dict] = None
+    admission: Optional[dict] = None
+
+class ReadinessResponse(BaseModel):
+    status: Literal["ready", "warming_up"]
+    warmup: dict
+
+class JobStatusResponse(BaseModel):
+    job_id: str = Field(..., description="Job identifier for GET /jobs/{job_id}")
+    method: str = Field(..., description="Reduction method of the job")
+    status: Literal["queued", "running", "completed", "failed"] = Field(..., description="Job status")
+    stage: Optional[str] = Field(default=None, description="Current processing stage")
+    progress: float = Field(default=0.0, description="Progress between 0 and 1")
+    submitted_at: Optional[str] = None
+    started_at: Optional[str] = None
+    completed_at: Optional[str] = None
+    error: Optional[str] = Field(default=None, description="Error detail for failed jobs")
+    result: Optional[DimensionReductionResponse] = Field(default=None, description="Reduction result once completed")
+
+def _load_fitted_model(model_bytes: bytes):
+    """Deserialize a fitted model from the compact format or a cloudpickle"""
+    if is_compact_model(model_bytes):
+        return load_compact_model(model_bytes)
+    if cloudpickle is None:
+        raise HTTPException(status_code=503, detail="cloudpickle not available for model deserialization")
+    return cloudpickle.loads(model_bytes)
+
+def _load_fitted_model_file(path: str):
+    """Load a persisted fitted model, memory-mapping compact models"""
+    with open(path, "rb") as f:
+        if is_compact_model(f.read(16)):
+            return load_compact_model_file(path)
+        f.seek(0)
+        return _load_fitted_model(f.read())
+
+# Fitted models are kept in a bounded registry keyed by content hash so that
+# umap_transform can reference them by model_id instead of re-shipping them
+model_registry = FittedModelRegistry(
+    loader=_load_fitted_model,
+    max_entries=MODEL_REGISTRY_MAX_ENTRIES,
+    max_bytes=MODEL_REGISTRY_MAX_BYTES,
+    persist_dir=MODEL_REGISTRY_DIR,
+    file_loader=_load_fitted_model_file,
+    max_disk_bytes=MODEL_REGISTRY_DISK_MAX_BYTES
+)
+
+# Neighbour graphs from previous fits, updated incrementally on refit
+knn_graph_store = KnnGraphStore(max_graphs=KNN_GRAPH_CACHE_MAX_GRAPHS)
+
+# Ridge projections per graph_id, refreshed by umap_transform results between refits
+linear_projection_store = LinearProjectionStore(max_projections=LINEAR_PROJECTION_MAX_GRAPHS, max_bytes=LINEAR_PROJECTION_MAX_BYTES)
+
+# Retried requests with unchanged inputs are answered from here instead of recomputed
+result_cache = ReductionResultCache(
+    max_bytes=RESULT_CACHE_MAX_BYTES,
+    spill_dir=RESULT_CACHE_DIR,
+    max_spill_bytes=RESULT_CACHE_DISK_MAX_BYTES
+) if RESULT_CACHE_MAX_BYTES > 0 else None
+
+# Request and per-stage timings, served at /metrics
+reduction_metrics = ReductionMetrics()
+
+# /ready only passes once the start-up warm-up has compiled the numba kernels
+warmup_state = WarmupState(enabled=REDUCER_WARMUP and UMAP_AVAILABLE)
+
+# UMAP fits run in worker processes so they never block the event loop
+job_manager = JobManager(
+    max_workers=REDUCER_PROCESS_WORKERS,
+    max_pending=REDUCER_MAX_PENDING_JOBS,
+    result_ttl_seconds=JOB_RESULT_TTL_SECONDS,
+    worker_threads=REDUCER_WORKER_THREADS
+)
+
+def _admission_limit(method: str, max_concurrent: int, max_queue: int) -> MethodLimit:
+    """Limit of one method, overridable with ADMISSION_<METHOD>_CONCURRENCY / _QUEUE"""
+    prefix = f"ADMISSION_{method.upper()}"
+    return MethodLimit(
+        int(os.getenv(f"{prefix}_CONCURRENCY", str(max_concurrent))),
+        int(os.getenv(f"{prefix}_QUEUE", str(max_queue)))
+    )
+
+# Fits, transforms and streams are limited separately, so transforms never queue behind refits
+_cheap_concurrency = max(4, 2 * (os.cpu_count() or 1))
+admission_controller = AdmissionController(
+    limits={
+        "umap_learning": _admission_limit("umap_learning", REDUCER_PROCESS_WORKERS, REDUCER_MAX_PENDING_JOBS),
+        "umap_transform": _admission_limit("umap_transform", _cheap_concurrency, 256),
+        "linear_transformation": _admission_limit("linear_transformation", _cheap_concurrency, 256),
+        "umap_transform_stream": _admission_limit("umap_transform_stream", 2, 8),
+        "umap_transform_batch": _admission_limit("umap_transform_batch", 2, 8)
+    },
+    default_limit=MethodLimit(4, 16),
+    max_memory_bytes=ADMISSION_MAX_MEMORY_BYTES,
+    max_wait_seconds=ADMISSION_MAX_WAIT_SECONDS,
+    retry_after_seconds=ADMISSION_RETRY_AFTER_SECONDS
+)
+
+async def _run_transform_batch(contexts: List[tuple], X: np.ndarray) -> dict:
+    """
+    Run one coalesced umap_transform in the thread pool
+    
+    The callers share every field that changes the response (see _transform_batch_key), so
+    the first caller's request stands for all of them. Model bytes are taken from any
+    caller that sent them, as a registry miss can only be served from bytes.
+    """
+    request, _ = contexts[0]
+    fitted_model_bytes = next((model_bytes for _, model_bytes in contexts if model_bytes is not None), None)
+    # Drift is summarized per caller from the batch's per-row scores
+    return await run_in_threadpool(_run_reduction, request, X, fitted_model_bytes, keep_drift_scores=True)
 
-# Note: Reducer caching removed for stateless microservice design
-# Each request creates fresh reducer instances for better isolation
+# Bursts of umap_transform calls for the same model share one vectorized transform
+transform_batcher = TransformMicroBatcher(
+    run=_run_transform_batch,
+    window_ms=TRANSFORM_BATCH_WINDOW_MS,
+    max_batch_rows=TRANSFORM_BATCH_MAX_ROWS
+)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -87,8 +427,15 @@ async def lifespan(app: FastAPI):
     logger.info("Starting Dimension Reducer Service v1.0.0")
     logger.info(f"UMAP available: {UMAP_AVAILABLE}")
     logger.info(f"scikit-learn available: {SKLEARN_AVAILABLE}")
+    logger.info(f"Reduction worker processes: {REDUCER_PROCESS_WORKERS}, max pending jobs: {REDUCER_MAX_PENDING_JOBS}")
+    logger.info(f"Lazy imports: {REDUCER_LAZY_IMPORTS}, warm-up: {warmup_state.status}, numba cache: {os.environ.get('NUMBA_CACHE_DIR')}")
+    # Runs in the background so /health answers while the replica warms up
+    warmup_task = asyncio.create_task(_warm_up()) if warmup_state.enabled else None
     yield
     logger.info("Shutting down Dimension Reducer Service")
+    if warmup_task is not None:
+        warmup_task.cancel()
+    job_manager.shutdown()
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -104,35 +451,888 @@ async def health_check():
     return HealthResponse(
         status="healthy",
         umap_available=UMAP_AVAILABLE,
-        sklearn_available=SKLEARN_AVAILABLE
+        sklearn_available=SKLEARN_AVAILABLE,
+        msgpack_available=MSGPACK_AVAILABLE,
+        model_registry=model_registry.stats(),
+        jobs=job_manager.stats(),
+        knn_graphs=knn_graph_store.stats(),
+        transform_batching=transform_batcher.stats(),
+        linear_projections=linear_projection_store.stats(),
+        result_cache=result_cache.stats() if result_cache is not None else None,
+        warmup=warmup_state.stats(),
+        admission=admission_controller.stats()
     )
 
-@app.post("/reduce", response_model=DimensionReductionResponse)
-async def reduce_dimensions(request: DimensionReductionRequest):
+@app.get("/ready", response_model=ReadinessResponse, responses={503: {"model": ReadinessResponse}})
+async def readiness_check():
+    """
+    Readiness probe: 503 until the start-up warm-up has finished
+    
+    /health reports liveness as soon as the app is up; load balancers should route
+    traffic by /ready so that requests don't pay import and numba compilation time.
+    """
+    ready = warmup_state.is_ready
+    response = ReadinessResponse(status="ready" if ready else "warming_up", warmup=warmup_state.stats())
+    if not ready:
+        return JSONResponse(status_code=503, content=response.model_dump())
+    return response
+
+# /reduce and /jobs/reduce read their body manually to support both JSON and msgpack,
+# so the request schema is documented explicitly
+REDUCE_REQUEST_OPENAPI = {
+    "requestBody": {
+        "content": {
+            "application/json": {"schema": DimensionReductionRequest.model_json_schema()},
+            MSGPACK_CONTENT_TYPE: {"schema": {"type": "string", "format": "binary"}}
+        },
+        "required": True
+    }
+}
+
+@app.post("/reduce", response_model=DimensionReductionResponse, openapi_extra=REDUCE_REQUEST_OPENAPI)
+async def reduce_dimensions(http_request: Request):
     """
     Reduce high-dimensional vectors to 2D or 3D coordinates
+    
+    Accepts either a JSON DimensionReductionRequest or a msgpack envelope
+    (Content-Type: application/x-msgpack) carrying raw float32 buffers and model bytes.
+    The response is msgpack when the Accept header asks for it, JSON otherwise.
+    
+    UMAP learning runs in the worker process pool and transforms in the thread pool,
+    so neither blocks the event loop. Concurrent transforms for the same model_id are
+    coalesced into a single transform call. With use_result_cache, a repeat of an earlier
+    request (e.g. a client retry after a timeout) is answered from the result cache.
     """
-    start_time = time.time()
+    request_start = time.perf_counter()
+    timer = StageTimer()
+    request = None
+    response_data = None
+    status = "error"
+    try:
+        with timer.stage("request_parsing"):
+            request, X, fitted_model_bytes = await _read_reduce_payload(http_request)
+        response_data = await _reduce(request, X, fitted_model_bytes, timer)
+        status = "cache_hit" if response_data.get("result_cache_hit") else "ok"
+        
+        if request.include_stage_timings:
+            response_data["stage_timings_ms"] = timer.as_dict()
+        # Encoding is timed for /metrics only; it happens after the breakdown is attached
+        with timer.stage("response_encoding"):
+            return _encode_reduce_response(http_request, response_data)
+    except HTTPException as e:
+        if e.headers and "Retry-After" in e.headers:
+            status = "rejected"
+        raise
+    finally:
+        n_samples, dims = _request_size(request, response_data)
+        reduction_metrics.observe(
+            request.method if request is not None else "unknown", status, n_samples, dims,
+            timer.as_dict(), (time.perf_counter() - request_start) * 1000
+        )
+
+async def _reduce(request: DimensionReductionRequest, X: Optional[np.ndarray], fitted_model_bytes: Optional[bytes], timer: StageTimer, admit: bool = True) -> dict:
+    """
+    Dispatch a parsed /reduce request to the result cache, the job manager, the micro-batcher or the thread pool
+    
+    admit=False skips admission for work already admitted as part of a larger request (/reduce/batch).
+    """
+    cache_key = None
+    if request.use_result_cache and result_cache is not None:
+        lookup_start = time.perf_counter()
+        with timer.stage("result_cache_lookup"):
+            cache_key, request, X = await run_in_threadpool(_result_cache_key, request, X, fitted_model_bytes)
+            cached = result_cache.get(cache_key)
+        if cached is not None:
+            return _result_cache_hit(cached, lookup_start)
     
+    ticket = None
+    if admit:
+        with timer.stage("admission_wait"):
+            ticket = await _admit(request, X)
     try:
-        # Validate input
-        if not request.vectors:
-            raise HTTPException(status_code=400, detail="No vectors provided")
+        if request.method == "umap_learning":
+            job = _submit_reduction_job(request, X, fitted_model_bytes)
+            try:
+                await job_manager.wait(job)
+            finally:
+                # Also when the client disconnected or the request was cancelled mid-wait
+                job_manager.forget(job.job_id)
+            if job.error is not None:
+                raise HTTPException(status_code=job.error_status_code or 500, detail=job.error)
+            response_data = job.result
+            # Everything outside the reduction itself: pool queueing, process spawn and argument/result pickling
+            completed_at = job.completed_at or time.time()
+            timer.record("job_overhead", max(0.0, (completed_at - job.submitted_at) * 1000 - response_data["processing_time_ms"]))
+        elif request.method == "umap_transform" and request.model_id and transform_batcher.enabled:
+            response_data = await _batched_umap_transform(request, X, fitted_model_bytes)
+            batch_wait_ms = response_data.pop("batch_wait_ms", None)
+            if batch_wait_ms is not None:
+                timer.record("batch_wait", batch_wait_ms)
+        else:
+            response_data = await run_in_threadpool(_run_reduction, request, X, fitted_model_bytes)
+    finally:
+        if ticket is not None:
+            ticket.release()
+    timer.merge(response_data.pop("stage_timings_ms", None))
+    
+    if cache_key is not None and result_cache is not None:
+        response_data["result_cache_hit"] = False
+        result_cache.put(cache_key, _cacheable_response(response_data))
+    
+    return response_data
+
+async def _admit(request: DimensionReductionRequest, X: Optional[np.ndarray]) -> AdmissionTicket:
+    """Wait for an admission slot of the request's method, or reject it with Retry-After"""
+    try:
+        return await admission_controller.acquire(request.method, _estimate_request_memory(request, X))
+    except AdmissionRejected as e:
+        raise _admission_error(e)
+
+def _estimate_request_memory(request: DimensionReductionRequest, X: Optional[np.ndarray]) -> int:
+    """Estimated working set of a request from its input shape"""
+    shape = _input_shape(request, X)
+    if shape is None:
+        return 0
+    return estimate_memory_bytes(request.method, shape[0], shape[1], request.n_neighbors or 15, request.landmark_count)
+
+def _input_shape(request: DimensionReductionRequest, X: Optional[np.ndarray]) -> Optional[tuple[int, int]]:
+    """(n_samples, dims) of a request's vectors without converting them (a vectors_path file is only read for its header)"""
+    if X is not None:
+        return X.shape if X.ndim == 2 else None
+    if request.vectors:
+        return len(request.vectors), len(request.vectors[0])
+    if request.vectors_path:
+        try:
+            return _load_vectors_file(request.vectors_path).shape
+        except HTTPException:
+            # Reported by the reduction itself
+            return None
+    return None
+
+def _admission_error(e: AdmissionRejected) -> HTTPException:
+    logger.warning(f"Admission rejected ({e.status_code}): {e.detail}")
+    return HTTPException(status_code=e.status_code, detail=e.detail, headers={"Retry-After": str(e.retry_after_seconds)})
+
+def _request_size(request: Optional[DimensionReductionRequest], response_data: Optional[dict]) -> tuple[Optional[int], Optional[int]]:
+    """n_samples and input dimensions of a request for metric labels, from the result when available"""
+    if response_data is not None:
+        return response_data.get("n_samples"), response_data.get("input_dimensions")
+    if request is not None and request.vectors:
+        return len(request.vectors), len(request.vectors[0])
+    return None, None
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: request counts and durations, and per-stage duration histograms"""
+    return Response(content=reduction_metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.post("/jobs/reduce", response_model=JobStatusResponse, status_code=202, openapi_extra=REDUCE_REQUEST_OPENAPI)
+async def submit_reduction_job(http_request: Request):
+    """
+    Submit a reduction as an asynchronous job
+    
+    Takes the same JSON or msgpack payload as /reduce and returns a job id immediately.
+    Poll GET /jobs/{job_id} for status, progress and the result.
+    """
+    request, X, fitted_model_bytes = await _read_reduce_payload(http_request)
+    # Jobs wait in the job queue rather than for a slot, but still count towards their method's load and memory
+    try:
+        ticket = admission_controller.reserve(request.method, _estimate_request_memory(request, X))
+    except AdmissionRejected as e:
+        raise _admission_error(e)
+    try:
+        job = _submit_reduction_job(request, X, fitted_model_bytes, finalize=lambda response_data: _finalize_job_reduction(request, response_data))
+    except BaseException:
+        ticket.release()
+        raise
+    
+    future = job.future
+    if future is None:
+        ticket.release()
+    else:
+        loop = asyncio.get_running_loop()
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(ticket.release))
+    return JobStatusResponse(**job.to_dict())
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_reduction_job(job_id: str, http_request: Request):
+    """Get status, progress and (once completed) the result of a reduction job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    status = job.to_dict()
+    if job.result is None:
+        return JobStatusResponse(**status)
+    
+    if is_msgpack_content_type(http_request.headers.get("accept")):
+        try:
+            return Response(content=encode_reduce_response({**status, "result": job.result}), media_type=MSGPACK_CONTENT_TYPE)
+        except WireFormatError as e:
+            raise HTTPException(status_code=406, detail=str(e))
+    
+    return JobStatusResponse(**status, result=DimensionReductionResponse(**_to_json_response_data(job.result)))
+
+STREAM_REQUEST_OPENAPI = {
+    "requestBody": {
+        "content": {
+            NDJSON_CONTENT_TYPE: {"schema": {"type": "string", "description": "First line: request fields; then one vector, {vector, node_id} or {vectors, node_ids} per line"}},
+            FRAMES_CONTENT_TYPE: {"schema": {"type": "string", "format": "binary", "description": "uint32 length-prefixed msgpack frames: request fields, then {vectors, node_ids} blocks"}}
+        },
+        "required": True
+    }
+}
+
+@app.post("/reduce/stream", openapi_extra=STREAM_REQUEST_OPENAPI)
+async def reduce_stream(http_request: Request):
+    """
+    Streaming umap_transform for large incremental batches
+    
+    Reads vectors from an NDJSON or length-prefixed msgpack body as they arrive, transforms
+    them stream_chunk_rows at a time and streams each chunk's coordinates back in the same
+    format before reading on, so memory stays flat whatever the batch size and clients can
+    persist positions while later chunks are still being computed (see streaming.py).
+    
+    Each chunk message carries chunk, start, n_samples, coordinates and node_ids (if sent).
+    The last message is a summary with done=true, or an error message with error and
+    status_code if the stream failed after the response had started.
+    """
+    format_name = stream_format(http_request.headers.get("content-type"))
+    if format_name is None:
+        raise HTTPException(status_code=415, detail=f"/reduce/stream accepts {NDJSON_CONTENT_TYPE} or {FRAMES_CONTENT_TYPE}")
+    
+    messages = iter_messages(http_request.stream(), format_name, STREAM_MAX_MESSAGE_BYTES)
+    try:
+        header = await messages.__anext__()
+    except StopAsyncIteration:
+        raise HTTPException(status_code=400, detail="Empty stream: the first message must hold the request fields")
+    except StreamFormatError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid stream: {str(e)}")
+    if not isinstance(header, dict):
+        raise HTTPException(status_code=400, detail="The first stream message must be a map of request fields")
+    
+    fitted_model_bytes = header.pop("fitted_umap_model", None)
+    if fitted_model_bytes is not None:
+        try:
+            fitted_model_bytes = bytes(fitted_model_bytes)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="fitted_umap_model must be a byte array")
+    request = _parse_reduce_request({**header, "method": header.get("method", "umap_transform"), "vectors": []})
+    if request.method != "umap_transform":
+        raise HTTPException(status_code=400, detail=f"/reduce/stream only supports umap_transform, got {request.method}")
+    
+    timer = StageTimer()
+    with timer.stage("admission_wait"):
+        try:
+            ticket = await admission_controller.acquire("umap_transform_stream")
+        except AdmissionRejected as e:
+            raise _admission_error(e)
+    
+    # Resolve the model before the response starts, so a missing model is still a plain 404
+    try:
+        with timer.stage("model_resolve"):
+            model_id, model_cache_hit = await run_in_threadpool(_resolve_transform_model, request, fitted_model_bytes)
+    except BaseException:
+        ticket.release()
+        raise
+    # Node ids travel with the vectors, not in the header
+    request = request.model_copy(update={"model_id": model_id, "node_ids": None})
+    
+    return StreamingResponse(
+        _stream_umap_transform(request, fitted_model_bytes, messages, format_name, model_cache_hit, timer, ticket),
+        media_type=stream_media_type(format_name),
+        # Also releases the slot if the body was never iterated (release is idempotent)
+        background=BackgroundTask(ticket.release)
+    )
+
+def _resolve_transform_model(request: DimensionReductionRequest, fitted_model_bytes: Optional[bytes]) -> tuple[str, bool]:
+    """Resolve (and register) the model of a streamed or batched transform; returns (model_id, cache_hit)"""
+    if not request.model_id and not fitted_model_bytes:
+        raise HTTPException(status_code=400, detail="model_id or fitted_umap_model is required for umap_transform method")
+    try:
+        model_id, fitted_model, cache_hit = model_registry.get_or_register(request.model_id, fitted_model_bytes)
+    except CompactModelError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid compact model: {str(e)}")
+    except Exception as e:
+        logger.error(f"UMAP transform failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"UMAP transform failed: {str(e)}")
+    if fitted_model is None or model_id is None:
+        raise HTTPException(status_code=404, detail=f"Model {request.model_id} not found in registry; resend fitted_umap_model")
+    return model_id, cache_hit
+
+async def _stream_umap_transform(request: DimensionReductionRequest, fitted_model_bytes: Optional[bytes], messages, format_name: str, model_cache_hit: bool, timer: StageTimer, ticket: AdmissionTicket):
+    """Body of a /reduce/stream response: one message per transformed chunk, then a summary"""
+    stream_start = time.perf_counter()
+    chunk_rows = request.stream_chunk_rows or STREAM_CHUNK_ROWS
+    n_samples = 0
+    chunks = 0
+    input_dims = None
+    last_result = None
+    # Drift is aggregated chunk by chunk from a bounded, evenly thinned set of scored rows
+    drift_rows = DriftAccumulator(DRIFT_MAX_ROWS)
+    drift_baseline = None
+    status = "error"
+    try:
+        try:
+            async for X, node_ids in iter_row_chunks(messages, chunk_rows):
+                # Only the current chunk's vectors and coordinates are held at any time; the model
+                # bytes are kept so a registry eviction mid-stream only costs a reload
+                result = await run_in_threadpool(_run_reduction, request, X, fitted_model_bytes, keep_drift_scores=True)
+                timer.merge(result.pop("stage_timings_ms", None))
+                drift_scores = result.pop("drift_scores", None)
+                if drift_scores is not None:
+                    drift_rows.add(drift_scores[0])
+                    drift_baseline = drift_scores[1]
+                input_dims = result["input_dimensions"]
+                message = {
+                    "chunk": chunks,
+                    "start": n_samples,
+                    "n_samples": result["n_samples"],
+                    "coordinates": result["coordinates"],
+                    "node_ids": node_ids
+                }
+                with timer.stage("response_encoding"):
+                    encoded = encode_message(message, format_name)
+                yield encoded
+                n_samples += result["n_samples"]
+                chunks += 1
+                last_result = result
+        except StreamFormatError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid stream: {str(e)}")
         
-        # Only require 2+ vectors for methods that need it (like UMAP learning)
-        if request.method == "umap_learning" and len(request.vectors) < 2:
-            raise HTTPException(status_code=400, detail="At least 2 vectors required for UMAP learning")
+        summary = {
+            "done": True,
+            "method": request.method,
+            "n_samples": n_samples,
+            "chunks": chunks,
+            "chunk_rows": chunk_rows,
+            "input_dimensions": input_dims,
+            "output_dimensions": request.target_dimensions,
+            "processing_time_ms": int((time.perf_counter() - stream_start) * 1000),
+            "model_id": request.model_id,
+            "model_cache_hit": model_cache_hit,
+            "transform_engine": last_result["transform_engine"] if last_result is not None else None,
+            "transformation_matrix": last_result.get("transformation_matrix") if last_result is not None else None,
+            "drift": _summarize_drift(drift_rows.rows(), drift_baseline) if drift_rows.n_batches and drift_baseline is not None and drift_rows.n_batches == chunks else None
+        }
+        if request.include_stage_timings:
+            summary["stage_timings_ms"] = timer.as_dict()
+        status = "ok"
+        yield encode_message(summary, format_name)
+    except HTTPException as e:
+        # The status line has already been sent, so failures are reported in-band
+        logger.error(f"Streaming transform failed after {n_samples} rows: {e.detail}")
+        yield encode_message({"error": e.detail, "status_code": e.status_code, "n_samples": n_samples}, format_name)
+    finally:
+        ticket.release()
+        reduction_metrics.observe(
+            "umap_transform_stream", status, n_samples, input_dims, timer.as_dict(), (time.perf_counter() - stream_start) * 1000
+        )
+
+BATCH_REQUEST_OPENAPI = {
+    "requestBody": {
+        "content": {
+            "application/json": {"schema": BatchTransformRequest.model_json_schema()},
+            MSGPACK_CONTENT_TYPE: {"schema": {"type": "string", "format": "binary", "description": "{groups: [...]} with each group in the /reduce msgpack envelope"}}
+        },
+        "required": True
+    }
+}
+
+@app.post("/reduce/batch", response_model=BatchTransformResponse, openapi_extra=BATCH_REQUEST_OPENAPI)
+async def reduce_batch(http_request: Request):
+    """
+    umap_transform for many models in one round-trip
+    
+    Takes a list of groups, each a umap_transform request for one model (typically one
+    user's new nodes), as JSON or as msgpack (groups in the /reduce binary envelope), and
+    answers with one result per group in request order. Every distinct model is resolved
+    once, from the registry or from the first group that sent its bytes; the groups then
+    run BATCH_TRANSFORM_PARALLELISM at a time on the thread pool, and groups of the same
+    model are coalesced by the micro-batcher like concurrent /reduce calls. A group that is
+    invalid or whose model can't be resolved fails on its own with the status /reduce would
+    have returned; the batch is admitted once, as umap_transform_batch, for the memory
+    of the groups it runs at a time (see _estimate_batch_memory).
+    """
+    request_start = time.perf_counter()
+    timer = StageTimer()
+    status = "error"
+    n_samples = None
+    try:
+        with timer.stage("request_parsing"):
+            batch, groups = await _read_batch_payload(http_request)
         
-        # Convert to numpy array
+        # index -> result; every group gets one, either here or from run_group
+        group_results: Dict[int, dict] = {}
+        pending = []
+        for index, group in enumerate(groups):
+            if isinstance(group[1], HTTPException):
+                group_results[index] = _batch_error(index, *group)
+            else:
+                pending.append((index, *group))
+        
+        with timer.stage("admission_wait"):
+            try:
+                ticket = await admission_controller.acquire("umap_transform_batch", _estimate_batch_memory(pending))
+            except AdmissionRejected as e:
+                raise _admission_error(e)
+        try:
+            with timer.stage("model_resolve"):
+                model_ids = await _resolve_batch_models(pending)
+            with timer.stage("batch_transform"):
+                semaphore = asyncio.Semaphore(max(1, BATCH_TRANSFORM_PARALLELISM))
+                
+                async def run_group(index: int, group_id: Optional[str], request: DimensionReductionRequest, X: Optional[np.ndarray], fitted_model_bytes: Optional[bytes], model_id) -> None:
+                    if isinstance(model_id, HTTPException):
+                        group_results[index] = _batch_error(index, group_id, model_id)
+                        return
+                    async with semaphore:
+                        # Model bytes stay attached in case the registry evicts the model meanwhile
+                        group_results[index] = await _run_batch_group(index, group_id, request.model_copy(update={"model_id": model_id}), X, fitted_model_bytes)
+                
+                await asyncio.gather(*(
+                    run_group(index, group_id, request, X, fitted_model_bytes, model_id)
+                    for (index, group_id, request, X, fitted_model_bytes), model_id in zip(pending, model_ids)
+                ))
+        finally:
+            ticket.release()
+        
+        results = [group_results[index] for index in range(len(groups))]
+        n_samples = sum(result["result"]["n_samples"] for result in results if result["result"] is not None)
+        response_data = {
+            "results": results,
+            "n_groups": len(results),
+            "n_failed": sum(1 for result in results if result["status"] == "error"),
+            "n_samples": n_samples,
+            "n_models": len(set(model_id for model_id in model_ids if isinstance(model_id, str))),
+            "processing_time_ms": int((time.perf_counter() - request_start) * 1000)
+        }
+        if batch.include_stage_timings:
+            response_data["stage_timings_ms"] = timer.as_dict()
+        status = "ok"
+        with timer.stage("response_encoding"):
+            if is_msgpack_content_type(http_request.headers.get("accept")):
+                try:
+                    return Response(content=encode_reduce_response(response_data), media_type=MSGPACK_CONTENT_TYPE)
+                except WireFormatError as e:
+                    raise HTTPException(status_code=406, detail=str(e))
+            for result in results:
+                if result["result"] is not None:
+                    result["result"] = DimensionReductionResponse(**_to_json_response_data(result["result"]))
+            return Response(content=BatchTransformResponse(**response_data).model_dump_json(), media_type="application/json")
+    except HTTPException as e:
+        if e.headers and "Retry-After" in e.headers:
+            status = "rejected"
+        raise
+    finally:
+        reduction_metrics.observe(
+            "umap_transform_batch", status, n_samples, None, timer.as_dict(), (time.perf_counter() - request_start) * 1000
+        )
+
+def _estimate_batch_memory(pending: list) -> int:
+    """Estimated working set of a batch's pending groups: only BATCH_TRANSFORM_PARALLELISM run at once, so the largest that many"""
+    estimates = sorted((_estimate_request_memory(request, X) for _, _, request, X, _ in pending), reverse=True)
+    return sum(estimates[:max(1, BATCH_TRANSFORM_PARALLELISM)])
+
+async def _read_batch_payload(http_request: Request) -> tuple[BatchTransformRequest, list]:
+    """
+    Decode a JSON or msgpack /reduce/batch body
+    
+    Returns:
+        (batch, groups) - each group is (group_id, request, vectors, fitted_model_bytes), or
+        (group_id, HTTPException) if it is invalid
+    """
+    body = await http_request.body()
+    try:
+        if is_msgpack_content_type(http_request.headers.get("content-type")):
+            fields, decoded = decode_batch_payload(body)
+            batch = BatchTransformRequest.model_validate({**fields, "groups": []})
+        else:
+            batch = BatchTransformRequest.model_validate_json(body)
+            decoded = [(group, None, None) for group in batch.groups]
+    except WireFormatError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid binary payload: {str(e)}")
+    except ValidationError as e:
+        raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)])
+    
+    if not decoded:
+        raise HTTPException(status_code=400, detail="No groups provided")
+    if len(decoded) > BATCH_TRANSFORM_MAX_GROUPS:
+        raise HTTPException(status_code=400, detail=f"{len(decoded)} groups exceed the limit of {BATCH_TRANSFORM_MAX_GROUPS} per batch")
+    
+    groups = []
+    for group in decoded:
+        if isinstance(group[1], WireFormatError):
+            group_id = str(group[0]) if group[0] is not None else None
+            groups.append((group_id, HTTPException(status_code=400, detail=f"Invalid binary payload: {str(group[1])}")))
+            continue
+        fields, X, fitted_model_bytes = group
+        groups.append(_parse_batch_group(fields, X, fitted_model_bytes))
+    return batch, groups
+
+def _parse_batch_group(fields: dict, X: Optional[np.ndarray], fitted_model_bytes: Optional[bytes]) -> tuple:
+    """(group_id, request, vectors, fitted_model_bytes) of one batch group, or (group_id, HTTPException) if it is invalid"""
+    fields = dict(fields)
+    group_id = fields.pop("group_id", None)
+    group_id = str(group_id) if group_id is not None else None
+    fields.setdefault("method", "umap_transform")
+    if X is not None:
+        fields["vectors"] = []
+    try:
+        request = _parse_reduce_request(fields)
+    except RequestValidationError as e:
+        errors = "; ".join(f"{'.'.join(str(part) for part in error['loc'][1:])}: {error['msg']}" for error in e.errors())
+        return group_id, HTTPException(status_code=422, detail=f"Invalid group: {errors}")
+    if request.method != "umap_transform":
+        return group_id, HTTPException(status_code=400, detail=f"/reduce/batch only supports umap_transform, got {request.method}")
+    if request.fitted_umap_model:
+        # Model bytes travel next to the request, like msgpack ones
+        fitted_model_bytes = bytes(request.fitted_umap_model)
+        request = request.model_copy(update={"fitted_umap_model": None})
+    if not request.model_id and not fitted_model_bytes:
+        return group_id, HTTPException(status_code=400, detail="model_id or fitted_umap_model is required for umap_transform method")
+    return group_id, request, X, fitted_model_bytes
+
+def _batch_model_key(request: DimensionReductionRequest, fitted_model_bytes: Optional[bytes]) -> str:
+    """Groups sending the same model id, or the same bytes without one, share a model resolution"""
+    if request.model_id or fitted_model_bytes is None:
+        # _parse_batch_group rejects groups with neither
+        return request.model_id or ""
+    return model_registry.compute_model_id(fitted_model_bytes)
+
+async def _resolve_batch_models(pending: list) -> list:
+    """Registry id of each pending group's model (or the HTTPException of its failed resolution), resolving every distinct model once"""
+    # Hashing model bytes is kept off the event loop
+    keys = await run_in_threadpool(lambda: [_batch_model_key(request, fitted_model_bytes) for _, _, request, _, fitted_model_bytes in pending])
+    sources = {}
+    for key, (_, _, request, _, fitted_model_bytes) in zip(keys, pending):
+        # Prefer a group that also sent the bytes, so a registry miss can still be served
+        if key not in sources or sources[key][1] is None:
+            sources[key] = (request, fitted_model_bytes)
+    
+    semaphore = asyncio.Semaphore(max(1, BATCH_TRANSFORM_PARALLELISM))
+    model_ids = {}
+    
+    async def resolve(key: str, request: DimensionReductionRequest, fitted_model_bytes: Optional[bytes]) -> None:
+        async with semaphore:
+            try:
+                model_ids[key] = (await run_in_threadpool(_resolve_transform_model, request, fitted_model_bytes))[0]
+            except HTTPException as e:
+                model_ids[key] = e
+    
+    await asyncio.gather(*(resolve(key, *source) for key, source in sources.items()))
+    return [model_ids[key] for key in keys]
+
+async def _run_batch_group(index: int, group_id: Optional[str], request: DimensionReductionRequest, X: Optional[np.ndarray], fitted_model_bytes: Optional[bytes]) -> dict:
+    """Transform one batch group like a /reduce call (result cache, micro-batcher, thread pool), without its own admission"""
+    timer = StageTimer()
+    try:
+        response_data = await _reduce(request, X, fitted_model_bytes, timer, admit=False)
+    except HTTPException as e:
+        return _batch_error(index, group_id, e)
+    except Exception as e:
+        logger.error(f"Batch group {index} failed: {str(e)}")
+        return _batch_error(index, group_id, HTTPException(status_code=500, detail=f"Internal server error: {str(e)}"))
+    if request.include_stage_timings:
+        response_data["stage_timings_ms"] = timer.as_dict()
+    return {"index": index, "group_id": group_id, "status": "ok", "status_code": 200, "error": None, "result": response_data}
+
+def _batch_error(index: int, group_id: Optional[str], error: HTTPException) -> dict:
+    return {"index": index, "group_id": group_id, "status": "error", "status_code": error.status_code, "error": str(error.detail), "result": None}
+
+async def _read_reduce_payload(http_request: Request) -> tuple[DimensionReductionRequest, Optional[np.ndarray], Optional[bytes]]:
+    """Decode a JSON or msgpack /reduce body into the request, pre-decoded vectors and model bytes"""
+    body = await http_request.body()
+    
+    if is_msgpack_content_type(http_request.headers.get("content-type")):
+        try:
+            fields, X, fitted_model_bytes = decode_reduce_payload(body)
+        except WireFormatError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid binary payload: {str(e)}")
+        # Validate the scalar fields only; the arrays are already decoded
+        fields["vectors"] = []
+        return _parse_reduce_request(fields), X, fitted_model_bytes
+    
+    return _parse_reduce_request(body), None, None
+
+async def _batched_umap_transform(request: DimensionReductionRequest, X: Optional[np.ndarray], fitted_model_bytes: Optional[bytes]) -> dict:
+    """
+    Queue a umap_transform with the micro-batcher and return this caller's slice of the result
+    
+    Only transforms that place every row independently of the others coalesce (the NumPy
+    engine and PCA models). UMAP's own transform prunes edges and picks its epoch count
+    from the size of the whole batch, so a caller's coordinates (and the result cached
+    under its key) would change with unrelated concurrent traffic; those run on their own.
+    """
+    if X is None:
+        X = _vectors_to_array(request)
+    if X.ndim != 2:
+        raise HTTPException(status_code=400, detail="Vectors must be 2-dimensional array")
+    if X.shape[0] == 0:
+        raise HTTPException(status_code=400, detail="No vectors provided")
+    if request.node_ids is not None and len(request.node_ids) != X.shape[0]:
+        raise HTTPException(status_code=400, detail=f"node_ids has {len(request.node_ids)} entries for {X.shape[0]} vectors")
+    
+    if fitted_model_bytes is None and request.fitted_umap_model:
+        fitted_model_bytes = bytes(request.fitted_umap_model)
+    
+    # transform_engine="auto" is resolved from this caller's rows rather than the merged batch's
+    _, fitted_model, _ = await run_in_threadpool(model_registry.get_or_register, request.model_id, fitted_model_bytes)
+    engine = _select_transform_engine(request.transform_engine, X.shape[0], fitted_model) if fitted_model is not None else None
+    if engine not in _ROW_INDEPENDENT_TRANSFORM_ENGINES:
+        # Also a registry miss without bytes: the solo path raises the 404
+        return await run_in_threadpool(_run_reduction, request, X, fitted_model_bytes)
+    
+    # Pin the engine: "auto" would otherwise be resolved again from the merged batch's rows
+    pinned_engine = TRANSFORM_ENGINE_NUMPY if engine == TRANSFORM_ENGINE_NUMPY else request.transform_engine
+    context = (request.model_copy(update={"vectors": [], "node_ids": None, "fitted_umap_model": None, "transform_engine": pinned_engine}), fitted_model_bytes)
+    batch = await transform_batcher.submit(_transform_batch_key(request, X, engine), context, X)
+    
+    response_data = dict(batch.result)
+    drift_scores = response_data.pop("drift_scores", None)
+    if drift_scores is not None:
+        response_data["drift"] = _summarize_drift(drift_scores[0].slice(batch.start, batch.stop), drift_scores[1])
+    response_data.update({
+        "coordinates": batch.result["coordinates"][batch.start:batch.stop],
+        "n_samples": batch.stop - batch.start,
+        "processing_time_ms": batch.result["processing_time_ms"] + int(batch.wait_ms),
+        "batched_requests": batch.batch_requests,
+        "batch_wait_ms": batch.wait_ms
+    })
+    return response_data
+
+def _transform_batch_key(request: DimensionReductionRequest, X: np.ndarray, engine: str) -> tuple:
+    """
+    Micro-batching key: requests only coalesce when they would run the same transform on
+    same-width vectors and get the same response fields back
+    """
+    drift_baseline = json.dumps(request.drift_baseline, sort_keys=True, default=str) if request.drift_baseline is not None else None
+    return (
+        request.model_id, engine, request.graph_id, X.shape[1], request.target_dimensions,
+        request.include_transformation_matrix, request.drift_metrics, drift_baseline
+    )
+
+def _result_cache_key(request: DimensionReductionRequest, X: Optional[np.ndarray], fitted_model_bytes: Optional[bytes]) -> tuple[str, DimensionReductionRequest, Optional[np.ndarray]]:
+    """
+    Content hash of everything that determines a reduction's result
+    
+    JSON vectors are converted here and handed on as X so they are not parsed twice.
+    
+    Returns:
+        (key, request, X) - the request without its JSON vectors when they were converted
+    """
+    vectors = X if X is not None else _vectors_to_array(request)
+    parameters = request.model_dump(exclude={"vectors", "vectors_path", "fitted_umap_model", "use_result_cache"})
+    if request.method == "linear_transformation" and request.graph_id:
+        # The stored projection changes as transforms stream in, so its state is part of the key
+        projection = linear_projection_store.get(request.graph_id)
+        parameters["linear_projection_samples"] = projection.n_samples if projection is not None else None
+    if fitted_model_bytes is None and request.fitted_umap_model:
+        fitted_model_bytes = bytes(request.fitted_umap_model)
+    key = compute_result_key(vectors, parameters, fitted_model_bytes)
+    
+    if X is None and not request.vectors_path:
+        return key, request.model_copy(update={"vectors": []}), vectors
+    # Memory-mapped inputs stay unread here; workers map the file themselves
+    return key, request, X
+
+def _cacheable_response(response_data: dict) -> dict:
+    """Copy of a response for the result cache that doesn't pin a larger coordinate buffer"""
+    cached = dict(response_data)
+    if isinstance(cached["coordinates"], np.ndarray):
+        # Micro-batched transforms return views into the whole batch's coordinates
+        cached["coordinates"] = cached["coordinates"].copy()
+    return cached
+
+def _result_cache_hit(cached: dict, lookup_start: float) -> dict:
+    """Response for a result cache hit; fitted models are re-registered in case they were evicted"""
+    response_data = dict(cached)
+    if response_data.get("method") == "umap_learning" and response_data.get("fitted_umap_model"):
+        model_registry.register(response_data["fitted_umap_model"])
+    response_data["processing_time_ms"] = int((time.perf_counter() - lookup_start) * 1000)
+    response_data["result_cache_hit"] = True
+    return response_data
+
+def _encode_reduce_response(http_request: Request, response_data: dict) -> Response:
+    """Return reduction results as msgpack when the client accepts it, JSON otherwise"""
+    if is_msgpack_content_type(http_request.headers.get("accept")):
         try:
-            X = np.array(request.vectors, dtype=np.float32)
-        except (ValueError, TypeError) as e:
-            raise HTTPException(status_code=400, detail=f"Invalid vector format: {str(e)}")
+            return Response(content=encode_reduce_response(response_data), media_type=MSGPACK_CONTENT_TYPE)
+        except WireFormatError as e:
+            raise HTTPException(status_code=406, detail=str(e))
+    
+    # Serialized here rather than by FastAPI so that response_encoding covers the whole encode
+    response = DimensionReductionResponse(**_to_json_response_data(response_data))
+    return Response(content=response.model_dump_json(), media_type="application/json")
+
+def _submit_reduction_job(request: DimensionReductionRequest, X: Optional[np.ndarray], fitted_model_bytes: Optional[bytes], finalize: Optional[Callable[[dict], dict]] = None) -> ReductionJob:
+    """
+    Queue a reduction with the job manager
+    
+    Fits go to the process pool, except PCA layouts, which take milliseconds and would
+    mostly pay for pickling; everything else runs in the thread pool because it relies
+    on parent-side state such as the model registry.
+    """
+    use_process_pool = request.method == "umap_learning"
+    if use_process_pool:
+        shape = _input_shape(request, X)
+        # The worker repeats this (deterministic) selection
+        use_process_pool = shape is None or _resolve_backend(request, *shape)[0].name != BACKEND_PCA
+    previous_knn_graph = None
+    if use_process_pool and request.graph_id and request.node_ids:
+        previous_knn_graph = knn_graph_store.get(request.graph_id)
+    if use_process_pool and X is None and not request.vectors_path:
+        # Ship one contiguous array to the worker instead of pickling nested lists
+        X = _vectors_to_array(request)
+        request = request.model_copy(update={"vectors": []})
+    if use_process_pool and X is not None and (X.ndim != 2 or X.shape[0] < 2):
+        # Reject before occupying a worker process
+        raise HTTPException(status_code=400, detail="At least 2 vectors required for UMAP learning")
+    
+    try:
+        return job_manager.submit(
+            _run_reduction,
+            (request, X, fitted_model_bytes, previous_knn_graph),
+            method=request.method,
+            use_process_pool=use_process_pool,
+            finalize=finalize or _finalize_reduction
+        )
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(JOB_RETRY_AFTER_SECONDS)})
+
+def _finalize_reduction(response_data: dict) -> dict:
+    """Parent-side bookkeeping for results computed in a worker: register fitted models, kNN graphs and projections"""
+    knn_graph = response_data.pop("knn_graph_state", None)
+    if knn_graph is not None:
+        knn_graph_store.put(knn_graph)
+    
+    linear_projection = response_data.pop("linear_projection_state", None)
+    
+    fitted_model_bytes = response_data.get("fitted_umap_model")
+    if response_data.get("method") == "umap_learning" and fitted_model_bytes:
+        model_id = model_registry.register(fitted_model_bytes)
+        response_data["model_id"] = model_id
+        if response_data.get("model_metadata") is not None:
+            response_data["model_metadata"]["model_id"] = model_id
+        if linear_projection is not None:
+            # Later umap_transform results only update the projection of this model's frame
+            linear_projection.model_id = model_id
+            linear_projection_store.put(linear_projection)
+    return response_data
+
+def _finalize_job_reduction(request: DimensionReductionRequest, response_data: dict) -> dict:
+    """_finalize_reduction for /jobs/reduce, which also records the job's metrics"""
+    response_data = _finalize_reduction(response_data)
+    stage_timings = response_data.pop("stage_timings_ms", None) or {}
+    reduction_metrics.observe(
+        request.method, "ok", response_data.get("n_samples"), response_data.get("input_dimensions"),
+        stage_timings, response_data.get("processing_time_ms")
+    )
+    if request.include_stage_timings:
+        response_data["stage_timings_ms"] = stage_timings
+    return response_data
+
+def _vectors_to_array(request: DimensionReductionRequest) -> np.ndarray:
+    """Validate JSON vectors and convert them to a float32 array (or memory-map vectors_path)"""
+    if request.vectors_path:
+        return _load_vectors_file(request.vectors_path)
+    
+    # Validate input
+    if not request.vectors:
+        raise HTTPException(status_code=400, detail="No vectors provided")
+    try:
+        return np.array(request.vectors, dtype=np.float32)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid vector format: {str(e)}")
+
+def _load_vectors_file(vectors_path: str) -> np.ndarray:
+    """Memory-map a 2D float .npy file from REDUCER_INPUT_DIR"""
+    if not REDUCER_INPUT_DIR:
+        raise HTTPException(status_code=400, detail="vectors_path is not enabled on this server (REDUCER_INPUT_DIR unset)")
+    
+    input_dir = os.path.realpath(REDUCER_INPUT_DIR)
+    path = os.path.realpath(os.path.join(input_dir, vectors_path))
+    if os.path.commonpath([input_dir, path]) != input_dir or not path.endswith(".npy"):
+        raise HTTPException(status_code=400, detail="vectors_path must name a .npy file inside REDUCER_INPUT_DIR")
+    
+    try:
+        X = np.load(path, mmap_mode="r", allow_pickle=False)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"vectors_path {vectors_path} not found")
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid vectors file: {str(e)}")
+    
+    if X.ndim != 2 or X.dtype.kind != "f":
+        raise HTTPException(status_code=400, detail=f"vectors_path must hold a 2D float array, got {X.ndim}D {X.dtype}")
+    return X
+
+def _parse_reduce_request(payload) -> DimensionReductionRequest:
+    """Validate a /reduce payload (raw JSON bytes or decoded fields), mirroring FastAPI's 422 errors"""
+    try:
+        if isinstance(payload, (bytes, bytearray)):
+            request = DimensionReductionRequest.model_validate_json(payload)
+        else:
+            request = DimensionReductionRequest.model_validate(payload)
+    except ValidationError as e:
+        raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)])
+    if request.method == "auto":
+        # Everything downstream (job routing, model registration, admission) treats it as a fit
+        request = request.model_copy(update={"method": "umap_learning", "backend": BACKEND_AUTO})
+    return request
+
+def _to_json_response_data(response_data: dict) -> dict:
+    """Convert the NumPy/bytes members of reduction results into JSON-compatible values"""
+    json_data = dict(response_data)
+    coordinates = json_data["coordinates"]
+    json_data["coordinates"] = coordinates.tolist() if isinstance(coordinates, np.ndarray) else coordinates
+    if isinstance(json_data.get("fitted_umap_model"), (bytes, bytearray)):
+        json_data["fitted_umap_model"] = list(json_data["fitted_umap_model"])
+    return json_data
+
+def _run_reduction(request: DimensionReductionRequest, X: Optional[np.ndarray] = None, fitted_model_bytes: Optional[bytes] = None, previous_knn_graph: Optional[KnnGraph] = None, progress: Optional[ProgressCallback] = None, keep_drift_scores: bool = False) -> dict:
+    """
+    Core of /reduce, independent of the wire format and of where it runs
+    
+    Runs either in the thread pool or in a worker process, so it must not rely on
+    parent-side state for umap_learning (see _finalize_reduction).
+    
+    Args:
+        request: Validated request (request.vectors is ignored when X is given)
+        X: Pre-decoded vectors from the binary transport
+        fitted_model_bytes: Raw model bytes from the binary transport
+        previous_knn_graph: kNN graph of the previous fit of request.graph_id, if any
+        progress: Optional callback receiving (stage, fraction) updates
+        keep_drift_scores: Return umap_transform's per-row drift scores and baseline as
+            drift_scores instead of the drift summary, for callers that split or join batches
+    
+    Returns:
+        Response data with coordinates as an ndarray, the fitted model as bytes and
+        stage_timings_ms for the caller to record
+    """
+    start_time = time.time()
+    timer = StageTimer()
+    
+    try:
+        # Convert to numpy array
+        if X is None:
+            with timer.stage("vector_conversion"):
+                X = _vectors_to_array(request)
         
         if X.ndim != 2:
             raise HTTPException(status_code=400, detail="Vectors must be 2-dimensional array")
         
+        if X.shape[0] == 0:
+            raise HTTPException(status_code=400, detail="No vectors provided")
+        
+        if fitted_model_bytes is None and request.fitted_umap_model:
+            # Convert byte array back to bytes
+            fitted_model_bytes = bytes(request.fitted_umap_model)
+        
         n_samples, input_dims = X.shape
+        
+        if request.node_ids is not None and len(request.node_ids) != n_samples:
+            raise HTTPException(status_code=400, detail=f"node_ids has {len(request.node_ids)} entries for {n_samples} vectors")
+        
         logger.info(f"Processing {n_samples} vectors with {input_dims} dimensions using {request.method}")
         
         # Validate parameters based on sample size
@@ -147,12 +1347,28 @@ async def reduce_dimensions(request: DimensionReductionRequest):
         
         # Perform dimension reduction
         if request.method == "umap_learning":
-            coordinates, transformation_matrix, fitted_model_bytes, umap_params, model_metadata = _reduce_with_umap_learning(X, request)
+            backend, backend_selection = _resolve_backend(request, n_samples, input_dims)
+            if isinstance(backend, LayoutBackend):
+                learning_result = _reduce_with_backend(X, request, backend, progress, timer)
+            elif request.landmark_count and n_samples > request.landmark_count:
+                learning_result = _reduce_with_landmarks(X, request, progress, previous_knn_graph, timer)
+            else:
+                learning_result = _reduce_with_umap_learning(np.asarray(X, dtype=np.float32), request, progress, previous_knn_graph, timer)
+            learning_result["backend"] = backend.name
+            learning_result["model_metadata"]["backend"] = backend.name
+            if backend_selection is not None:
+                learning_result["model_metadata"]["backend_selection"] = backend_selection
+            coordinates = learning_result.pop("coordinates")
         elif request.method == "linear_transformation":
-            # DISABLED: Linear transformation is disabled for simplicity
-            raise HTTPException(status_code=400, detail="Linear transformation is disabled. Use umap_learning or umap_transform instead.")
+            with timer.stage("linear_transform"):
+                coordinates, transformation_matrix = _reduce_with_linear_transformation(X, request)
         elif request.method == "umap_transform":
-            coordinates = _reduce_with_umap_transform(X, request)
+            coordinates, model_id, model_cache_hit, transform_engine, drift_scores = _reduce_with_umap_transform(X, request, fitted_model_bytes, timer)
+            # New nodes and their UMAP coordinates refresh the graph's linear projection
+            with timer.stage("linear_projection_update"):
+                projection = _update_linear_projection(request.graph_id, model_id, X, coordinates)
+            # Re-solving the ridge system is deferred until someone reads the matrix
+            projection_matrix = projection.matrix if projection is not None and request.include_transformation_matrix else None
         else:
             raise HTTPException(status_code=400, detail=f"Unknown method: {request.method}")
         
@@ -162,7 +1378,7 @@ async def reduce_dimensions(request: DimensionReductionRequest):
         
         # Prepare response data
         response_data = {
-            "coordinates": coordinates.tolist(),
+            "coordinates": np.asarray(coordinates, dtype=np.float32),
             "method": request.method,
             "processing_time_ms": processing_time,
             "input_dimensions": input_dims,
@@ -172,19 +1388,29 @@ async def reduce_dimensions(request: DimensionReductionRequest):
         
         # Add UMAP learning specific data
         if request.method == "umap_learning":
+            response_data.update(learning_result)
+            response_data["is_incremental"] = False
+        elif request.method == "linear_transformation":
             response_data.update({
-                "transformation_matrix": transformation_matrix,
-                "umap_parameters": umap_params,
-                "fitted_umap_model": list(fitted_model_bytes) if fitted_model_bytes else None,
-                "model_metadata": model_metadata,
-                "is_incremental": False
+                "is_incremental": True,
+                "transformation_matrix": transformation_matrix.tolist()
             })
         elif request.method == "umap_transform":
             response_data.update({
-                "is_incremental": True
+                "is_incremental": True,
+                "model_id": model_id,
+                "model_cache_hit": model_cache_hit,
+                "transform_engine": transform_engine
             })
+            if drift_scores is not None and keep_drift_scores:
+                response_data["drift_scores"] = drift_scores
+            elif drift_scores is not None:
+                response_data["drift"] = _summarize_drift(drift_scores[0], drift_scores[1])
+            if projection_matrix is not None:
+                response_data["transformation_matrix"] = projection_matrix.tolist()
         
-        return DimensionReductionResponse(**response_data)
+        response_data["stage_timings_ms"] = timer.as_dict()
+        return response_data
         
     except HTTPException:
         raise
@@ -192,7 +1418,7 @@ async def reduce_dimensions(request: DimensionReductionRequest):
         logger.error(f"Unexpected error during dimension reduction: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-def _reduce_with_umap_learning(X: np.ndarray, request: DimensionReductionRequest) -> tuple[np.ndarray, List[List[float]], dict]:
+def _reduce_with_umap_learning(X: np.ndarray, request: DimensionReductionRequest, progress: Optional[ProgressCallback] = None, previous_knn_graph: Optional[KnnGraph] = None, timer: Optional[StageTimer] = None) -> dict:
     """
     V11.0 Cosmos: UMAP Learning Phase
     
@@ -200,11 +1426,26 @@ def _reduce_with_umap_learning(X: np.ndarray, request: DimensionReductionRequest
     1. UMAP learns the manifold structure
     2. Ridge regression creates a linear transformation matrix
     3. Matrix enables fast, deterministic positioning of new nodes
+    
+    The fitted model is returned serialized; registering it is left to the caller
+    because this may run in a worker process.
+    
+    With graph_id and node_ids, the cosine kNN graph of the previous fit is updated
+    incrementally and passed to UMAP as a precomputed kNN. With previous_coordinates,
+    the fit is warm-started from the previous layout and aligned back onto its frame.
+    With pre_reduction, UMAP is fitted on a PCA / random projection of the vectors and the
+    projector is stored with the model; the Ridge matrix still maps the full embeddings.
+    
+    Returns:
+        Learning-specific response fields (coordinates, transformation_matrix,
+        fitted_umap_model, umap_parameters, model_metadata, moved_node_ids) plus
+        knn_graph_state and linear_projection_state for the caller to store
     """
     if not UMAP_AVAILABLE:
         raise HTTPException(status_code=503, detail="UMAP not available")
     if not SKLEARN_AVAILABLE:
         raise HTTPException(status_code=503, detail="scikit-learn not available for Ridge regression")
+    timer = timer or StageTimer()
     
     try:
         n_samples = X.shape[0]
@@ -220,62 +1461,514 @@ def _reduce_with_umap_learning(X: np.ndarray, request: DimensionReductionRequest
             "metric": "cosine"
         }
         
-        # Step 1: Generate UMAP coordinates
+        # Step 0: Optionally project to a narrower space before any neighbour search
+        X_fit = X
+        pre_reducer = None
+        pre_reduction_stats = None
+        if request.pre_reduction and X.shape[1] > request.pre_reduction_dimensions:
+            if progress:
+                progress("pre_reduction", 0.01)
+            # Reusing the graph's projector keeps the reduced space stable across refits
+            previous_pre_reducer = previous_knn_graph.pre_reducer if previous_knn_graph is not None else None
+            with timer.stage("pre_reduction"):
+                X_fit, pre_reducer, pre_reduction_stats = pre_reduce(
+                    X, request.pre_reduction, request.pre_reduction_dimensions, umap_params["random_state"], previous_pre_reducer
+                )
+                pre_reduction_stats["neighbourhood_preservation"] = neighbourhood_preservation(X, X_fit, n_neighbors, umap_params["random_state"])
+            umap_params.update({"pre_reduction": request.pre_reduction, "pre_reduction_dimensions": pre_reducer.output_dimensions})
+            logger.info(f"UMAP Learning: pre-reduced {X.shape[1]} -> {pre_reducer.output_dimensions} dims with {request.pre_reduction} (neighbourhood preservation {pre_reduction_stats['neighbourhood_preservation']:.3f})")
+        
+        # Step 1: Seed the layout from previous coordinates when available
+        warm_start = None
+        if request.previous_coordinates and request.node_ids:
+            with timer.stage("warm_start"):
+                warm_start = prepare_warm_start(X_fit, request.node_ids, request.previous_coordinates, request.target_dimensions)
+        
+        # Step 2: Pin the caller's performance settings and plan the rest within time_budget_ms
+        incremental_knn = bool(request.graph_id and request.node_ids) and previous_knn_graph is not None
+        fit_plan = plan_umap_fit(
+            n_samples, X_fit.shape[1], n_neighbors, request.time_budget_ms,
+            n_epochs=request.warm_start_epochs if warm_start is not None else request.n_epochs,
+            n_jobs=request.n_jobs,
+            nn_descent=_requested_nn_descent(request),
+            allow_parallel=not request.deterministic,
+            max_threads=REDUCER_WORKER_THREADS,
+            base_epochs=WARM_START_EPOCHS if warm_start is not None else None,
+            incremental_knn=incremental_knn,
+            cost_scale=BACKEND_COST_SCALE
+        )
+        # UMAP ignores n_jobs for seeded fits
+        fit_random_state = umap_params["random_state"] if fit_plan["n_jobs"] == 1 else None
+        nn_descent_params = {"low_memory": request.low_memory, "n_jobs": fit_plan["n_jobs"], **(fit_plan["nn_descent"] or {})}
+        fit_start = time.perf_counter()
+        
+        # Step 3: Build or update the kNN graph when the caller identifies its nodes
+        knn_graph = None
+        knn_stats = None
+        precomputed_knn = (None, None, None)
+        if request.graph_id and request.node_ids:
+            if progress:
+                progress("knn_graph", 0.02)
+            with timer.stage("knn_graph"):
+                knn_graph, knn_stats, search_index = update_knn_graph(
+                    request.graph_id, request.node_ids, X_fit, n_neighbors, previous_knn_graph, fit_random_state, nn_descent_params
+                )
+                knn_graph.pre_reducer = pre_reducer
+                if search_index is None:
+                    # transform() needs a search index next to a precomputed kNN
+                    search_index = build_search_index(X_fit, knn_graph, umap_params["random_state"])
+            # UMAP edits the kNN arrays in place, so hand it copies of the stored graph
+            precomputed_knn = (
+                knn_graph.indices[:, :n_neighbors].copy(),
+                knn_graph.dists[:, :n_neighbors].copy(),
+                search_index
+            )
+            logger.info(f"UMAP Learning: kNN graph {'updated' if knn_stats['reused'] else 'built'}, {knn_stats['rows_recomputed']}/{knn_stats['n_samples']} rows recomputed")
+        elif fit_plan["nn_descent"] is not None:
+            # UMAP doesn't expose NN-descent's parameters, so the search runs here
+            from pynndescent import NNDescent
+            
+            if progress:
+                progress("knn_graph", 0.02)
+            with timer.stage("knn_graph"):
+                search_index = NNDescent(X_fit, metric="cosine", n_neighbors=n_neighbors, random_state=fit_random_state, **nn_descent_params)
+                neighbor_graph = search_index.neighbor_graph
+                if neighbor_graph is None:
+                    # Only compressed indexes drop their graph
+                    raise RuntimeError("NN-descent index has no neighbour graph")
+                knn_indices, knn_dists = neighbor_graph
+            precomputed_knn = (knn_indices, knn_dists, search_index)
+        
+        if warm_start is not None:
+            umap_params.update({
+                "init": "warm_start",
+                "n_epochs": fit_plan["n_epochs"],
+                "learning_rate": WARM_START_LEARNING_RATE
+            })
+        else:
+            # Left unset at UMAP's default, which also keeps transform()'s own epoch default
+            cold_epochs = fit_plan["n_epochs"] if request.n_epochs is not None or "n_epochs" in fit_plan["adjusted"] else None
+            umap_params.update({"init": "spectral", "n_epochs": cold_epochs, "learning_rate": 1.0})
+        umap_params.update({"low_memory": request.low_memory, "n_jobs": fit_plan["n_jobs"]})
+        if fit_random_state is None:
+            umap_params["random_state"] = None
+        
+        # Step 4: Generate UMAP coordinates
+        if progress:
+            progress("umap_fit", 0.05)
         reducer = umap.UMAP(
             n_components=request.target_dimensions,
             n_neighbors=n_neighbors,
             min_dist=umap_params["min_dist"],
             spread=umap_params["spread"],
-            random_state=umap_params["random_state"],
+            random_state=fit_random_state,
             metric=umap_params["metric"],
+            # Warm starts only build the fuzzy graph here and optimize from the unscaled init below
+            init=warm_start.init if warm_start is not None else "spectral",
+            n_epochs=0 if warm_start is not None else umap_params["n_epochs"],
+            low_memory=request.low_memory,
+            n_jobs=fit_plan["n_jobs"],
+            precomputed_knn=precomputed_knn,
             verbose=False
         )
         
-        umap_coordinates = reducer.fit_transform(X)
+        with timer.stage("umap_fit"):
+            umap_coordinates = reducer.fit_transform(X_fit)
+            if warm_start is not None:
+                umap_coordinates = optimize_from_init(
+                    reducer, warm_start.init, umap_params["n_epochs"], umap_params["learning_rate"], fit_random_state
+                )
+        fit_ms = (time.perf_counter() - fit_start) * 1000
+        fit_settings = _fit_settings(request, fit_plan, fit_ms, fit_random_state is not None, knn_stats, n_samples)
+        logger.info(f"UMAP Learning: fit took {fit_ms:.0f}ms (estimated {fit_plan['estimated_fit_ms']:.0f}ms, {fit_plan['n_epochs']} epochs, {fit_plan['n_jobs']} threads)")
+        
+        # Step 5: Align a warm-started layout back onto the previous frame
+        warm_start_stats = None
+        moved_node_ids = None
+        if warm_start is not None:
+            with timer.stage("alignment"):
+                umap_coordinates, warm_start_stats, moved_node_ids = align_to_previous(
+                    umap_coordinates, warm_start, request.node_ids or [], request.movement_threshold
+                )
+            # Keep transform() of the fitted model in the aligned frame
+            reducer.embedding_ = umap_coordinates
+            logger.info(f"UMAP Learning: warm start aligned {warm_start_stats['known_nodes']} known nodes (RMSD {warm_start_stats['procrustes_rmsd']:.3f}), {len(moved_node_ids)} nodes moved")
         
-        # Step 2: Create linear transformation matrix using Ridge regression
+        # Step 6: Create linear transformation matrix using Ridge regression
+        if progress:
+            progress("ridge_regression", 0.7)
         # This is the key part of the hybrid system!
-        transformation_matrix = _create_ridge_transformation_matrix(X, umap_coordinates)
+        with timer.stage("ridge_regression"):
+            transformation_matrix, linear_projection = _create_ridge_transformation_matrix(X, umap_coordinates, request.graph_id)
         
-        # Step 3: Serialize the fitted UMAP model
-        if not CLOUDPICKLE_AVAILABLE:
-            raise HTTPException(status_code=503, detail="cloudpickle not available for model serialization")
+        # Step 7: Serialize the fitted UMAP model in the requested format
+        if progress:
+            progress("serialize_model", 0.85)
         
-        fitted_model_bytes = cloudpickle.dumps(reducer)
+        with timer.stage("model_serialization"):
+            fitted_model_bytes, model_format_comparison = _serialize_fitted_model(reducer, X_fit, request, pre_reducer)
         
-        # Step 4: Create model metadata
+        # Step 8: Create model metadata
         model_metadata = {
             "training_node_count": X.shape[0],
             "embedding_dimension": X.shape[1],
             "target_dimensions": request.target_dimensions,
+            "model_format": request.model_format,
             "model_size_bytes": len(fitted_model_bytes),
             "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
             "umap_version": getattr(umap, '__version__', 'unknown')
         }
         
-        # Step 5: Use raw UMAP coordinates (no normalization)
+        if model_format_comparison is not None:
+            model_metadata["model_format_comparison"] = model_format_comparison
+        if pre_reduction_stats is not None:
+            model_metadata["pre_reduction"] = pre_reduction_stats
+        
+        if knn_stats is not None:
+            model_metadata["knn_graph"] = knn_stats
+        if warm_start_stats is not None:
+            model_metadata["warm_start"] = warm_start_stats
+        
+        # umap_transform compares its batches against this baseline of the training data
+        with timer.stage("drift_baseline"):
+            drift_baseline = compute_baseline(X_fit, umap_coordinates, n_neighbors, DRIFT_BASELINE_SAMPLE, training_norms=row_norms(X_fit))
+        if drift_baseline is not None:
+            model_metadata["drift_baseline"] = drift_baseline
+        
+        # Step 9: Use raw UMAP coordinates (no normalization)
         coordinates = umap_coordinates
         
         logger.info(f"UMAP Learning: Created {transformation_matrix.shape} transformation matrix and {len(fitted_model_bytes)} byte fitted model")
-        return coordinates, transformation_matrix.tolist(), fitted_model_bytes, umap_params, model_metadata
+        return {
+            "coordinates": coordinates,
+            "transformation_matrix": transformation_matrix.tolist(),
+            "fitted_umap_model": fitted_model_bytes,
+            "umap_parameters": umap_params,
+            "model_metadata": model_metadata,
+            "moved_node_ids": moved_node_ids,
+            "fit_settings": fit_settings,
+            "knn_graph_state": knn_graph,
+            "linear_projection_state": linear_projection if request.graph_id else None
+        }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"UMAP learning failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"UMAP learning failed: {str(e)}")
 
-def _reduce_with_linear_transformation(X: np.ndarray, request: DimensionReductionRequest) -> np.ndarray:
+def _requested_nn_descent(request: DimensionReductionRequest) -> Optional[dict]:
+    """NN-descent parameters pinned by the request, or None to leave them to the planner"""
+    requested = {
+        "n_trees": request.nn_descent_n_trees,
+        "n_iters": request.nn_descent_n_iters,
+        "max_candidates": request.nn_descent_max_candidates
+    }
+    return requested if any(value is not None for value in requested.values()) else None
+
+def _fit_settings(request: DimensionReductionRequest, fit_plan: dict, fit_ms: float, seeded: bool, knn_stats: Optional[dict], n_samples: int) -> dict:
+    """fit_settings of a UMAP fit: the plan it ran with next to its measured time"""
+    if knn_stats is not None and knn_stats["reused"]:
+        knn = "incremental"
+    else:
+        knn = "exact" if n_samples <= EXACT_KNN_MAX_SAMPLES else "nn_descent"
+    return {
+        "time_budget_ms": request.time_budget_ms,
+        "estimated_fit_ms": fit_plan["estimated_fit_ms"],
+        "fit_ms": round(fit_ms, 1),
+        "within_budget": fit_ms <= request.time_budget_ms if request.time_budget_ms else None,
+        "n_epochs": fit_plan["n_epochs"],
+        "n_jobs": fit_plan["n_jobs"],
+        "seeded": seeded,
+        "low_memory": request.low_memory,
+        "knn": knn,
+        "nn_descent": fit_plan["nn_descent"] if knn == "nn_descent" else None,
+        "nn_descent_precision": fit_plan["nn_descent_precision"] if knn == "nn_descent" else None,
+        "adjusted_for_budget": fit_plan["adjusted"]
+    }
+
+def _reduce_with_landmarks(X: np.ndarray, request: DimensionReductionRequest, progress: Optional[ProgressCallback] = None, previous_knn_graph: Optional[KnnGraph] = None, timer: Optional[StageTimer] = None) -> dict:
+    """
+    V11.0 Cosmos: Landmark UMAP Learning
+    
+    Fits UMAP on landmark_count representative rows (see landmarks.py) and places every
+    other row with the fitted model in chunks across a thread pool. X may be a memmap;
+    only the landmarks and one chunk per thread are loaded at a time.
+    
+    Placement uses the NumPy transform engine unless transform_engine="umap", which runs
+    single-threaded because UMAP's transform holds the GIL.
+    
+    The ridge projection and the drift baseline are refitted on the landmarks plus a sample
+    of the placed rows, so they describe the whole input rather than the spread-out
+    landmarks. The model itself only holds the landmarks, so umap_transform callers should
+    send this model_metadata.drift_baseline; a baseline computed from the model is less
+    sensitive. The kNN graph kept for graph_id covers the landmarks only.
+    
+    Returns:
+        The same fields as _reduce_with_umap_learning, with coordinates for all rows
+    """
+    n_samples = X.shape[0]
+    random_state = request.random_state or 42
+    chunk_rows = request.landmark_chunk_rows or LANDMARK_CHUNK_ROWS
+    timer = timer or StageTimer()
+    
+    if progress:
+        progress("landmark_selection", 0.01)
+    selection_start = time.perf_counter()
+    # Only called with landmark_count set (see _run_reduction)
+    landmark_rows = select_landmarks(X, request.landmark_count or n_samples, request.landmark_strategy, random_state)
+    selection_ms = (time.perf_counter() - selection_start) * 1000
+    timer.record("landmark_selection", selection_ms)
+    logger.info(f"Landmark mode: selected {landmark_rows.shape[0]} of {n_samples} rows ({request.landmark_strategy}) in {selection_ms:.0f}ms")
+    
+    # Fit on the landmarks only; node ids follow the rows so kNN reuse and warm starts still apply
+    landmark_request = request.model_copy(update={
+        "node_ids": [request.node_ids[row] for row in landmark_rows] if request.node_ids else None
+    })
+    learning_progress = (lambda stage, fraction: progress(stage, 0.02 + fraction * 0.6)) if progress else None
+    X_landmarks = np.asarray(X[landmark_rows], dtype=np.float32)
+    learning_result = _reduce_with_umap_learning(X_landmarks, landmark_request, learning_progress, previous_knn_graph, timer)
+    
+    # Place the remaining rows with the model that was just fitted
+    with timer.stage("model_load"):
+        fitted_model = _load_fitted_model(learning_result["fitted_umap_model"])
+    if request.transform_engine == TRANSFORM_ENGINE_UMAP:
+        transform, threads, engine = fitted_model.transform, 1, TRANSFORM_ENGINE_UMAP
+    else:
+        transform, threads, engine = get_numpy_engine(fitted_model).transform, LANDMARK_PLACEMENT_THREADS, TRANSFORM_ENGINE_NUMPY
+    
+    landmark_coordinates = learning_result["coordinates"]
+    coordinates = np.empty((n_samples, landmark_coordinates.shape[1]), dtype=np.float32)
+    coordinates[landmark_rows] = landmark_coordinates
+    
+    placed_mask = np.ones(n_samples, dtype=bool)
+    placed_mask[landmark_rows] = False
+    placed_rows = np.flatnonzero(placed_mask)
+    placement_progress = (lambda fraction: progress("landmark_placement", 0.62 + fraction * 0.35)) if progress else None
+    placement_stats = place_in_chunks(transform, X, placed_rows, coordinates, chunk_rows, threads, placement_progress)
+    timer.record("landmark_placement", placement_stats["placement_ms"])
+    logger.info(f"Landmark mode: placed {placed_rows.shape[0]} rows in {placement_stats['chunks']} chunks ({engine} engine, {placement_stats['placement_ms']:.0f}ms)")
+    
+    if learning_result.get("moved_node_ids") is not None:
+        # Placed nodes count as moved when they are new or left their previous position
+        # (moved_node_ids is only set for warm starts, which need both fields)
+        previous = request.previous_coordinates or {}
+        node_ids = request.node_ids or []
+        for row in placed_rows:
+            node_id = node_ids[row]
+            previous_coordinate = previous.get(node_id)
+            if previous_coordinate is None or len(previous_coordinate) != coordinates.shape[1] or \
+                    np.linalg.norm(coordinates[row] - np.asarray(previous_coordinate, dtype=np.float32)) > request.movement_threshold:
+                learning_result["moved_node_ids"].append(node_id)
+    
+    if placed_rows.shape[0]:
+        _refit_landmark_state(learning_result, fitted_model, X, X_landmarks, landmark_coordinates, coordinates, placed_rows, request, random_state, timer)
+    
+    learning_result["coordinates"] = coordinates
+    learning_result["model_metadata"]["landmarks"] = {
+        "strategy": request.landmark_strategy,
+        "landmark_count": int(landmark_rows.shape[0]),
+        "n_samples": n_samples,
+        "selection_ms": round(selection_ms, 2),
+        "transform_engine": engine,
+        **placement_stats
+    }
+    return learning_result
+
+def _refit_landmark_state(
+    learning_result: dict,
+    fitted_model,
+    X: np.ndarray,
+    X_landmarks: np.ndarray,
+    landmark_coordinates: np.ndarray,
+    coordinates: np.ndarray,
+    placed_rows: np.ndarray,
+    request: DimensionReductionRequest,
+    random_state: int,
+    timer: StageTimer,
+) -> None:
+    """Replace a landmark fit's ridge projection and drift baseline with ones that include a sample of the placed rows"""
+    if placed_rows.shape[0] > LANDMARK_STATE_SAMPLE_ROWS:
+        sample_rows = np.sort(np.random.default_rng(random_state).choice(placed_rows, LANDMARK_STATE_SAMPLE_ROWS, replace=False))
+    else:
+        sample_rows = placed_rows
+    X_sample = np.asarray(X[sample_rows], dtype=np.float32)
+    
+    with timer.stage("ridge_regression"):
+        transformation_matrix, linear_projection = _create_ridge_transformation_matrix(
+            np.concatenate([X_landmarks, X_sample]), np.concatenate([landmark_coordinates, coordinates[sample_rows]]), request.graph_id
+        )
+    learning_result["transformation_matrix"] = transformation_matrix.tolist()
+    learning_result["linear_projection_state"] = linear_projection if request.graph_id else None
+    
+    with timer.stage("drift_baseline"):
+        try:
+            rows = score_rows(fitted_model, X_sample, coordinates[sample_rows], DRIFT_BASELINE_SAMPLE)
+            drift_baseline = placement_baseline(rows, X_landmarks.shape[0], learning_result["umap_parameters"]["n_neighbors"]) if rows is not None else None
+        except Exception as e:
+            # The landmark baseline from _reduce_with_umap_learning is kept
+            logger.warning(f"Landmark mode: drift baseline of placed rows failed: {str(e)}")
+            drift_baseline = None
+    if drift_baseline is not None:
+        learning_result["model_metadata"]["drift_baseline"] = drift_baseline
+
+def _resolve_backend(request: DimensionReductionRequest, n_samples: int, dims: int) -> tuple[ReducerBackend, Optional[dict]]:
+    """
+    Backend of a umap_learning request
+    
+    Returns:
+        (backend, selection) - selection describes the choice of backend="auto", else None
+    """
+    if request.backend != BACKEND_AUTO:
+        backend = get_backend(request.backend)
+        if not backend.is_available():
+            raise HTTPException(status_code=503, detail=f"{backend.name} backend not available")
+        return backend, None
+    
+    if request.landmark_count and n_samples > request.landmark_count:
+        # Landmark mode exists to bring large UMAP fits within budget
+        return get_backend(BACKEND_UMAP), {"requested": BACKEND_AUTO, "selected": BACKEND_UMAP, "reason": "landmark mode", "time_budget_ms": request.time_budget_ms}
+    try:
+        return select_backend(n_samples, dims, request.target_dimensions, request.time_budget_ms, BACKEND_COST_SCALE, request.n_neighbors or 15)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+def _reduce_with_backend(X: np.ndarray, request: DimensionReductionRequest, backend: LayoutBackend, progress: Optional[ProgressCallback] = None, timer: Optional[StageTimer] = None) -> dict:
+    """
+    V11.0 Cosmos: Learning Phase on a non-UMAP backend (PCA, t-SNE)
+    
+    Fits the backend's layout, then derives the Ridge matrix and serializes the fitted
+    model like _reduce_with_umap_learning, so linear_transformation and umap_transform
+    work the same on every backend. kNN graph reuse, warm starts, pre-reduction and
+    landmark mode are UMAP features and are ignored here. Backend models are always
+    pickled; the compact format only covers UMAP models.
+    
+    Returns:
+        The same fields as _reduce_with_umap_learning
+    """
+    if not SKLEARN_AVAILABLE:
+        raise HTTPException(status_code=503, detail="scikit-learn not available")
+    if cloudpickle is None:
+        raise HTTPException(status_code=503, detail="cloudpickle not available for model serialization")
+    timer = timer or StageTimer()
+    
+    try:
+        if progress:
+            progress(f"{backend.name}_fit", 0.05)
+        fit_start = time.perf_counter()
+        with timer.stage(f"{backend.name}_fit"):
+            coordinates, fitted_model, parameters = backend.fit(
+                np.asarray(X, dtype=np.float32), request.target_dimensions, request.random_state or 42, {"perplexity": request.tsne_perplexity}
+            )
+        fit_ms = (time.perf_counter() - fit_start) * 1000
+        fit_settings = {
+            "time_budget_ms": request.time_budget_ms,
+            "estimated_fit_ms": round(backend.estimate_fit_ms(X.shape[0], X.shape[1], request.target_dimensions) * BACKEND_COST_SCALE, 1),
+            "fit_ms": round(fit_ms, 1),
+            "within_budget": fit_ms <= request.time_budget_ms if request.time_budget_ms else None
+        }
+        
+        if progress:
+            progress("ridge_regression", 0.7)
+        with timer.stage("ridge_regression"):
+            transformation_matrix, linear_projection = _create_ridge_transformation_matrix(X, coordinates, request.graph_id)
+        
+        if progress:
+            progress("serialize_model", 0.85)
+        with timer.stage("model_serialization"):
+            fitted_model_bytes = cloudpickle.dumps(fitted_model)
+        
+        model_metadata = {
+            "training_node_count": X.shape[0],
+            "embedding_dimension": X.shape[1],
+            "target_dimensions": request.target_dimensions,
+            "model_format": "pickle",
+            "model_size_bytes": len(fitted_model_bytes),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        }
+        with timer.stage("drift_baseline"):
+            drift_baseline = model_baseline(fitted_model, DRIFT_BASELINE_SAMPLE)
+        if drift_baseline is not None:
+            model_metadata["drift_baseline"] = drift_baseline
+        
+        logger.info(f"{backend.name} learning: {X.shape[0]} vectors laid out, {len(fitted_model_bytes)} byte fitted model")
+        return {
+            "coordinates": coordinates,
+            "transformation_matrix": transformation_matrix.tolist(),
+            "fitted_umap_model": fitted_model_bytes,
+            "umap_parameters": parameters,
+            "model_metadata": model_metadata,
+            "moved_node_ids": None,
+            "fit_settings": fit_settings,
+            "knn_graph_state": None,
+            "linear_projection_state": linear_projection if request.graph_id else None
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"{backend.name} learning failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"{backend.name} learning failed: {str(e)}")
+
+def _serialize_fitted_model(reducer, X: np.ndarray, request: DimensionReductionRequest, pre_reducer: Optional[PreReducer] = None) -> tuple[bytes, Optional[dict]]:
+    """
+    Serialize a fitted reducer as a cloudpickle or in the compact transform-only format
+    
+    X is the data the reducer was fitted on; with a pre_reducer, the projector is stored
+    with the model so that transform() accepts full-width vectors.
+    
+    With compare_model_formats both formats are produced and loaded once, and their size
+    and load time are returned for model_metadata.
+    
+    Returns:
+        (model_bytes in request.model_format, comparison or None)
+    """
+    model_formats = ("pickle", "compact") if request.compare_model_formats else (request.model_format,)
+    serialized = {}
+    comparison = {}
+    
+    for model_format in model_formats:
+        if model_format == "compact":
+            compact_model = CompactUMAPModel.from_umap(reducer, X, dtype=request.compact_model_dtype, pre_reducer=pre_reducer)
+            model_bytes = compact_model.to_bytes(compress=request.compact_model_compression)
+        else:
+            if cloudpickle is None:
+                raise HTTPException(status_code=503, detail="cloudpickle not available for model serialization")
+            model_bytes = cloudpickle.dumps(PreReducedUMAP(pre_reducer, reducer) if pre_reducer is not None else reducer)
+        serialized[model_format] = model_bytes
+        
+        if request.compare_model_formats:
+            load_start = time.perf_counter()
+            _load_fitted_model(model_bytes)
+            comparison[model_format] = {
+                "size_bytes": len(model_bytes),
+                "load_ms": round((time.perf_counter() - load_start) * 1000, 3)
+            }
+    
+    return serialized[request.model_format], comparison or None
+
+def _reduce_with_linear_transformation(X: np.ndarray, request: DimensionReductionRequest) -> tuple[np.ndarray, np.ndarray]:
     """
-    V11.0 Cosmos: Linear transformation for fast, deterministic positioning - DISABLED
+    V11.0 Cosmos: Linear transformation for fast, deterministic positioning
     
     Uses a pre-computed transformation matrix to transform embeddings to 3D coordinates.
     This is the fast path for incremental updates between UMAP learning runs.
     
-    DISABLED: Linear transformation is disabled for simplicity.
-    """
-    # DISABLED: Linear transformation is disabled for simplicity
-    raise HTTPException(status_code=400, detail="Linear transformation is disabled. Use umap_learning or umap_transform instead.")
+    With a graph_id whose projection is held by the service, the incrementally updated
+    matrix is used (it includes the nodes umap_transform has placed for the graph since
+    the last fit); otherwise the request's transformation_matrix. Coordinates are returned
+    in the UMAP frame (no normalization) so they line up with the fitted layout.
     
+    Returns:
+        (coordinates, transformation_matrix) - the matrix that was applied
+    """
     try:
+        projection = linear_projection_store.get(request.graph_id) if request.graph_id else None
+        if projection is not None and projection.input_dimensions == X.shape[1] and projection.output_dimensions == request.target_dimensions:
+            coordinates = projection.transform(X)
+            logger.info(f"Linear transformation completed for {X.shape[0]} vectors using the projection of graph {request.graph_id} ({projection.n_samples} samples)")
+            return coordinates, projection.matrix
+        
         if not request.transformation_matrix:
             raise HTTPException(status_code=400, detail="transformation_matrix is required for linear_transformation method")
         
@@ -305,11 +1998,8 @@ def _reduce_with_linear_transformation(X: np.ndarray, request: DimensionReductio
         # Apply linear transformation: coordinates = X @ transformation_matrix
         coordinates = np.dot(X, transformation_matrix)
         
-        # Normalize coordinates to reasonable range
-        coordinates = _normalize_coordinates(coordinates, target_range=50.0)
-        
         logger.info(f"Linear transformation completed for {X.shape[0]} vectors using {transformation_matrix.shape} matrix")
-        return coordinates
+        return coordinates, transformation_matrix
         
     except HTTPException:
         raise
@@ -317,42 +2007,192 @@ def _reduce_with_linear_transformation(X: np.ndarray, request: DimensionReductio
         logger.error(f"Linear transformation failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Linear transformation failed: {str(e)}")
 
-def _reduce_with_umap_transform(X: np.ndarray, request: DimensionReductionRequest) -> np.ndarray:
+def _update_linear_projection(graph_id: Optional[str], model_id: Optional[str], X: np.ndarray, coordinates: np.ndarray) -> Optional[LinearProjection]:
+    """
+    Fold transformed nodes into the graph's ridge projection
+    
+    Only applies when the projection was fitted in the same UMAP frame as model_id. Rows
+    folded in recently (a retried transform) are not added again.
+    
+    Returns:
+        The updated projection, or None if there was nothing to update
+    """
+    if not graph_id:
+        return None
+    projection = linear_projection_store.get(graph_id)
+    if projection is None or projection.model_id != model_id or projection.input_dimensions != X.shape[1]:
+        return None
+    if projection.output_dimensions != coordinates.shape[1]:
+        return None
+    projection.update(X, coordinates, row_keys(X))
+    return projection
+
+def _reduce_with_umap_transform(X: np.ndarray, request: DimensionReductionRequest, fitted_model_bytes: Optional[bytes] = None, timer: Optional[StageTimer] = None) -> tuple[np.ndarray, Optional[str], bool, str, Optional[tuple[DriftRows, dict]]]:
     """
     V11.0 Cosmos: UMAP Transform Phase
     
     Uses a pre-computed fitted UMAP model to transform new embeddings to 3D coordinates.
     This provides high-quality positioning while maintaining the learned manifold structure.
-    """
-    if not UMAP_AVAILABLE:
-        raise HTTPException(status_code=503, detail="UMAP not available")
-    if not CLOUDPICKLE_AVAILABLE:
-        raise HTTPException(status_code=503, detail="cloudpickle not available for model deserialization")
     
+    The model is resolved from the registry by model_id; the serialized bytes are only
+    deserialized (and registered) on a registry miss. Pickled and compact models are
+    both accepted and detected from their leading bytes.
+    
+    Small batches can skip UMAP's neighbour search and SGD refinement entirely: the NumPy
+    engine places points at the membership-weighted mean of their exact cosine neighbours.
+    
+    With drift_metrics, the placed points are also scored against the model's training
+    baseline (see drift.py); the scores are returned for the caller to summarize.
+    
+    With a graph_id, the transformed nodes are added to the graph's ridge projection
+    (_run_reduction), so every transform changes the matrix later linear_transformation
+    requests for that graph use. The matrix is only returned with include_transformation_matrix.
+    """
+    timer = timer or StageTimer()
     try:
-        if not request.fitted_umap_model:
-            raise HTTPException(status_code=400, detail="fitted_umap_model is required for umap_transform method")
-        
-        # Convert byte array back to bytes
-        fitted_model_bytes = bytes(request.fitted_umap_model)
+        if not request.model_id and not fitted_model_bytes:
+            raise HTTPException(status_code=400, detail="model_id or fitted_umap_model is required for umap_transform method")
         
-        # Deserialize the fitted UMAP model
-        fitted_model = cloudpickle.loads(fitted_model_bytes)
+        # Resolve the fitted UMAP model from the registry, deserializing only on a miss
+        with timer.stage("model_resolve"):
+            model_id, fitted_model, cache_hit = model_registry.get_or_register(request.model_id, fitted_model_bytes)
+        if fitted_model is None:
+            raise HTTPException(status_code=404, detail=f"Model {request.model_id} not found in registry; resend fitted_umap_model")
         
         # Transform new points using the fitted model
-        coordinates = fitted_model.transform(X)
+        engine = _select_transform_engine(request.transform_engine, X.shape[0], fitted_model)
+        if engine == TRANSFORM_ENGINE_UMAP and not UMAP_AVAILABLE:
+            raise HTTPException(status_code=503, detail="UMAP not available")
+        with timer.stage("transform"):
+            if engine == TRANSFORM_ENGINE_NUMPY:
+                coordinates = get_numpy_engine(fitted_model).transform(X)
+            else:
+                coordinates = fitted_model.transform(X)
         
         # Use raw UMAP coordinates (no normalization)
         
-        logger.info(f"UMAP transform completed for {X.shape[0]} new vectors using fitted model")
-        return coordinates
+        drift_scores = None
+        if request.drift_metrics:
+            with timer.stage("drift_scoring"):
+                drift_scores = _score_drift(fitted_model, X, coordinates, request.drift_baseline)
+        if model_id is not None:
+            # The NumPy engine's normalized training copy (and layout index) lives as long as
+            # the model, so it counts against the registry's byte bound
+            model_registry.account_derived_bytes(model_id, fitted_model, cached_engine_nbytes(fitted_model))
+        
+        logger.info(f"UMAP transform completed for {X.shape[0]} new vectors using fitted model ({engine} engine, registry {'hit' if cache_hit else 'miss'})")
+        return coordinates, model_id, cache_hit, engine, drift_scores
         
     except HTTPException:
         raise
+    except CompactModelError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid compact model: {str(e)}")
     except Exception as e:
         logger.error(f"UMAP transform failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"UMAP transform failed: {str(e)}")
 
+def _score_drift(fitted_model, X: np.ndarray, coordinates: np.ndarray, drift_baseline: Optional[dict]) -> Optional[tuple[DriftRows, dict]]:
+    """Per-row drift scores of a transform and the baseline they compare against (the request's, else the model's)"""
+    try:
+        baseline = drift_baseline if is_baseline(drift_baseline) else model_baseline(fitted_model, DRIFT_BASELINE_SAMPLE)
+        rows = score_rows(fitted_model, X, coordinates, DRIFT_MAX_ROWS) if baseline is not None else None
+    except Exception as e:
+        # Drift is advisory; the placement itself succeeded
+        logger.warning(f"Drift scoring failed: {str(e)}")
+        return None
+    if rows is None or baseline is None:
+        return None
+    return rows, baseline
+
+def _summarize_drift(rows: DriftRows, baseline: dict) -> dict:
+    """Drift summary of a caller's rows, logging refit recommendations"""
+    drift = summarize_drift(rows, baseline, DRIFT_OOD_FRACTION, DRIFT_TRUSTWORTHINESS_DROP, DRIFT_MIN_ROWS)
+    if drift["refit_recommended"]:
+        logger.info(f"Drift: refit recommended ({', '.join(drift['reasons'])}; {drift['out_of_distribution_fraction']:.0%} out of distribution, trustworthiness {drift['trustworthiness']} vs {drift['baseline_trustworthiness']})")
+    return drift
+
+def _select_transform_engine(requested: str, batch_size: int, fitted_model) -> str:
+    """Resolve transform_engine="auto" from the batch size and the model's training size"""
+    backend = model_backend(fitted_model)
+    if backend != BACKEND_UMAP:
+        # PCA and t-SNE layouts place new points with their own transform
+        return backend
+    if requested != "auto":
+        if requested == TRANSFORM_ENGINE_NUMPY and getattr(fitted_model, "metric", None) not in (None, "cosine"):
+            raise HTTPException(status_code=400, detail=f"numpy transform engine requires a cosine model, got {fitted_model.metric}")
+        return requested
+    
+    n_training = fitted_model.embedding_.shape[0]
+    if batch_size <= NUMPY_TRANSFORM_MAX_BATCH and n_training <= NUMPY_TRANSFORM_MAX_TRAINING_ROWS and getattr(fitted_model, "metric", "cosine") == "cosine":
+        return TRANSFORM_ENGINE_NUMPY
+    return TRANSFORM_ENGINE_UMAP
+
+async def _warm_up() -> None:
+    """
+    Start-up warm-up, run as a background task from the lifespan hook
+    
+    Compiles (or loads from the numba cache) the kernels of fits and transforms in this
+    process, then runs one warm-up fit in each pool worker so the first umap_learning
+    request doesn't pay for spawning and importing either.
+    """
+    warmup_state.start()
+    try:
+        await run_in_threadpool(_warm_up_kernels, warmup_state.run_step)
+        if REDUCER_WARMUP_PROCESS_POOL:
+            warmup_state.begin_step("process_pool")
+            pool_start = time.perf_counter()
+            # Concurrent submissions make the pool spawn every worker instead of reusing one
+            jobs = [
+                job_manager.submit(_warm_up_kernels, (), method="warmup", use_process_pool=True)
+                for _ in range(job_manager.max_workers)
+            ]
+            for job in jobs:
+                await job_manager.wait(job)
+                job_manager.forget(job.job_id)
+                if job.error is not None:
+                    raise RuntimeError(f"worker warm-up failed: {job.error}")
+            warmup_state.record_step("process_pool", (time.perf_counter() - pool_start) * 1000)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"Warm-up failed, serving cold: {str(e)}")
+        warmup_state.finish(error=str(e))
+        return
+    warmup_state.finish()
+    logger.info(f"Warm-up completed in {warmup_state.stats()['duration_ms']:.0f}ms")
+
+def _warm_up_kernels(run_step: Optional[Callable[[str, Callable], Any]] = None, progress: Optional[ProgressCallback] = None) -> None:
+    """
+    Fit and transform a tiny synthetic dataset through every path requests take
+    
+    Nothing is registered or cached: the fit goes through _reduce_with_umap_learning
+    directly and the transforms call the fitted models without the model registry.
+    Also runs in pool workers (as a job), hence the progress argument.
+    """
+    run_step = run_step or (lambda name, step: step())
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((8, WARMUP_DIMENSIONS)).astype(np.float32)
+    X = centers[rng.integers(0, 8, WARMUP_SAMPLES)] + 0.1 * rng.standard_normal((WARMUP_SAMPLES, WARMUP_DIMENSIONS)).astype(np.float32)
+    n_fit = max(2, WARMUP_SAMPLES * 3 // 4)
+    X_fit, X_new = X[:n_fit], X[n_fit:]
+    
+    def import_modules():
+        umap.load()
+        if cloudpickle is not None:
+            cloudpickle.load()
+        # Cold kNN builds of large graphs go through NN-descent, which UMAP skips for tiny inputs
+        from pynndescent import NNDescent
+        return NNDescent
+    
+    NNDescent = run_step("imports", import_modules)
+    request = DimensionReductionRequest(vectors=[], method="umap_learning", model_format="pickle")
+    learning_result = run_step("umap_fit", lambda: _reduce_with_umap_learning(X_fit, request))
+    fitted_model = run_step("model_load", lambda: _load_fitted_model(learning_result["fitted_umap_model"]))
+    run_step("umap_transform", lambda: fitted_model.transform(X_new))
+    run_step("numpy_transform", lambda: get_numpy_engine(fitted_model).transform(X_new))
+    compact_model = CompactUMAPModel.from_umap(fitted_model, X_fit)
+    run_step("compact_transform", lambda: compact_model.transform(X_new))
+    run_step("nn_descent", lambda: NNDescent(X_fit, metric="cosine", n_neighbors=15, random_state=0, low_memory=True).query(X_new, k=15))
 
 def _normalize_coordinates(coordinates: np.ndarray, target_range: float = 10.0) -> np.ndarray:
     """Normalize coordinates to a target range [-target_range, target_range]"""
@@ -371,42 +2211,42 @@ def _normalize_coordinates(coordinates: np.ndarray, target_range: float = 10.0)
     return scaled
 
 
-def _create_ridge_transformation_matrix(embeddings: np.ndarray, coordinates: np.ndarray) -> np.ndarray:
+def _create_ridge_transformation_matrix(embeddings: np.ndarray, coordinates: np.ndarray, graph_id: Optional[str] = None) -> tuple[np.ndarray, Optional[LinearProjection]]:
     """
     V11.0 Cosmos: Create linear transformation matrix using Ridge regression
     
     This is the core of the hybrid UMAP system. It learns a linear transformation
     that maps embeddings to UMAP coordinates, enabling fast positioning of new nodes.
     
+    The ridge system is solved in closed form from XᵀX and XᵀY, and the R² score is
+    derived from the same statistics, so the embeddings are read only once. The returned
+    projection keeps those statistics for incremental updates.
+    
     Args:
         embeddings: High-dimensional embeddings [n_samples, embedding_dim]
         coordinates: UMAP coordinates [n_samples, target_dimensions]
+        graph_id: Graph the projection belongs to, if it is to be kept
     
     Returns:
-        transformation_matrix: [embedding_dim, target_dimensions] matrix
+        (transformation_matrix [embedding_dim, target_dimensions], projection or None on failure)
     """
     try:
-        # Use Ridge regression to learn the transformation
         # Solves: coordinates = embeddings @ transformation_matrix
-        # with L2 regularization to prevent overfitting
-        
-        ridge = Ridge(alpha=0.1, fit_intercept=False)  # No intercept for linear transformation
-        ridge.fit(embeddings, coordinates)
-        
-        # Get the transformation matrix
-        transformation_matrix = ridge.coef_.T  # [embedding_dim, target_dimensions]
+        # with L2 regularization to prevent overfitting (no intercept)
+        projection = fit_linear_projection(graph_id, embeddings, coordinates)
+        transformation_matrix = projection.matrix
         
         logger.info(f"Ridge regression: Created {transformation_matrix.shape} transformation matrix")
-        logger.info(f"Ridge regression: R² score = {ridge.score(embeddings, coordinates):.4f}")
+        logger.info(f"Ridge regression: R² score = {projection.r2_score():.4f}")
         
-        return transformation_matrix
+        return transformation_matrix, projection
         
     except Exception as e:
         logger.error(f"Ridge regression failed: {str(e)}")
         # Fallback to identity matrix if Ridge regression fails
         embedding_dim = embeddings.shape[1]
         target_dim = coordinates.shape[1]
-        return np.eye(embedding_dim, target_dim)
+        return np.eye(embedding_dim, target_dim), None
 
 def _generate_identity_matrix(dimensions: int) -> np.ndarray:
     """Generate identity transformation matrix for the given dimensions"""
@@ -530,7 +2370,7 @@ async def root():
         "service": "Dimension Reducer",
         "version": "1.0.0",
         "status": "running",
-        "endpoints": ["/health", "/reduce", "/create-matrix"]
+        "endpoints": ["/health", "/ready", "/reduce", "/reduce/stream", "/reduce/batch", "/jobs/reduce", "/jobs/{job_id}", "/create-matrix"]
     }
 
 if __name__ == "__main__":
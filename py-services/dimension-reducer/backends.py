@@ -0,0 +1,325 @@
+"""
+Reducer Backends
+V11.0 Cosmos: Pluggable layout backends and cost-based automatic selection
+
+UMAP used to be the only way to lay out a graph, including tiny graphs where its fixed
+overhead dominates and n_neighbors has to be forced down to n_samples - 1. umap_learning now
+runs on one of several backends:
+
+- pca: randomized PCA of the L2-normalized vectors; milliseconds, exact linear transform
+- umap: the existing UMAP fit (kNN reuse, warm starts, pre-reduction, landmarks)
+- tsne: FFT-accelerated t-SNE via openTSNE when installed (Barnes-Hut via scikit-learn
+  otherwise); new points are placed at the membership-weighted mean of their nearest
+  training points, as in the NumPy transform engine
+
+backend="auto" (or method="auto") estimates each backend's fit time from n_samples and dims
+and picks the best-quality backend expected to finish within time_budget_ms (for UMAP, at
+the cheapest settings fit_budget.py would plan). PCA and t-SNE are LayoutBackends fitted
+through their fit(); UMAP fits are dispatched by app.py to _reduce_with_umap_learning, so
+UMAPBackend only contributes its cost estimate and availability. Every backend
+yields a fitted model with transform() and embedding_, so umap_transform, the model registry
+and the streaming path accept all of them.
+
+Fit time estimates are rough single-core figures for warm numba kernels; BACKEND_COST_SCALE
+in app.py scales them to the deployment's hardware.
+"""
+
+import abc
+import logging
+import math
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from fast_transform import get_numpy_engine
+from fit_budget import NN_DESCENT_PRECISION, QUALITY_MIN_EPOCHS, default_epochs, default_nn_descent, estimate_umap_fit_ms
+from knn_graph import normalize_rows
+from pre_reduction import PRE_REDUCTION_PCA, PreReducer, fit_pre_reducer
+from warmup import module_available
+
+logger = logging.getLogger(__name__)
+
+BACKEND_AUTO = "auto"
+BACKEND_PCA = "pca"
+BACKEND_UMAP = "umap"
+BACKEND_TSNE = "tsne"
+
+# Non-UMAP layouts are scaled so their largest coordinate matches the usual UMAP extent
+LAYOUT_RANGE = 10.0
+
+# Training neighbours used to place new points in a t-SNE layout
+TSNE_TRANSFORM_NEIGHBORS = 15
+
+
+class PCALayoutModel:
+    """Fitted PCA layout: transform() is the same linear map the training coordinates came from"""
+
+    backend = BACKEND_PCA
+    metric = "cosine"
+
+    def __init__(self, projector: PreReducer, embedding: np.ndarray):
+        self.projector = projector
+        self.embedding_ = embedding
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        return self.projector.transform(normalize_rows(np.asarray(X, dtype=np.float32)))
+
+
+class TSNELayoutModel:
+    """
+    Fitted t-SNE layout.
+
+    t-SNE has no parametric mapping, so transform() places new points at the membership-
+    weighted mean of their nearest training points. params follows CompactUMAPModel so the
+    NumPy transform engine can be built from this model directly.
+    """
+
+    backend = BACKEND_TSNE
+    metric = "cosine"
+    pre_reducer = None
+
+    def __init__(self, training_embeddings: np.ndarray, embedding: np.ndarray, n_neighbors: int):
+        self.training_embeddings = training_embeddings
+        self.embedding_ = embedding
+        self.params = {"metric": "cosine", "n_neighbors": n_neighbors, "disconnection_distance": float("inf")}
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        return get_numpy_engine(self).transform(X)
+
+
+class ReducerBackend(abc.ABC):
+    """
+    One way of fitting a layout, as far as backend="auto" is concerned.
+
+    Attributes:
+        name: Value of the request's backend field
+        quality: Preference of backend="auto" among backends that fit the budget (higher wins)
+        auto_min_samples: Smallest graph backend="auto" considers this backend for
+    """
+
+    name = ""
+    quality = 0
+    auto_min_samples = 2
+
+    def is_available(self) -> bool:
+        return True
+
+    @abc.abstractmethod
+    def estimate_fit_ms(self, n_samples: int, dims: int, target_dimensions: int, n_neighbors: int = 15) -> float:
+        """Expected single-core fit time in milliseconds"""
+
+
+class LayoutBackend(ReducerBackend):
+    """A backend whose whole fit is self-contained (app.py's _reduce_with_backend)"""
+
+    @abc.abstractmethod
+    def fit(self, X: np.ndarray, target_dimensions: int, random_state: Optional[int], options: Optional[dict] = None) -> tuple[np.ndarray, Any, dict]:
+        """
+        Fit a layout of X.
+
+        Returns:
+            (coordinates, fitted model, parameters for the response's umap_parameters)
+        """
+
+
+class PCABackend(LayoutBackend):
+    name = BACKEND_PCA
+    quality = 1
+    auto_min_samples = 2
+
+    def is_available(self) -> bool:
+        return module_available("sklearn")
+
+    def estimate_fit_ms(self, n_samples: int, dims: int, target_dimensions: int, n_neighbors: int = 15) -> float:
+        return 2.0 + n_samples * dims * 1e-5
+
+    def fit(self, X: np.ndarray, target_dimensions: int, random_state: Optional[int], options: Optional[dict] = None) -> tuple[np.ndarray, Any, dict]:
+        X_normalized = normalize_rows(np.asarray(X, dtype=np.float32))
+        fitted = fit_pre_reducer(X_normalized, PRE_REDUCTION_PCA, target_dimensions, random_state)
+
+        # Fewer samples or dims than target_dimensions leave trailing axes at zero
+        components = np.zeros((target_dimensions, X.shape[1]), dtype=np.float32)
+        components[:fitted.output_dimensions] = fitted.components
+        coordinates = (X_normalized - fitted.mean) @ components.T
+        scale = _layout_scale(coordinates)
+        coordinates *= scale
+
+        explained_variance_ratio = fitted.explained_variance_ratio
+        if explained_variance_ratio is not None and not math.isfinite(explained_variance_ratio):
+            explained_variance_ratio = None
+        projector = PreReducer(PRE_REDUCTION_PCA, components * scale, fitted.mean, explained_variance_ratio)
+        parameters = {
+            "backend": self.name,
+            "metric": "cosine",
+            "random_state": random_state,
+            "explained_variance_ratio": explained_variance_ratio,
+        }
+        return coordinates.astype(np.float32), PCALayoutModel(projector, coordinates.astype(np.float32)), parameters
+
+
+class UMAPBackend(ReducerBackend):
+    """
+    Cost and availability of UMAP fits.
+
+    Not a LayoutBackend: app.py dispatches UMAP fits to _reduce_with_umap_learning (or
+    _reduce_with_landmarks), which layer kNN reuse, warm starts, pre-reduction and
+    landmark mode on top of umap.UMAP.
+    """
+
+    name = BACKEND_UMAP
+    quality = 3
+    auto_min_samples = 64
+
+    def is_available(self) -> bool:
+        return module_available("umap")
+
+    def estimate_fit_ms(self, n_samples: int, dims: int, target_dimensions: int, n_neighbors: int = 15) -> float:
+        # The cheapest fit time_budget_ms can plan without dropping below its quality floor
+        return estimate_umap_fit_ms(
+            n_samples, dims, n_neighbors, min(default_epochs(n_samples), QUALITY_MIN_EPOCHS), default_nn_descent(n_samples, NN_DESCENT_PRECISION[1][1])
+        )
+
+
+class TSNEBackend(LayoutBackend):
+    name = BACKEND_TSNE
+    quality = 2
+    auto_min_samples = 100
+
+    DEFAULT_PERPLEXITY = 30.0
+    N_ITERATIONS = 750
+
+    @property
+    def implementation(self) -> Optional[str]:
+        if module_available("openTSNE"):
+            return "opentsne"
+        if module_available("sklearn"):
+            return "sklearn"
+        return None
+
+    def is_available(self) -> bool:
+        return self.implementation is not None
+
+    def estimate_fit_ms(self, n_samples: int, dims: int, target_dimensions: int, n_neighbors: int = 15) -> float:
+        knn_ms = n_samples * dims * 3e-5
+        if self.implementation == "opentsne" and target_dimensions <= 2:
+            # FFT-interpolated gradients are linear in n_samples
+            return 200.0 + knn_ms + n_samples * self.N_ITERATIONS * 1e-3
+        # Barnes-Hut trees (openTSNE has no FFT gradients beyond 2D)
+        return 200.0 + knn_ms + n_samples * math.log2(max(n_samples, 2)) * self.N_ITERATIONS * 2e-4
+
+    def fit(self, X: np.ndarray, target_dimensions: int, random_state: Optional[int], options: Optional[dict] = None) -> tuple[np.ndarray, Any, dict]:
+        options = options or {}
+        n_samples = X.shape[0]
+        X_normalized = normalize_rows(np.asarray(X, dtype=np.float32))
+        # Perplexity needs about three neighbours per unit
+        perplexity = max(1.0, min(options.get("perplexity") or self.DEFAULT_PERPLEXITY, (n_samples - 1) / 3.0))
+        implementation = self.implementation
+
+        if implementation == "opentsne":
+            from openTSNE import TSNE
+
+            gradient_method = "fft" if target_dimensions <= 2 else "bh"
+            embedding = TSNE(
+                n_components=target_dimensions,
+                perplexity=perplexity,
+                metric="cosine",
+                negative_gradient_method=gradient_method,
+                n_iter=self.N_ITERATIONS,
+                random_state=random_state,
+                verbose=False,
+            ).fit(X_normalized)
+            implementation = f"opentsne-{gradient_method}"
+        elif implementation == "sklearn":
+            from sklearn.manifold import TSNE
+
+            embedding = TSNE(
+                n_components=target_dimensions,
+                perplexity=perplexity,
+                metric="cosine",
+                init="pca",
+                method="barnes_hut",
+                max_iter=self.N_ITERATIONS,
+                random_state=random_state,
+            ).fit_transform(X_normalized)
+            implementation = "sklearn-barnes_hut"
+        else:
+            raise RuntimeError("t-SNE not available - install openTSNE or scikit-learn")
+
+        coordinates = np.asarray(embedding, dtype=np.float32)
+        coordinates -= coordinates.mean(axis=0)
+        coordinates *= _layout_scale(coordinates)
+        n_neighbors = min(TSNE_TRANSFORM_NEIGHBORS, n_samples)
+        parameters = {
+            "backend": self.name,
+            "implementation": implementation,
+            "metric": "cosine",
+            "perplexity": perplexity,
+            "n_iterations": self.N_ITERATIONS,
+            "random_state": random_state,
+            "transform_neighbors": n_neighbors,
+        }
+        return coordinates, TSNELayoutModel(X_normalized, coordinates, n_neighbors), parameters
+
+
+BACKENDS: Dict[str, ReducerBackend] = {backend.name: backend for backend in (PCABackend(), UMAPBackend(), TSNEBackend())}
+
+
+def get_backend(name: str) -> ReducerBackend:
+    backend = BACKENDS.get(name)
+    if backend is None:
+        raise ValueError(f"Unknown reducer backend: {name}")
+    return backend
+
+
+def model_backend(model: Any) -> str:
+    """Backend a fitted model came from (umap.UMAP and compact models have no marker)"""
+    return getattr(model, "backend", BACKEND_UMAP)
+
+
+def select_backend(n_samples: int, dims: int, target_dimensions: int, time_budget_ms: Optional[float] = None, cost_scale: float = 1.0, n_neighbors: int = 15) -> tuple[ReducerBackend, dict]:
+    """
+    Choose a backend for backend="auto".
+
+    Among available backends meant for graphs of this size, the highest-quality one whose
+    estimated fit time is within time_budget_ms wins (without a budget, the highest-quality
+    one). When none fits the budget, the fastest backend is used.
+
+    Returns:
+        (backend, selection) - selection records the estimates and the reason for model_metadata
+    """
+    candidates: List[ReducerBackend] = []
+    estimates = {}
+    for backend in BACKENDS.values():
+        if not backend.is_available():
+            continue
+        estimates[backend.name] = round(backend.estimate_fit_ms(n_samples, dims, target_dimensions, n_neighbors) * cost_scale, 1)
+        if n_samples >= backend.auto_min_samples:
+            candidates.append(backend)
+    if not candidates:
+        raise RuntimeError(f"No reducer backend available for {n_samples} samples")
+
+    candidates.sort(key=lambda backend: backend.quality, reverse=True)
+    within_budget = [backend for backend in candidates if time_budget_ms is None or estimates[backend.name] <= time_budget_ms]
+    if within_budget:
+        selected = within_budget[0]
+        reason = "best quality" if time_budget_ms is None else "best quality within budget"
+    else:
+        selected = min(candidates, key=lambda backend: estimates[backend.name])
+        reason = "no backend fits the budget; fastest"
+
+    selection = {
+        "requested": BACKEND_AUTO,
+        "selected": selected.name,
+        "reason": reason,
+        "time_budget_ms": time_budget_ms,
+        "estimated_fit_ms": estimates,
+        "candidates": [backend.name for backend in candidates],
+    }
+    logger.info(f"Backend auto-selection: {selected.name} for {n_samples}x{dims} ({reason}, estimates {estimates})")
+    return selected, selection
+
+
+def _layout_scale(coordinates: np.ndarray) -> float:
+    """Uniform factor that brings the largest centred coordinate to LAYOUT_RANGE"""
+    extent = float(np.max(np.abs(coordinates))) if coordinates.size else 0.0
+    return LAYOUT_RANGE / extent if extent > 0 and math.isfinite(extent) else 1.0
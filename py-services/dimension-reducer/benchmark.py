@@ -0,0 +1,454 @@
+"""
+Dimension Reducer Benchmark
+V11.0 Cosmos: Reproducible scaling numbers for umap_learning and umap_transform
+
+Generates synthetic clustered embeddings (default 1k/10k/50k nodes x 384/768/1536 dims)
+and measures umap_learning and umap_transform either in-process, by calling the
+service's reduction helpers directly, or over HTTP against a running service. Both
+transports (JSON and msgpack) are covered. For each case the results file records:
+
+- wall time and throughput
+- peak RSS (of this process, or of --server-pid for HTTP runs)
+- fitted model size
+- the server's per-stage timings
+- request/response sizes and encode/decode time
+
+Results are written as JSON and can be compared with an earlier run; cases slower than
+--threshold fail the run, which makes the script usable as a CI gate.
+
+Usage:
+    python benchmark.py --output bench.json
+    python benchmark.py --sizes 1000 --dims 384 --modes http --url http://localhost:8000
+    python benchmark.py --output new.json --baseline bench.json --threshold 0.2
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from typing import Callable, Dict, List, Optional, cast
+
+import numpy as np
+
+MODES = ("inprocess", "http")
+TRANSPORTS = ("json", "msgpack")
+METHODS = ("umap_learning", "umap_transform")
+
+# Metrics compared against the baseline (higher is worse for all of them)
+REGRESSION_METRICS = ("wall_ms", "peak_rss_mb")
+
+
+def make_clustered_embeddings(n_samples: int, dims: int, n_clusters: int = 20, spread: float = 0.35, seed: int = 0) -> np.ndarray:
+    """Unit-norm embeddings scattered around n_clusters random directions, like topic clusters of text embeddings"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dims)).astype(np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    # Uneven cluster sizes, as in real graphs
+    weights = rng.dirichlet(np.full(n_clusters, 2.0))
+    labels = rng.choice(n_clusters, size=n_samples, p=weights)
+    X = centers[labels] + rng.standard_normal((n_samples, dims)).astype(np.float32) * (spread / np.sqrt(dims))
+    X /= np.linalg.norm(X, axis=1, keepdims=True)
+    return X.astype(np.float32)
+
+
+class PeakRssSampler:
+    """
+    Samples the resident set size of a process and its descendants in a background thread.
+
+    Descendants are included because the service fits UMAP in pool worker processes.
+    """
+
+    def __init__(self, pid: Optional[int] = None, interval_s: float = 0.005):
+        self.pid = pid or os.getpid()
+        self.interval_s = interval_s
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def __enter__(self) -> "PeakRssSampler":
+        self.peak_bytes = self._read_rss()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, self._read_rss())
+
+    @property
+    def peak_mb(self) -> Optional[float]:
+        return round(self.peak_bytes / (1024 * 1024), 1) if self.peak_bytes else None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            self.peak_bytes = max(self.peak_bytes, self._read_rss())
+
+    def _read_rss(self) -> int:
+        try:
+            return sum(self._process_rss(pid) for pid in self._process_tree(self.pid))
+        except (OSError, ValueError, IndexError):
+            if self.pid != os.getpid():
+                return 0
+            # Not Linux: fall back to the process high-water mark (KB on Linux, bytes on macOS)
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+    def _process_rss(self, pid: int) -> int:
+        try:
+            with open(f"/proc/{pid}/statm") as f:
+                return int(f.read().split()[1]) * self._page_size
+        except FileNotFoundError:
+            # Exited between listing and reading
+            if pid == self.pid:
+                raise
+            return 0
+
+    @staticmethod
+    def _process_tree(pid: int) -> List[int]:
+        pids = [pid]
+        for task in os.listdir(f"/proc/{pid}/task"):
+            try:
+                with open(f"/proc/{pid}/task/{task}/children") as f:
+                    children = [int(child) for child in f.read().split()]
+            except OSError:
+                continue
+            for child in children:
+                try:
+                    pids.extend(PeakRssSampler._process_tree(child))
+                except OSError:
+                    pass
+        return pids
+
+
+def encode_request(fields: dict, X: np.ndarray, transport: str) -> bytes:
+    """Client-side /reduce body in the given transport"""
+    if transport == "msgpack":
+        import msgpack
+        from wire_format import encode_array
+
+        return cast(bytes, msgpack.packb({**fields, "vectors": encode_array(X)}, use_bin_type=True))
+    return json.dumps({**fields, "vectors": X.tolist()}).encode("utf-8")
+
+
+def decode_response(body: bytes, transport: str) -> dict:
+    if transport == "msgpack":
+        import msgpack
+
+        return msgpack.unpackb(body, raw=False)
+    return json.loads(body)
+
+
+def run_inprocess(method: str, X: np.ndarray, transport: str, fields: dict, model_id: Optional[str]) -> dict:
+    """
+    Run one reduction through the service's helpers in this process.
+
+    The reduction itself is timed as wall_ms. The transport is measured separately: the
+    request body is decoded the way /reduce decodes it and the result is encoded the way
+    /reduce encodes it.
+    """
+    import app as service
+    from wire_format import decode_reduce_payload, encode_reduce_response
+
+    fields = {**fields, "method": method}
+    if model_id:
+        fields["model_id"] = model_id
+
+    body = encode_request(fields, X, transport)
+    decode_start = time.perf_counter()
+    if transport == "msgpack":
+        decoded_fields, X_decoded, _ = decode_reduce_payload(body)
+        request = service._parse_reduce_request({**decoded_fields, "vectors": []})
+    else:
+        request = service._parse_reduce_request(body)
+        X_decoded = service._vectors_to_array(request)
+        request = request.model_copy(update={"vectors": []})
+    decode_ms = (time.perf_counter() - decode_start) * 1000
+
+    with PeakRssSampler() as sampler:
+        start = time.perf_counter()
+        response_data = service._run_reduction(request, X_decoded)
+        if method == "umap_learning":
+            response_data = service._finalize_reduction(response_data)
+        wall_ms = (time.perf_counter() - start) * 1000
+
+    stage_timings = response_data.pop("stage_timings_ms", None)
+    encode_start = time.perf_counter()
+    if transport == "msgpack":
+        response_body = encode_reduce_response(response_data)
+    else:
+        response_body = service.DimensionReductionResponse(**service._to_json_response_data(response_data)).model_dump_json().encode("utf-8")
+    encode_ms = (time.perf_counter() - encode_start) * 1000
+
+    return {
+        "wall_ms": wall_ms,
+        "peak_rss_mb": sampler.peak_mb,
+        "model_id": response_data.get("model_id"),
+        "model_size_bytes": _model_size(response_data),
+        "stage_timings_ms": stage_timings,
+        "request_bytes": len(body),
+        "response_bytes": len(response_body),
+        "request_decode_ms": round(decode_ms, 3),
+        "response_encode_ms": round(encode_ms, 3),
+    }
+
+
+def run_http(method: str, X: np.ndarray, transport: str, fields: dict, model_id: Optional[str], url: str, server_pid: Optional[int], timeout_s: float) -> dict:
+    """POST one reduction to a running service; wall time includes both transports and the network"""
+    fields = {**fields, "method": method, "include_stage_timings": True}
+    if model_id:
+        fields["model_id"] = model_id
+
+    encode_start = time.perf_counter()
+    body = encode_request(fields, X, transport)
+    encode_ms = (time.perf_counter() - encode_start) * 1000
+
+    content_type = "application/x-msgpack" if transport == "msgpack" else "application/json"
+    http_request = urllib.request.Request(
+        url.rstrip("/") + "/reduce", data=body, method="POST",
+        headers={"Content-Type": content_type, "Accept": content_type}
+    )
+    sampler = PeakRssSampler(server_pid) if server_pid else None
+    if sampler:
+        sampler.__enter__()
+    try:
+        start = time.perf_counter()
+        with urllib.request.urlopen(http_request, timeout=timeout_s) as http_response:
+            response_body = http_response.read()
+        wall_ms = (time.perf_counter() - start) * 1000
+    finally:
+        if sampler:
+            sampler.__exit__(None, None, None)
+
+    decode_start = time.perf_counter()
+    response_data = decode_response(response_body, transport)
+    decode_ms = (time.perf_counter() - decode_start) * 1000
+
+    return {
+        "wall_ms": wall_ms,
+        "peak_rss_mb": sampler.peak_mb if sampler else None,
+        "model_id": response_data.get("model_id"),
+        "model_size_bytes": _model_size(response_data),
+        "server_processing_ms": response_data.get("processing_time_ms"),
+        "stage_timings_ms": response_data.get("stage_timings_ms"),
+        "request_bytes": len(body),
+        "response_bytes": len(response_body),
+        "request_encode_ms": round(encode_ms, 3),
+        "response_decode_ms": round(decode_ms, 3),
+    }
+
+
+def run_case(runner: Callable[..., dict], method: str, X: np.ndarray, transport: str, fields: dict, model_id: Optional[str], repeat: int) -> dict:
+    """Run a case repeat times; wall_ms is the median, the other fields come from the last run"""
+    runs = [runner(method, X, transport, fields, model_id) for _ in range(repeat)]
+    result = dict(runs[-1])
+    wall_times = [run["wall_ms"] for run in runs]
+    result.update({
+        "wall_ms": round(statistics.median(wall_times), 3),
+        "wall_ms_runs": [round(wall_ms, 3) for wall_ms in wall_times],
+        "throughput_rows_per_s": round(X.shape[0] / (statistics.median(wall_times) / 1000), 1),
+    })
+    peaks = [run["peak_rss_mb"] for run in runs if run.get("peak_rss_mb") is not None]
+    result["peak_rss_mb"] = max(peaks) if peaks else None
+    return result
+
+
+def warm_up(runner: Callable[..., dict], fields: dict) -> None:
+    """One small fit and transform so numba compilation is not billed to the first case"""
+    X = make_clustered_embeddings(300, 32, 5, seed=0)
+    learning = runner("umap_learning", X, "json", fields, None)
+    runner("umap_transform", X[:10], "json", fields, learning.get("model_id"))
+
+
+def run_benchmarks(args: argparse.Namespace) -> List[dict]:
+    fields = {
+        "target_dimensions": args.target_dimensions,
+        "n_neighbors": args.n_neighbors,
+        "random_state": args.seed,
+        "model_format": args.model_format,
+    }
+    runners = {
+        "inprocess": run_inprocess,
+        "http": lambda *case: run_http(*case, url=args.url, server_pid=args.server_pid, timeout_s=args.timeout),
+    }
+    if args.warmup:
+        for mode in args.modes:
+            print(f"[benchmark] warming up {mode} ...", file=sys.stderr, flush=True)
+            warm_up(runners[mode], fields)
+
+    results = []
+    for n_samples in args.sizes:
+        for dims in args.dims:
+            X = make_clustered_embeddings(n_samples, dims, args.clusters, seed=args.seed)
+            X_new = make_clustered_embeddings(args.transform_rows, dims, args.clusters, seed=args.seed + 1)
+            for mode in args.modes:
+                runner = runners[mode]
+                for transport in args.transports:
+                    model_id = None
+                    for method in args.methods:
+                        case_id = f"{mode}/{transport}/{method}/{n_samples}x{dims}"
+                        vectors = X if method == "umap_learning" else X_new
+                        if method == "umap_transform" and model_id is None:
+                            results.append({"case": case_id, "skipped": "umap_transform needs umap_learning in the same run"})
+                            continue
+                        if transport == "json" and vectors.size > args.max_json_values:
+                            results.append({"case": case_id, "skipped": f"{vectors.size} values exceed --max-json-values"})
+                            continue
+                        print(f"[benchmark] {case_id} ...", file=sys.stderr, flush=True)
+                        # The fit is the same for every repeat, so learning runs once unless asked otherwise
+                        repeat = args.repeat if method == "umap_transform" else args.learning_repeat
+                        try:
+                            result = run_case(runner, method, vectors, transport, fields, model_id, repeat)
+                        except Exception as e:
+                            results.append({"case": case_id, "error": f"{type(e).__name__}: {e}"})
+                            continue
+                        if method == "umap_learning":
+                            model_id = result.get("model_id")
+                        result.pop("model_id", None)
+                        results.append({
+                            "case": case_id,
+                            "mode": mode,
+                            "transport": transport,
+                            "method": method,
+                            "n_samples": int(vectors.shape[0]),
+                            "dims": dims,
+                            **result,
+                        })
+                        print(f"[benchmark] {case_id}: {result['wall_ms']:.1f} ms, {result['throughput_rows_per_s']:.0f} rows/s, peak RSS {result['peak_rss_mb']} MB", file=sys.stderr, flush=True)
+    return results
+
+
+def compare_results(current: List[dict], baseline: List[dict], threshold: float) -> List[dict]:
+    """Cases whose REGRESSION_METRICS grew by more than threshold (a fraction) over the baseline"""
+    baseline_by_case = {result["case"]: result for result in baseline if "wall_ms" in result}
+    regressions = []
+    for result in current:
+        previous = baseline_by_case.get(result["case"])
+        if previous is None or "wall_ms" not in result:
+            continue
+        for metric in REGRESSION_METRICS:
+            old, new = previous.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if change > threshold:
+                regressions.append({"case": result["case"], "metric": metric, "baseline": old, "current": new, "change": round(change, 4)})
+    return regressions
+
+
+def environment_metadata() -> dict:
+    metadata = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+    }
+    try:
+        import umap
+        metadata["umap"] = getattr(umap, "__version__", "unknown")
+    except ImportError:
+        metadata["umap"] = None
+    try:
+        metadata["git_commit"] = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        metadata["git_commit"] = None
+    return metadata
+
+
+def _model_size(response_data: dict) -> Optional[int]:
+    model = response_data.get("fitted_umap_model")
+    return len(model) if model is not None else None
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item]
+
+
+def _choice_list(choices: tuple) -> Callable[[str], List[str]]:
+    def parse(value: str) -> List[str]:
+        items = [item for item in value.split(",") if item]
+        unknown = set(items) - set(choices)
+        if unknown:
+            raise argparse.ArgumentTypeError(f"unknown value(s) {sorted(unknown)}; choose from {list(choices)}")
+        return items
+    return parse
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the dimension-reducer service")
+    parser.add_argument("--sizes", type=_int_list, default=[1000, 10000, 50000], help="Comma-separated node counts")
+    parser.add_argument("--dims", type=_int_list, default=[384, 768, 1536], help="Comma-separated embedding widths")
+    parser.add_argument("--modes", type=_choice_list(MODES), default=["inprocess"], help="inprocess and/or http")
+    parser.add_argument("--transports", type=_choice_list(TRANSPORTS), default=list(TRANSPORTS), help="json and/or msgpack")
+    parser.add_argument("--methods", type=_choice_list(METHODS), default=list(METHODS), help="umap_learning and/or umap_transform")
+    parser.add_argument("--transform-rows", type=int, default=100, help="New vectors per umap_transform request")
+    parser.add_argument("--clusters", type=int, default=20, help="Clusters in the synthetic embeddings")
+    parser.add_argument("--target-dimensions", type=int, default=3, choices=(2, 3))
+    parser.add_argument("--n-neighbors", type=int, default=15)
+    parser.add_argument("--model-format", choices=("pickle", "compact"), default="pickle")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per umap_transform case (median is reported)")
+    parser.add_argument("--learning-repeat", type=int, default=1, help="Runs per umap_learning case")
+    parser.add_argument("--no-warmup", dest="warmup", action="store_false", help="Skip the untimed warm-up fit (numba JIT)")
+    parser.add_argument("--max-json-values", type=int, default=20_000_000, help="Skip JSON cases with more vector values than this")
+    parser.add_argument("--url", default="http://localhost:8000", help="Service URL for --modes http")
+    parser.add_argument("--server-pid", type=int, default=None, help="PID of a local service to sample peak RSS from in http mode")
+    parser.add_argument("--timeout", type=float, default=3600.0, help="HTTP timeout in seconds")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this file")
+    parser.add_argument("--baseline", default=None, help="Results file of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative increase over the baseline before a case counts as a regression")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    # Quiet the service's per-request logging while it runs in-process
+    import logging
+    logging.disable(logging.INFO)
+
+    results = run_benchmarks(args)
+    report: Dict[str, object] = {
+        "metadata": {**environment_metadata(), "arguments": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")}},
+        "results": results,
+    }
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline.get("results", []), args.threshold)
+        report["comparison"] = {
+            "baseline": args.baseline,
+            "baseline_commit": baseline.get("metadata", {}).get("git_commit"),
+            "threshold": args.threshold,
+            "regressions": regressions,
+        }
+        for regression in regressions:
+            print(f"[benchmark] REGRESSION {regression['case']} {regression['metric']}: {regression['baseline']} -> {regression['current']} (+{regression['change']:.0%})", file=sys.stderr)
+        exit_code = 1 if regressions else 0
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
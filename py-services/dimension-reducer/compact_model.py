@@ -0,0 +1,289 @@
+"""
+Compact Transform-Only UMAP Model
+V11.0 Cosmos: Versioned, compressed model format that loads without pickle
+
+cloudpickle.dumps(reducer) serializes everything a fitted umap.UMAP holds, including the
+fuzzy graph, the NN-descent index and numba state, so stored models grow much faster than
+the data transform() actually needs. The compact format keeps only:
+
+- the L2-normalized training embeddings (float16 or float32), searched exactly by cosine
+- the fitted embedding coordinates
+- the scalar parameters of UMAP's transform step
+- the pre-reduction projector, if the model was fitted on pre-reduced vectors
+
+Layout (all integers little-endian):
+
+    magic (8 bytes) | header length (uint32) | JSON header | zero padding to 64 bytes | array blobs
+
+Each array blob is described in the header by dtype, shape, offset, size and codec. The
+"shuffle-zlib" codec byte-shuffles floats before zlib for a much better ratio; the "raw"
+codec stores the array uncompressed and aligned so it can be memory-mapped straight from disk.
+"""
+
+import json
+import logging
+import mmap
+import struct
+import zlib
+from typing import Any, Optional, Union
+
+import numpy as np
+
+from pre_reduction import PreReducer
+
+logger = logging.getLogger(__name__)
+
+COMPACT_MODEL_MAGIC = b"2D1LUMAP"
+COMPACT_MODEL_VERSION = 1
+
+CODEC_RAW = "raw"
+CODEC_SHUFFLE_ZLIB = "shuffle-zlib"
+
+_ALIGNMENT = 64
+_HEADER_LENGTH = struct.Struct("<I")
+
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+
+class CompactModelError(ValueError):
+    """Raised when a buffer is not a readable compact model"""
+
+
+class CompactUMAPModel:
+    """
+    Transform-only view of a fitted cosine UMAP model.
+
+    transform() follows umap.UMAP.transform: exact cosine kNN against the training
+    embeddings, fuzzy membership strengths, graph-weighted initialization and a short
+    layout optimization, using UMAP's own numba kernels.
+    """
+
+    def __init__(self, params: dict, training_embeddings: np.ndarray, embedding: np.ndarray, extras: Optional[dict] = None, pre_reducer: Optional[PreReducer] = None):
+        self.params = params
+        self.training_embeddings = training_embeddings
+        self.embedding_ = embedding
+        self.extras = extras or {}
+        self.pre_reducer = pre_reducer
+
+    @property
+    def n_training_samples(self) -> int:
+        return self.embedding_.shape[0]
+
+    @classmethod
+    def from_umap(cls, reducer: Any, X: np.ndarray, embedding: Optional[np.ndarray] = None, dtype: str = "float16", pre_reducer: Optional[PreReducer] = None) -> "CompactUMAPModel":
+        """
+        Extract the transform state of a fitted umap.UMAP (fitted on X with the cosine metric).
+
+        X is the data UMAP was fitted on, i.e. already projected when pre_reducer is given.
+        """
+        if reducer.metric != "cosine":
+            raise CompactModelError(f"Compact models only support the cosine metric, got {reducer.metric}")
+
+        from knn_graph import normalize_rows
+
+        params = {
+            "n_neighbors": int(reducer._n_neighbors),
+            "n_components": int(reducer.n_components),
+            "metric": "cosine",
+            "disconnection_distance": float(reducer._disconnection_distance),
+            "local_connectivity": float(reducer.local_connectivity),
+            "a": float(reducer._a),
+            "b": float(reducer._b),
+            "repulsion_strength": float(reducer.repulsion_strength),
+            "initial_alpha": float(reducer._initial_alpha),
+            "negative_sample_rate": int(reducer.negative_sample_rate),
+            "n_epochs": int(reducer.n_epochs) if reducer.n_epochs is not None else None,
+            "transform_seed": int(reducer.transform_seed),
+            "parallel": reducer.random_state is None,
+        }
+        training_embeddings = normalize_rows(np.asarray(X, dtype=np.float32)).astype(dtype)
+        embedding = np.asarray(embedding if embedding is not None else reducer.embedding_, dtype=np.float32)
+        return cls(params, training_embeddings, embedding, pre_reducer=pre_reducer)
+
+    def nearest_neighbors(self, X: np.ndarray, k: Optional[int] = None) -> tuple[np.ndarray, np.ndarray]:
+        """Exact cosine kNN of X (in the pre-reduced space, if any) against the training embeddings"""
+        from knn_graph import exact_knn, normalize_rows
+
+        k = k or self.params["n_neighbors"]
+        training = self.training_embeddings
+        if training.dtype != np.float32:
+            training = training.astype(np.float32)
+        return exact_knn(normalize_rows(np.asarray(X, dtype=np.float32)), training, k)
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        import scipy.sparse
+        from sklearn.utils import check_random_state
+        from umap.layouts import optimize_layout_euclidean
+        from umap.umap_ import (
+            INT32_MAX,
+            INT32_MIN,
+            compute_membership_strengths,
+            init_graph_transform,
+            make_epochs_per_sample,
+            smooth_knn_dist,
+        )
+
+        params = self.params
+        n_neighbors = params["n_neighbors"]
+        if self.pre_reducer is not None:
+            X = self.pre_reducer.transform(X)
+        indices, dists = self.nearest_neighbors(X, n_neighbors)
+
+        indices = indices.astype(np.int64)
+        indices[dists >= params["disconnection_distance"]] = -1
+        adjusted_local_connectivity = max(0.0, params["local_connectivity"] - 1.0)
+        sigmas, rhos = smooth_knn_dist(dists, float(n_neighbors), local_connectivity=float(adjusted_local_connectivity))
+        rows, cols, vals, _ = compute_membership_strengths(indices, dists, sigmas, rhos, bipartite=True)
+
+        graph = scipy.sparse.coo_matrix((vals, (rows, cols)), shape=(X.shape[0], self.n_training_samples))
+        csr_graph = graph.tocsr()
+        csr_graph.eliminate_zeros()
+        embedding = init_graph_transform(csr_graph, self.embedding_)
+
+        if params["n_epochs"] is None:
+            n_epochs = 100 if X.shape[0] <= 10000 else 30
+        else:
+            n_epochs = int(params["n_epochs"] // 3.0)
+
+        graph.data[graph.data < (graph.data.max() / float(n_epochs))] = 0.0
+        graph.eliminate_zeros()
+        epochs_per_sample = make_epochs_per_sample(graph.data, n_epochs)
+
+        rng_state = check_random_state(params["transform_seed"]).randint(INT32_MIN, INT32_MAX, 3).astype(np.int64)
+        # optimize_layout_euclidean returns the head embedding (densMAP fits would add aux data)
+        return np.asarray(optimize_layout_euclidean(
+            embedding,
+            self.embedding_.astype(np.float32, copy=True),
+            graph.row,
+            graph.col,
+            n_epochs,
+            self.n_training_samples,
+            epochs_per_sample,
+            params["a"],
+            params["b"],
+            rng_state,
+            params["repulsion_strength"],
+            params["initial_alpha"] / 4.0,
+            params["negative_sample_rate"],
+            params["parallel"],
+            verbose=False,
+        ))
+
+    def to_bytes(self, compress: bool = True) -> bytes:
+        """Serialize to the compact container (compressed for storage/transport, raw for mmap)"""
+        arrays = {"training_embeddings": self.training_embeddings, "embedding": self.embedding_}
+        arrays.update({f"extra/{name}": value for name, value in self.extras.items() if isinstance(value, np.ndarray)})
+        pre_reduction = None
+        if self.pre_reducer is not None:
+            pre_reduction = {
+                "method": self.pre_reducer.method,
+                "explained_variance_ratio": self.pre_reducer.explained_variance_ratio,
+            }
+            arrays["pre_reduction/components"] = self.pre_reducer.components
+            if self.pre_reducer.mean is not None:
+                arrays["pre_reduction/mean"] = self.pre_reducer.mean
+        codec = CODEC_SHUFFLE_ZLIB if compress else CODEC_RAW
+
+        blobs = []
+        array_headers = {}
+        offset = 0
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array, dtype=np.dtype(array.dtype).newbyteorder("<"))
+            blob = _encode_blob(array, codec)
+            array_headers[name] = {
+                "dtype": array.dtype.str,
+                "shape": list(array.shape),
+                "offset": offset,
+                "nbytes": len(blob),
+                "codec": codec,
+            }
+            padding = (-len(blob)) % _ALIGNMENT
+            blobs.append(blob + b"\0" * padding)
+            offset += len(blob) + padding
+
+        header = {
+            "version": COMPACT_MODEL_VERSION,
+            "params": self.params,
+            "pre_reduction": pre_reduction,
+            "extras": {name: value for name, value in self.extras.items() if not isinstance(value, np.ndarray)},
+            "arrays": array_headers,
+        }
+        header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        prefix = COMPACT_MODEL_MAGIC + _HEADER_LENGTH.pack(len(header_bytes)) + header_bytes
+        prefix += b"\0" * ((-len(prefix)) % _ALIGNMENT)
+        return prefix + b"".join(blobs)
+
+
+def is_compact_model(buffer: Buffer) -> bool:
+    return bytes(buffer[:len(COMPACT_MODEL_MAGIC)]) == COMPACT_MODEL_MAGIC
+
+
+def load_compact_model(buffer: Buffer) -> CompactUMAPModel:
+    """
+    Load a compact model without pickle.
+
+    Raw arrays are zero-copy views into the buffer, so passing an mmap keeps them on disk.
+    """
+    if not is_compact_model(buffer):
+        raise CompactModelError("Not a compact UMAP model")
+
+    magic_length = len(COMPACT_MODEL_MAGIC)
+    (header_length,) = _HEADER_LENGTH.unpack_from(buffer, magic_length)
+    header_start = magic_length + _HEADER_LENGTH.size
+    try:
+        header = json.loads(bytes(buffer[header_start:header_start + header_length]))
+    except ValueError as e:
+        raise CompactModelError(f"Invalid compact model header: {str(e)}")
+
+    if header.get("version") != COMPACT_MODEL_VERSION:
+        raise CompactModelError(f"Unsupported compact model version: {header.get('version')}")
+
+    data_start = header_start + header_length
+    data_start += (-data_start) % _ALIGNMENT
+
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        start = data_start + spec["offset"]
+        arrays[name] = _decode_blob(buffer, start, spec)
+
+    extras = dict(header.get("extras", {}))
+    extras.update({name[len("extra/"):]: value for name, value in arrays.items() if name.startswith("extra/")})
+
+    pre_reducer = None
+    pre_reduction = header.get("pre_reduction")
+    if pre_reduction is not None:
+        pre_reducer = PreReducer(
+            pre_reduction["method"],
+            arrays["pre_reduction/components"],
+            arrays.get("pre_reduction/mean"),
+            pre_reduction.get("explained_variance_ratio"),
+        )
+    return CompactUMAPModel(header["params"], arrays["training_embeddings"], arrays["embedding"], extras, pre_reducer)
+
+
+def load_compact_model_file(path: str) -> CompactUMAPModel:
+    """Memory-map a compact model file; raw-codec arrays are paged in on demand"""
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return load_compact_model(mapped)
+
+
+def _encode_blob(array: np.ndarray, codec: str) -> bytes:
+    if codec == CODEC_RAW:
+        return array.tobytes()
+    # Byte shuffle: group the n-th byte of every element together so exponent bytes compress well
+    shuffled = array.reshape(-1).view(np.uint8).reshape(-1, array.dtype.itemsize).T.tobytes()
+    return zlib.compress(shuffled, 6)
+
+
+def _decode_blob(buffer: Buffer, start: int, spec: dict) -> np.ndarray:
+    dtype = np.dtype(spec["dtype"])
+    shape = tuple(spec["shape"])
+    count = int(np.prod(shape, dtype=np.int64))
+
+    if spec["codec"] == CODEC_RAW:
+        return np.frombuffer(buffer, dtype=dtype, count=count, offset=start).reshape(shape)
+    if spec["codec"] == CODEC_SHUFFLE_ZLIB:
+        shuffled = np.frombuffer(zlib.decompress(bytes(buffer[start:start + spec["nbytes"]])), dtype=np.uint8)
+        return shuffled.reshape(dtype.itemsize, count).T.copy().view(dtype).reshape(shape)
+    raise CompactModelError(f"Unknown array codec: {spec['codec']}")
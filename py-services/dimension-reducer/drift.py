@@ -0,0 +1,373 @@
+"""
+Projection Drift Scoring
+V11.0 Cosmos: Tell umap_transform callers when new nodes no longer fit the model
+
+The GraphProjectionWorker used to refit every UMAP_INTERVAL nodes, whether or not the new
+nodes fit the existing manifold. umap_transform now scores each batch against a baseline
+taken from the model's own training data (stored in model_metadata by umap_learning):
+
+- nearest-training-neighbour distance: the cosine distance of each new point to its
+  closest training point, compared with the leave-one-out distances of training points.
+  Points beyond the training p95 count as out of distribution; about 5% do without drift.
+- local trustworthiness: how many of the training points a new point was placed next to
+  in the layout are also among its nearest neighbours in the input space (Venna & Kaski,
+  restricted to one point). Placements into the wrong region lower it.
+
+A batch recommends a refit when too many of its points are out of distribution or its
+trustworthiness falls well below the training baseline. Both scores cost one matmul and
+one partial sort against the training data per scored row, plus one pass over the row per
+layout neighbour that is not among the point's input-space neighbours.
+"""
+
+import logging
+import threading
+import weakref
+from typing import Any, Optional
+
+import numpy as np
+
+from fast_transform import build_layout_index, get_numpy_engine
+from knn_graph import normalize_rows
+
+logger = logging.getLogger(__name__)
+
+# Defaults of the refit decision (overridable through app.py's DRIFT_* settings)
+OUT_OF_DISTRIBUTION_QUANTILE = "p95"
+OUT_OF_DISTRIBUTION_FRACTION = 0.25
+TRUSTWORTHINESS_DROP = 0.1
+MIN_SCORED_ROWS = 5
+
+# Bound on the (rows x training rows) distance blocks of the rank computation
+_MAX_BLOCK_ELEMENTS = 1 << 23
+_MAX_CHUNK_ROWS = 256
+# Layout neighbours outside the input-space neighbourhood are ranked by counting closer
+# points, one pass over the row each; rows with more of them than this are sorted instead
+_MAX_COUNTED_NEIGHBOURS = 4
+_RANK_PAIRS_PER_PASS = 64
+# Stands in for excluded self-distances: above any cosine distance
+_EXCLUDED_DISTANCE = 3.0
+
+# Baselines computed from a model are cached for as long as its transform engine is alive
+_baselines: "weakref.WeakKeyDictionary[Any, dict]" = weakref.WeakKeyDictionary()
+_baselines_lock = threading.Lock()
+
+
+class DriftRows:
+    """Per-row drift scores of a transformed batch (possibly of a subset of its rows)"""
+
+    def __init__(self, row_index: np.ndarray, nn_distance: np.ndarray, trustworthiness: Optional[np.ndarray], n_rows: int):
+        self.row_index = row_index
+        self.nn_distance = nn_distance
+        self.trustworthiness = trustworthiness
+        self.n_rows = n_rows
+
+    def slice(self, start: int, stop: int) -> "DriftRows":
+        """Scores of rows [start, stop) of the batch, renumbered from 0"""
+        mask = (self.row_index >= start) & (self.row_index < stop)
+        trustworthiness = self.trustworthiness[mask] if self.trustworthiness is not None else None
+        return DriftRows(self.row_index[mask] - start, self.nn_distance[mask], trustworthiness, stop - start)
+
+
+class DriftAccumulator:
+    """
+    Drift scores of a stream of consecutive batches, kept to at most max_rows scored rows
+
+    Whenever the kept rows would exceed max_rows, every other one is dropped and only
+    every stride-th scored row is kept from then on, so the summary of an arbitrarily long
+    stream is taken from rows spread evenly over all of it (as score_rows does for one
+    batch) in bounded memory.
+    """
+
+    def __init__(self, max_rows: int = 256):
+        self.max_rows = max(1, max_rows)
+        self.n_rows = 0
+        self.n_batches = 0
+        self._stride = 1
+        self._n_scored = 0
+        self._sequence = np.empty(0, dtype=np.int64)
+        self._row_index = np.empty(0, dtype=np.int64)
+        self._nn_distance = np.empty(0, dtype=np.float32)
+        # Trustworthiness is only reported if every batch had it
+        self._trustworthiness: Optional[np.ndarray] = np.empty(0, dtype=np.float32)
+
+    def add(self, rows: DriftRows) -> None:
+        """Append the scores of the next batch of the stream"""
+        sequence = self._n_scored + np.arange(rows.nn_distance.shape[0])
+        keep = sequence % self._stride == 0
+        self._sequence = np.concatenate([self._sequence, sequence[keep]])
+        self._row_index = np.concatenate([self._row_index, rows.row_index[keep] + self.n_rows])
+        self._nn_distance = np.concatenate([self._nn_distance, rows.nn_distance[keep]])
+        if self._trustworthiness is not None and rows.trustworthiness is not None:
+            self._trustworthiness = np.concatenate([self._trustworthiness, rows.trustworthiness[keep]])
+        else:
+            self._trustworthiness = None
+        self._n_scored += int(sequence.shape[0])
+        self.n_rows += rows.n_rows
+        self.n_batches += 1
+
+        while self._sequence.shape[0] > self.max_rows:
+            self._stride *= 2
+            keep = self._sequence % self._stride == 0
+            self._sequence, self._row_index, self._nn_distance = self._sequence[keep], self._row_index[keep], self._nn_distance[keep]
+            if self._trustworthiness is not None:
+                self._trustworthiness = self._trustworthiness[keep]
+
+    def rows(self) -> DriftRows:
+        """The kept scores as one batch of n_rows rows"""
+        return DriftRows(self._row_index, self._nn_distance, self._trustworthiness, self.n_rows)
+
+
+def compute_baseline(
+    training: np.ndarray,
+    embedding: np.ndarray,
+    n_neighbors: int,
+    sample_size: int = 1024,
+    random_state: int = 0,
+    training_norms: Optional[np.ndarray] = None,
+    layout_index: Any = None,
+) -> Optional[dict]:
+    """
+    Drift baseline of a fitted layout, for model_metadata["drift_baseline"].
+
+    Args:
+        training: Training rows (after any pre-reduction), L2-normalized unless
+            training_norms is given
+        embedding: Layout coordinates of the training rows
+        n_neighbors: Neighbourhood size of the model
+        sample_size: Training rows scored leave-one-out (all rows if fewer)
+        training_norms: Row norms of unnormalized training rows (see row_norms); only
+            the sampled rows are normalized and the rest are scaled block by block
+        layout_index: build_layout_index of embedding, if already built
+
+    Returns:
+        Leave-one-out nearest-neighbour distance quantiles and mean trustworthiness of the
+        sampled training rows, or None with fewer than 2 training rows
+    """
+    n_training = training.shape[0]
+    if n_training < 2:
+        return None
+    if n_training > sample_size:
+        sample = np.sort(np.random.default_rng(random_state).choice(n_training, sample_size, replace=False))
+    else:
+        sample = np.arange(n_training)
+    queries = training[sample] if training_norms is None else normalize_rows(np.asarray(training[sample], dtype=np.float32))
+    nn_distance, trustworthiness = _score(
+        queries, np.asarray(embedding[sample], dtype=np.float32), training, embedding, n_neighbors, exclude=sample, training_norms=training_norms, layout_index=layout_index
+    )
+    return {
+        "n_training": int(n_training),
+        "sample_size": int(sample.shape[0]),
+        "n_neighbors": int(n_neighbors),
+        "nn_distance": _quantiles(nn_distance),
+        "trustworthiness": round(float(trustworthiness.mean()), 6) if trustworthiness is not None else None
+    }
+
+
+def placement_baseline(rows: DriftRows, n_training: int, n_neighbors: int) -> Optional[dict]:
+    """
+    Drift baseline from the scores of rows the model placed itself (landmark fits), in the
+    format of compute_baseline.
+
+    Landmarks are spread out on purpose, so their leave-one-out distances overstate how far
+    an in-distribution point lies from its nearest training point; the placed rows are
+    scored exactly like later umap_transform batches.
+    """
+    if rows.nn_distance.shape[0] == 0:
+        return None
+    return {
+        "n_training": int(n_training),
+        "sample_size": int(rows.nn_distance.shape[0]),
+        "n_neighbors": int(n_neighbors),
+        "source": "placed_rows",
+        "nn_distance": _quantiles(rows.nn_distance),
+        "trustworthiness": round(float(rows.trustworthiness.mean()), 6) if rows.trustworthiness is not None else None
+    }
+
+
+def model_baseline(model: Any, sample_size: int = 1024) -> Optional[dict]:
+    """compute_baseline of a fitted model, cached per model; None for models without training data (PCA layouts)"""
+    engine = _engine(model)
+    if engine is None:
+        return None
+    with _baselines_lock:
+        baseline = _baselines.get(engine)
+    if baseline is None:
+        baseline = compute_baseline(engine.training_embeddings, engine.embedding, engine.n_neighbors, sample_size, layout_index=engine.layout_index())
+        if baseline is None:
+            return None
+        with _baselines_lock:
+            _baselines[engine] = baseline
+    return baseline
+
+
+def score_rows(model: Any, X: np.ndarray, coordinates: np.ndarray, max_rows: int = 256) -> Optional[DriftRows]:
+    """
+    Drift scores of transformed rows; batches above max_rows are scored on evenly spaced rows.
+
+    Returns:
+        DriftRows, or None for models without training data
+    """
+    engine = _engine(model)
+    if engine is None:
+        return None
+    n_rows = X.shape[0]
+    row_index = np.arange(n_rows) if n_rows <= max_rows else np.unique(np.linspace(0, n_rows - 1, max_rows).astype(np.int64))
+    queries = X[row_index]
+    if engine.pre_reducer is not None:
+        queries = engine.pre_reducer.transform(queries)
+    queries = normalize_rows(np.asarray(queries, dtype=np.float32))
+    nn_distance, trustworthiness = _score(
+        queries, np.asarray(coordinates[row_index], dtype=np.float32), engine.training_embeddings, engine.embedding, engine.n_neighbors,
+        layout_index=engine.layout_index()
+    )
+    return DriftRows(row_index, nn_distance, trustworthiness, n_rows)
+
+
+def is_baseline(baseline: Any) -> bool:
+    """Whether a client-supplied drift_baseline has the fields summarize_drift reads"""
+    return isinstance(baseline, dict) and isinstance(baseline.get("nn_distance"), dict) and OUT_OF_DISTRIBUTION_QUANTILE in baseline["nn_distance"]
+
+
+def summarize_drift(
+    rows: DriftRows,
+    baseline: dict,
+    out_of_distribution_fraction: float = OUT_OF_DISTRIBUTION_FRACTION,
+    trustworthiness_drop: float = TRUSTWORTHINESS_DROP,
+    min_rows: int = MIN_SCORED_ROWS,
+) -> dict:
+    """
+    Compare a batch's scores with the training baseline and decide whether to refit.
+
+    Batches with fewer than min_rows scored rows never recommend a refit, as a handful
+    of points can't tell drift from the expected tail of the baseline.
+    """
+    base_nn = baseline["nn_distance"]
+    n_scored = int(rows.nn_distance.shape[0])
+    ood_fraction = float(np.mean(rows.nn_distance > base_nn[OUT_OF_DISTRIBUTION_QUANTILE])) if n_scored else 0.0
+    nn_distance = _quantiles(rows.nn_distance) if n_scored else None
+
+    trustworthiness = None
+    trust_drop = None
+    if rows.trustworthiness is not None and n_scored:
+        trustworthiness = float(rows.trustworthiness.mean())
+        if baseline.get("trustworthiness") is not None:
+            trust_drop = baseline["trustworthiness"] - trustworthiness
+
+    reasons = []
+    if n_scored >= min_rows:
+        if ood_fraction >= out_of_distribution_fraction:
+            reasons.append("out_of_distribution")
+        if trust_drop is not None and trust_drop >= trustworthiness_drop:
+            reasons.append("trustworthiness")
+
+    return {
+        "n_samples": rows.n_rows,
+        "n_scored": n_scored,
+        "nn_distance": nn_distance,
+        "baseline_nn_distance": base_nn,
+        "nn_distance_ratio": round(nn_distance["p50"] / base_nn["p50"], 4) if nn_distance and base_nn["p50"] > 0 else None,
+        "out_of_distribution_fraction": round(ood_fraction, 4),
+        "trustworthiness": round(trustworthiness, 4) if trustworthiness is not None else None,
+        "baseline_trustworthiness": baseline.get("trustworthiness"),
+        "trustworthiness_drop": round(trust_drop, 4) if trust_drop is not None else None,
+        "refit_recommended": bool(reasons),
+        "reasons": reasons
+    }
+
+
+def _engine(model: Any):
+    try:
+        return get_numpy_engine(model)
+    except (ValueError, AttributeError):
+        return None
+
+
+def _score(
+    queries: np.ndarray,
+    query_coordinates: np.ndarray,
+    training: np.ndarray,
+    embedding: np.ndarray,
+    n_neighbors: int,
+    exclude: Optional[np.ndarray] = None,
+    training_norms: Optional[np.ndarray] = None,
+    layout_index: Any = None,
+) -> tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Nearest-neighbour distance and local trustworthiness of normalized query rows.
+
+    With exclude (training indices of the queries), each query's own training row is
+    left out of both neighbourhoods. With training_norms, the training rows are not
+    normalized and each similarity block is scaled by their norms. Layout neighbours
+    are found with layout_index (see build_layout_index), built here if not given.
+
+    Returns:
+        (nn_distance, trustworthiness) - trustworthiness is None when the training set is
+        too small for k-neighbourhoods to be informative
+    """
+    n_candidates = training.shape[0] - (1 if exclude is not None else 0)
+    # Trustworthiness normalizes by k(2n - 3k - 1) over the n points including the query,
+    # which must stay positive
+    n_points = n_candidates + 1
+    k = min(n_neighbors, (2 * n_points - 2) // 3, n_candidates)
+    n_queries = queries.shape[0]
+    nn_distance = np.empty(n_queries, dtype=np.float32)
+    trustworthiness = np.empty(n_queries, dtype=np.float32) if k >= 1 else None
+    if trustworthiness is not None and layout_index is None:
+        layout_index = build_layout_index(embedding)
+
+    chunk_rows = max(1, min(_MAX_CHUNK_ROWS, _MAX_BLOCK_ELEMENTS // max(1, training.shape[0])))
+    for start in range(0, n_queries, chunk_rows):
+        stop = min(start + chunk_rows, n_queries)
+        rows = np.arange(stop - start)
+        similarity = queries[start:stop] @ training.T
+        if training_norms is not None:
+            similarity /= training_norms
+        high = 1.0 - similarity
+        if exclude is not None:
+            high[rows, exclude[start:stop]] = _EXCLUDED_DISTANCE
+        nn_distance[start:stop] = np.maximum(high.min(axis=1), 0.0)
+        if trustworthiness is None:
+            continue
+        # The k-th nearest input-space distance takes a partition, not a full sort
+        kth_distance = np.partition(high, k - 1, axis=1)[:, k - 1]
+
+        # k nearest training points in the layout; with exclude, one extra is queried and
+        # the query's own row (or else the farthest) dropped
+        n_queried = k + 1 if exclude is not None else k
+        _, low_neighbours = layout_index.query(query_coordinates[start:stop].astype(np.float64), k=n_queried)
+        low_neighbours = np.asarray(low_neighbours, dtype=np.int64).reshape(stop - start, n_queried)
+        if exclude is not None:
+            own_row = low_neighbours == exclude[start:stop, None]
+            own_row[~own_row.any(axis=1), -1] = True
+            low_neighbours = low_neighbours[~own_row].reshape(stop - start, k)
+
+        # Layout neighbours within the k-th input-space distance have fewer than k closer
+        # points and no penalty; only the others need their input-space rank
+        neighbour_dists = np.take_along_axis(high, low_neighbours, axis=1)
+        closer = np.zeros(neighbour_dists.shape, dtype=np.int64)
+        outside = neighbour_dists > kth_distance[:, None]
+        sorted_rows = np.flatnonzero(outside.sum(axis=1) > _MAX_COUNTED_NEIGHBOURS)
+        if sorted_rows.shape[0]:
+            for row, sorted_high in zip(sorted_rows, np.sort(high[sorted_rows], axis=1)):
+                closer[row] = np.searchsorted(sorted_high, neighbour_dists[row])
+            outside[sorted_rows] = False
+        outside_rows, outside_neighbours = np.nonzero(outside)
+        for pair in range(0, outside_rows.shape[0], _RANK_PAIRS_PER_PASS):
+            pair_rows = outside_rows[pair:pair + _RANK_PAIRS_PER_PASS]
+            pair_neighbours = outside_neighbours[pair:pair + _RANK_PAIRS_PER_PASS]
+            closer[pair_rows, pair_neighbours] = np.count_nonzero(high[pair_rows] < neighbour_dists[pair_rows, pair_neighbours][:, None], axis=1)
+        penalty = np.maximum(closer + 1 - k, 0).sum(axis=1)
+        trustworthiness[start:stop] = np.clip(1.0 - 2.0 * penalty / (k * (2 * n_points - 3 * k - 1)), 0.0, 1.0)
+
+    return nn_distance, trustworthiness
+
+
+def _quantiles(values: np.ndarray) -> dict:
+    p50, p90, p95, p99 = np.percentile(values, [50, 90, 95, 99])
+    return {
+        "mean": round(float(values.mean()), 6),
+        "p50": round(float(p50), 6),
+        "p90": round(float(p90), 6),
+        "p95": round(float(p95), 6),
+        "p99": round(float(p99), 6)
+    }
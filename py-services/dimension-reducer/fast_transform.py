@@ -0,0 +1,170 @@
+"""
+NumPy Transform Engine
+V11.0 Cosmos: Low-latency umap_transform for small incremental batches
+
+umap.UMAP.transform searches neighbours with pynndescent and then runs a short SGD
+optimization, which costs hundreds of milliseconds plus numba dispatch even for a handful
+of new nodes. This engine keeps only the first half of UMAP's transform:
+
+1. exact cosine kNN as one matmul against the stored normalized training embeddings
+2. UMAP's fuzzy membership strengths for those neighbours (vectorized bandwidth search)
+3. the membership-weighted average of the neighbours' coordinates
+
+Step 3 is exactly the initialization UMAP's transform starts its optimization from, so new
+nodes land where UMAP would place them before refinement.
+"""
+
+import logging
+import threading
+import weakref
+from typing import Any
+
+import numpy as np
+
+from knn_graph import exact_knn, normalize_rows
+
+logger = logging.getLogger(__name__)
+
+TRANSFORM_ENGINE_UMAP = "umap"
+TRANSFORM_ENGINE_NUMPY = "numpy"
+
+# Same constants as umap.umap_.smooth_knn_dist
+_SMOOTH_K_TOLERANCE = 1e-5
+_MIN_K_DIST_SCALE = 1e-3
+_BANDWIDTH_ITERATIONS = 64
+
+# Engines hold float32 copies of the training embeddings, so build them once per model
+_engines: "weakref.WeakKeyDictionary[Any, NumpyTransformEngine]" = weakref.WeakKeyDictionary()
+_engines_lock = threading.Lock()
+
+
+class NumpyTransformEngine:
+    """Places new points at the membership-weighted mean of their nearest training points"""
+
+    def __init__(self, training_embeddings: np.ndarray, embedding: np.ndarray, n_neighbors: int, disconnection_distance: float = np.inf, pre_reducer: Any = None, owns_training: bool = True):
+        self.training_embeddings = training_embeddings
+        self.embedding = np.asarray(embedding, dtype=np.float32)
+        self.n_neighbors = n_neighbors
+        self.disconnection_distance = disconnection_distance
+        self.pre_reducer = pre_reducer
+        self.owns_training = owns_training
+        self._layout_index: Any = None
+        self._lock = threading.Lock()
+
+    @property
+    def n_training_samples(self) -> int:
+        return self.embedding.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held beyond the model's own arrays: the normalized training copy and the layout index"""
+        nbytes = self.training_embeddings.nbytes if self.owns_training else 0
+        layout_index = self._layout_index
+        if layout_index is not None:
+            nbytes += layout_index.data.nbytes + layout_index.indices.nbytes
+        return int(nbytes)
+
+    def layout_index(self) -> Any:
+        """KD-tree over the training layout for nearest-neighbour queries in the output space, built on first use"""
+        with self._lock:
+            if self._layout_index is None:
+                self._layout_index = build_layout_index(self.embedding)
+            return self._layout_index
+
+    @classmethod
+    def from_model(cls, model: Any) -> "NumpyTransformEngine":
+        """
+        Build an engine from a fitted umap.UMAP, PreReducedUMAP or CompactUMAPModel.
+
+        Raises:
+            ValueError: If the model was not fitted with the cosine metric
+        """
+        params = getattr(model, "params", None)
+        if params is not None:
+            # CompactUMAPModel: training embeddings are already normalized
+            if params.get("metric") != "cosine":
+                raise ValueError(f"NumPy transform engine requires the cosine metric, got {params.get('metric')}")
+            training = model.training_embeddings
+            owns_training = training.dtype != np.float32
+            if owns_training:
+                training = training.astype(np.float32)
+            return cls(training, model.embedding_, params["n_neighbors"], params["disconnection_distance"], model.pre_reducer, owns_training)
+
+        if getattr(model, "metric", None) != "cosine":
+            raise ValueError(f"NumPy transform engine requires the cosine metric, got {getattr(model, 'metric', None)}")
+        raw_data = model._raw_data
+        if hasattr(raw_data, "toarray"):
+            raw_data = raw_data.toarray()
+        training = normalize_rows(np.asarray(raw_data, dtype=np.float32))
+        return cls(training, model.embedding_, model._n_neighbors, model._disconnection_distance, getattr(model, "pre_reducer", None))
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        if self.pre_reducer is not None:
+            X = self.pre_reducer.transform(X)
+        indices, dists = exact_knn(normalize_rows(np.asarray(X, dtype=np.float32)), self.training_embeddings, self.n_neighbors)
+        weights = membership_weights(dists, self.n_neighbors)
+        weights[dists >= self.disconnection_distance] = 0.0
+
+        totals = weights.sum(axis=1, keepdims=True)
+        totals[totals == 0] = 1.0
+        weights /= totals
+        return np.einsum("ij,ijk->ik", weights, self.embedding[indices]).astype(np.float32)
+
+
+def get_numpy_engine(model: Any) -> NumpyTransformEngine:
+    """Engine for a fitted model, cached for as long as the model object is alive"""
+    with _engines_lock:
+        engine = _engines.get(model)
+    if engine is None:
+        engine = NumpyTransformEngine.from_model(model)
+        with _engines_lock:
+            _engines[model] = engine
+    return engine
+
+
+def cached_engine_nbytes(model: Any) -> int:
+    """nbytes of the model's engine if one has been built, else 0 (never builds one)"""
+    with _engines_lock:
+        engine = _engines.get(model)
+    return engine.nbytes if engine is not None else 0
+
+
+def build_layout_index(embedding: np.ndarray) -> Any:
+    """KD-tree over layout coordinates; a layout's few dimensions make its neighbour queries logarithmic"""
+    from scipy.spatial import KDTree
+
+    return KDTree(np.asarray(embedding, dtype=np.float64))
+
+
+def membership_weights(dists: np.ndarray, n_neighbors: int) -> np.ndarray:
+    """
+    UMAP fuzzy membership strengths of query-to-training neighbour distances.
+
+    Vectorized version of smooth_knn_dist + compute_membership_strengths as used by
+    transform (local_connectivity reduced by one, i.e. rho = 0): a per-row bandwidth
+    sigma is found by bisection so that sum(exp(-d / sigma)) over all but the nearest
+    neighbour equals log2(n_neighbors), and each neighbour gets exp(-d / sigma).
+    """
+    dists = dists.astype(np.float64)
+    n_rows = dists.shape[0]
+    target = np.log2(n_neighbors)
+    tail = dists[:, 1:]
+
+    lo = np.zeros(n_rows)
+    hi = np.full(n_rows, np.inf)
+    mid = np.ones(n_rows)
+    for _ in range(_BANDWIDTH_ITERATIONS):
+        psum = np.where(tail > 0, np.exp(-tail / mid[:, None]), 1.0).sum(axis=1)
+        active = np.abs(psum - target) >= _SMOOTH_K_TOLERANCE
+        if not active.any():
+            break
+        too_high = active & (psum > target)
+        too_low = active & ~too_high
+        hi = np.where(too_high, mid, hi)
+        lo = np.where(too_low, mid, lo)
+        mid = np.where(too_high, (lo + hi) / 2.0, mid)
+        mid = np.where(too_low, np.where(np.isinf(hi), mid * 2, (lo + hi) / 2.0), mid)
+
+    # Same lower bound on the bandwidth as UMAP (rows with rho = 0 use the global mean distance)
+    sigma = np.maximum(mid, _MIN_K_DIST_SCALE * dists.mean())
+    return np.where(dists > 0, np.exp(-dists / sigma[:, None]), 1.0).astype(np.float32)
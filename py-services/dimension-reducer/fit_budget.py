@@ -0,0 +1,184 @@
+"""
+Time-Budgeted UMAP Fits
+V11.0 Cosmos: Plan epochs, neighbour-search precision and parallelism from a latency budget
+
+A UMAP fit spends its time in three places: the kNN search (exact below
+EXACT_KNN_MAX_SAMPLES, NN-descent above), the spectral initialization and the epochs of SGD
+over the fuzzy graph. Callers can pin n_epochs, n_jobs and the NN-descent parameters
+directly; with time_budget_ms the settings they leave open are chosen here, from a cost
+model of those three parts, so the fit is expected to finish within the budget:
+
+1. use the default settings if they fit
+2. otherwise run NN-descent and SGD on every worker thread (only when the caller allows
+   unseeded fits, since UMAP only parallelizes unseeded runs)
+3. then lower the epoch count, down to QUALITY_MIN_EPOCHS, at decreasing NN-descent
+   precision
+4. then down to MIN_EPOCHS
+
+The cost model is a rough single-core estimate for warm numba kernels, scaled by
+BACKEND_COST_SCALE in app.py; the response reports the plan next to the measured fit time.
+"""
+
+import math
+from typing import List, Optional
+
+# UMAP computes exact neighbours for small inputs and runs NN-descent above this size
+EXACT_KNN_MAX_SAMPLES = 4096
+
+# Budget mode keeps at least this many epochs before trading neighbour-search precision,
+# and never goes below MIN_EPOCHS
+QUALITY_MIN_EPOCHS = 200
+MIN_EPOCHS = 50
+
+# NN-descent precision levels: multipliers of UMAP's default tree and iteration counts
+NN_DESCENT_PRECISION = (("default", 1.0), ("reduced", 0.5), ("fast", 0.25))
+NN_DESCENT_MAX_CANDIDATES = 60
+
+# Cost model constants (milliseconds)
+_FIT_OVERHEAD_MS = 150.0
+_EXACT_KNN_MS_PER_MAC = 5e-8
+_NN_DESCENT_MS_PER_UNIT = 1e-6
+_SPECTRAL_MS_PER_EDGE = 2e-3
+_SGD_MS_PER_EDGE_EPOCH = 3e-5
+# Speed-up of each extra thread (NN-descent and SGD don't scale perfectly)
+_THREAD_EFFICIENCY = 0.7
+
+
+def default_epochs(n_samples: int) -> int:
+    """UMAP's own epoch count for a cold fit"""
+    return 500 if n_samples <= 10000 else 200
+
+
+def default_nn_descent(n_samples: int, precision: float = 1.0) -> dict:
+    """UMAP's NN-descent parameters for n_samples, scaled down by precision"""
+    n_trees = min(64, 5 + int(round(n_samples ** 0.5 / 20.0)))
+    n_iters = max(5, int(round(math.log2(max(n_samples, 2)))))
+    return {
+        "n_trees": max(2, int(round(n_trees * precision))),
+        "n_iters": max(2, int(round(n_iters * precision))),
+        "max_candidates": NN_DESCENT_MAX_CANDIDATES,
+    }
+
+
+def estimate_umap_fit_ms(
+    n_samples: int,
+    dims: int,
+    n_neighbors: int = 15,
+    n_epochs: Optional[int] = None,
+    nn_descent: Optional[dict] = None,
+    n_jobs: int = 1,
+    incremental_knn: bool = False,
+) -> float:
+    """Estimated wall-clock milliseconds of a UMAP fit with these settings"""
+    speedup = 1.0 + _THREAD_EFFICIENCY * (max(1, n_jobs) - 1)
+    if n_samples <= EXACT_KNN_MAX_SAMPLES:
+        knn_ms = n_samples * n_samples * dims * _EXACT_KNN_MS_PER_MAC
+    else:
+        nn_descent = nn_descent or default_nn_descent(n_samples)
+        knn_ms = n_samples * dims * (2 * nn_descent["n_trees"] + nn_descent["n_iters"] * n_neighbors) * _NN_DESCENT_MS_PER_UNIT / speedup
+    if incremental_knn:
+        # Only new and changed rows are searched, exactly
+        knn_ms *= 0.1
+    edges = n_samples * n_neighbors
+    epochs = n_epochs if n_epochs is not None else default_epochs(n_samples)
+    return _FIT_OVERHEAD_MS + knn_ms + edges * _SPECTRAL_MS_PER_EDGE + edges * epochs * _SGD_MS_PER_EDGE_EPOCH / speedup
+
+
+def plan_umap_fit(
+    n_samples: int,
+    dims: int,
+    n_neighbors: int,
+    time_budget_ms: Optional[float] = None,
+    n_epochs: Optional[int] = None,
+    n_jobs: Optional[int] = None,
+    nn_descent: Optional[dict] = None,
+    allow_parallel: bool = False,
+    max_threads: int = 1,
+    base_epochs: Optional[int] = None,
+    incremental_knn: bool = False,
+    cost_scale: float = 1.0,
+) -> dict:
+    """
+    Settings of a UMAP fit: the caller's explicit ones, the rest from the budget.
+
+    Args:
+        n_epochs, n_jobs, nn_descent: Explicit settings (None leaves them to the planner);
+            n_jobs of -1 means max_threads, and larger values are capped at it
+        allow_parallel: Whether the planner may raise n_jobs (the fit is then unseeded)
+        base_epochs: Epoch count without a budget (UMAP's default for cold fits)
+
+    Returns:
+        Plan with n_epochs, n_jobs, nn_descent (None for exact kNN or UMAP's defaults),
+        nn_descent_precision, estimated_fit_ms, within_budget and adjusted (the settings
+        the budget changed)
+    """
+    base_epochs = base_epochs or default_epochs(n_samples)
+    uses_nn_descent = n_samples > EXACT_KNN_MAX_SAMPLES and not incremental_knn
+    fixed_nn_descent = None
+    if nn_descent:
+        fixed_nn_descent = {**default_nn_descent(n_samples), **{key: value for key, value in nn_descent.items() if value is not None}}
+    # Worker processes cap numba at max_threads, and numba rejects larger thread counts
+    threads = max_threads if n_jobs == -1 else min(n_jobs or 1, max(1, max_threads))
+
+    def estimate(epochs: int, nn_params: Optional[dict], jobs: int) -> float:
+        return estimate_umap_fit_ms(n_samples, dims, n_neighbors, epochs, nn_params, jobs, incremental_knn) * cost_scale
+
+    def plan(epochs: int, nn_params: Optional[dict], precision: str, jobs: int, adjusted: List[str]) -> dict:
+        estimated = estimate(epochs, nn_params, jobs)
+        return {
+            "n_epochs": epochs,
+            "n_jobs": jobs,
+            "nn_descent": nn_params if uses_nn_descent else None,
+            "nn_descent_precision": precision if uses_nn_descent else None,
+            "estimated_fit_ms": round(estimated, 1),
+            "within_budget": None if time_budget_ms is None else estimated <= time_budget_ms,
+            "adjusted": adjusted,
+        }
+
+    start_epochs = n_epochs or base_epochs
+    start_nn = fixed_nn_descent or default_nn_descent(n_samples)
+    start_precision = "custom" if fixed_nn_descent else "default"
+    if time_budget_ms is None or estimate(start_epochs, start_nn, threads) <= time_budget_ms:
+        return plan(start_epochs, fixed_nn_descent, start_precision, threads, [])
+
+    adjusted = []
+    if n_jobs is None and allow_parallel and max_threads > 1:
+        threads = max_threads
+        adjusted.append("n_jobs")
+        if estimate(start_epochs, start_nn, threads) <= time_budget_ms:
+            return plan(start_epochs, fixed_nn_descent, start_precision, threads, adjusted)
+
+    precisions = [(start_precision, start_nn)]
+    if fixed_nn_descent is None and uses_nn_descent:
+        precisions = [(name, default_nn_descent(n_samples, factor)) for name, factor in NN_DESCENT_PRECISION]
+    epoch_floors = [] if n_epochs is not None else [min(base_epochs, QUALITY_MIN_EPOCHS), min(base_epochs, MIN_EPOCHS)]
+
+    if n_epochs is not None:
+        for precision, nn_params in precisions:
+            if estimate(n_epochs, nn_params, threads) <= time_budget_ms:
+                changed = adjusted + (["nn_descent"] if precision != start_precision else [])
+                return plan(n_epochs, nn_params if precision != "default" else None, precision, threads, changed)
+
+    for floor in epoch_floors:
+        for precision, nn_params in precisions:
+            epochs = _max_epochs_within(time_budget_ms, lambda epochs: estimate(epochs, nn_params, threads), floor, base_epochs)
+            if epochs is not None:
+                changed = adjusted + (["n_epochs"] if epochs != base_epochs else []) + (["nn_descent"] if precision != start_precision else [])
+                return plan(epochs, nn_params if precision != "default" else None, precision, threads, changed)
+
+    # Nothing fits: run the cheapest allowed settings and report the overrun
+    precision, nn_params = precisions[-1]
+    epochs = n_epochs or min(base_epochs, MIN_EPOCHS)
+    changed = adjusted + (["n_epochs"] if epochs != base_epochs else []) + (["nn_descent"] if precision != start_precision else [])
+    return plan(epochs, nn_params if precision != "default" else None, precision, threads, changed)
+
+
+def _max_epochs_within(time_budget_ms: float, estimate, floor: int, ceiling: int) -> Optional[int]:
+    """Largest epoch count in [floor, ceiling] whose estimate is within the budget (estimates are linear in epochs)"""
+    at_floor = estimate(floor)
+    if at_floor > time_budget_ms:
+        return None
+    per_epoch = (estimate(ceiling) - at_floor) / max(1, ceiling - floor)
+    if per_epoch <= 0:
+        return ceiling
+    return int(min(ceiling, floor + (time_budget_ms - at_floor) // per_epoch))
@@ -0,0 +1,329 @@
+"""
+Reduction Job Manager
+V11.0 Cosmos: Runs expensive reductions off the event loop
+
+UMAP fits, Ridge regression and model serialization are CPU-bound and hold the GIL for
+seconds to minutes. Running them inside an async endpoint freezes every other request on
+the same uvicorn worker, including /health. The JobManager runs them in a process pool
+with a bounded number of pending jobs and tracks status, progress and results so that
+callers can either await a job directly (/reduce) or poll for it (/jobs/{id}).
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUS_QUEUED = "queued"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_COMPLETED = "completed"
+JOB_STATUS_FAILED = "failed"
+
+ProgressCallback = Callable[[str, float], None]
+
+# Set in each pool process by _init_worker; carries (job_id, stage, progress) back to the parent
+_worker_progress_queue: Any = None
+
+
+class JobQueueFullError(RuntimeError):
+    """Raised when the number of pending jobs has reached the configured bound"""
+
+
+class JobExecutionError(RuntimeError):
+    """
+    Picklable carrier for job failures raised in pool processes.
+
+    FastAPI's HTTPException cannot be unpickled, so worker failures are converted to this
+    type, keeping the status code the synchronous path would have returned.
+    """
+
+    def __init__(self, detail: str, status_code: int = 500):
+        super().__init__(detail, status_code)
+        self.detail = detail
+        self.status_code = status_code
+
+
+class ReductionJob:
+    """State of a single submitted job"""
+
+    def __init__(self, job_id: str, method: str):
+        self.job_id = job_id
+        self.method = method
+        self.status = JOB_STATUS_QUEUED
+        self.stage: Optional[str] = None
+        self.progress = 0.0
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.completed_at: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.error_status_code: Optional[int] = None
+        self.future: Optional[Future] = None
+        # Set by forget() before the job finished: drop it as soon as it does
+        self.forgotten = False
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (JOB_STATUS_COMPLETED, JOB_STATUS_FAILED)
+
+    def to_dict(self) -> dict:
+        """Status fields (without the result) for API responses"""
+        return {
+            "job_id": self.job_id,
+            "method": self.method,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 4),
+            "submitted_at": _format_timestamp(self.submitted_at),
+            "started_at": _format_timestamp(self.started_at),
+            "completed_at": _format_timestamp(self.completed_at),
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """
+    Bounded job queue backed by a process pool for fits and a thread pool for cheap work.
+
+    Args:
+        max_workers: Worker processes for CPU-heavy jobs (fits run in parallel across cores)
+        max_pending: Maximum queued + running jobs; further submissions raise JobQueueFullError
+        result_ttl_seconds: How long finished jobs stay available for polling
+        worker_threads: Cap on numba/BLAS threads per worker process (None leaves them
+            uncapped), so that fits leave cores free for requests served in the parent
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 16, result_ttl_seconds: float = 3600.0, worker_threads: Optional[int] = None):
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(1, max_pending)
+        self.result_ttl_seconds = result_ttl_seconds
+        self.worker_threads = max(1, worker_threads) if worker_threads else None
+        self._jobs: dict[str, ReductionJob] = {}
+        self._lock = threading.Lock()
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._progress_queue: Any = None
+        self._progress_thread: Optional[threading.Thread] = None
+
+    def submit(
+        self,
+        target: Callable[..., Any],
+        args: tuple,
+        method: str,
+        use_process_pool: bool = True,
+        finalize: Optional[Callable[[Any], Any]] = None,
+    ) -> ReductionJob:
+        """
+        Queue target(*args, progress=callback) and return the tracked job.
+
+        target must be a picklable module-level function when use_process_pool is set.
+        finalize runs in the parent process on the target's result before the job is
+        marked completed (e.g. to register a fitted model in parent-side caches).
+        """
+        job = ReductionJob(uuid.uuid4().hex, method)
+        with self._lock:
+            self._prune_finished_locked()
+            pending = sum(1 for existing in self._jobs.values() if not existing.is_finished)
+            if pending >= self.max_pending:
+                raise JobQueueFullError(f"Job queue full ({pending}/{self.max_pending} pending)")
+            self._jobs[job.job_id] = job
+
+        try:
+            if use_process_pool:
+                executor = self._get_process_pool()
+                future = executor.submit(_execute_in_worker, job.job_id, target, args)
+            else:
+                executor = self._get_thread_pool()
+                future = executor.submit(self._execute_in_thread, job.job_id, target, args)
+        except Exception:
+            with self._lock:
+                self._jobs.pop(job.job_id, None)
+            raise
+
+        job.future = future
+        future.add_done_callback(lambda done: self._complete(job, done, finalize))
+        return job
+
+    async def wait(self, job: ReductionJob) -> ReductionJob:
+        """Await a submitted job from the event loop and return it once finished"""
+        future = job.future
+        if future is not None:
+            try:
+                # The completion callback was registered first, so the job state is
+                # final by the time this wrapped future resolves
+                await asyncio.wrap_future(future)
+            except Exception:
+                pass
+        return job
+
+    def get(self, job_id: str) -> Optional[ReductionJob]:
+        with self._lock:
+            self._prune_finished_locked()
+            return self._jobs.get(job_id)
+
+    def forget(self, job_id: str) -> None:
+        """
+        Drop a job whose result has been delivered, or whose caller went away
+
+        Jobs still running are dropped as soon as they finish instead of being kept for
+        result_ttl_seconds.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            if job.is_finished:
+                del self._jobs[job_id]
+            else:
+                job.forgotten = True
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = {JOB_STATUS_QUEUED: 0, JOB_STATUS_RUNNING: 0, JOB_STATUS_COMPLETED: 0, JOB_STATUS_FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "worker_threads": self.worker_threads,
+            **counts,
+        }
+
+    def shutdown(self) -> None:
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=False, cancel_futures=True)
+            self._thread_pool = None
+        if self._progress_queue is not None:
+            self._progress_queue.put(None)
+            self._progress_queue = None
+
+    def _get_process_pool(self) -> Executor:
+        with self._lock:
+            if self._process_pool is None:
+                # spawn avoids forking a process whose numba/OpenMP threads are already running
+                context = multiprocessing.get_context("spawn")
+                self._progress_queue = context.Queue()
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=context,
+                    initializer=_init_worker,
+                    initargs=(self._progress_queue, self.worker_threads),
+                )
+                self._progress_thread = threading.Thread(
+                    target=self._drain_progress, args=(self._progress_queue,), name="job-progress", daemon=True
+                )
+                self._progress_thread.start()
+            return self._process_pool
+
+    def _get_thread_pool(self) -> Executor:
+        with self._lock:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+            return self._thread_pool
+
+    def _execute_in_thread(self, job_id: str, target: Callable[..., Any], args: tuple) -> Any:
+        self._update_progress(job_id, "started", 0.0)
+        return target(*args, progress=lambda stage, progress: self._update_progress(job_id, stage, progress))
+
+    def _drain_progress(self, progress_queue: Any) -> None:
+        while True:
+            try:
+                message = progress_queue.get()
+            except (EOFError, OSError):
+                return
+            if message is None:
+                return
+            self._update_progress(*message)
+
+    def _update_progress(self, job_id: str, stage: str, progress: float) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.is_finished:
+                return
+            if job.status == JOB_STATUS_QUEUED:
+                job.status = JOB_STATUS_RUNNING
+                job.started_at = time.time()
+            job.stage = stage
+            job.progress = max(job.progress, min(1.0, progress))
+
+    def _complete(self, job: ReductionJob, future: Future, finalize: Optional[Callable[[Any], Any]]) -> None:
+        result = None
+        error = None
+        error_status_code = None
+        try:
+            result = future.result()
+            if finalize is not None:
+                result = finalize(result)
+        except Exception as e:
+            # HTTPException / JobExecutionError carry the status code the synchronous path would have returned
+            error = str(getattr(e, "detail", None) or e) or type(e).__name__
+            error_status_code = getattr(e, "status_code", 500)
+            logger.error(f"Job {job.job_id} ({job.method}) failed: {error}")
+
+        with self._lock:
+            if job.started_at is None:
+                job.started_at = job.submitted_at
+            job.completed_at = time.time()
+            job.result = result
+            job.error = error
+            job.error_status_code = error_status_code
+            job.status = JOB_STATUS_FAILED if error is not None else JOB_STATUS_COMPLETED
+            job.stage = "failed" if error is not None else "completed"
+            if error is None:
+                job.progress = 1.0
+            job.future = None
+            if job.forgotten:
+                self._jobs.pop(job.job_id, None)
+
+    def _prune_finished_locked(self) -> None:
+        cutoff = time.time() - self.result_ttl_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.is_finished and job.completed_at is not None and job.completed_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+def _init_worker(progress_queue: Any, worker_threads: Optional[int] = None) -> None:
+    global _worker_progress_queue
+    _worker_progress_queue = progress_queue
+    if worker_threads:
+        # Read by numba and OpenMP/BLAS when first loaded in this process
+        for variable in ("NUMBA_NUM_THREADS", "OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+            os.environ[variable] = str(worker_threads)
+        numba = sys.modules.get("numba")
+        if numba is not None:
+            # Already imported while spawn re-imported the main module
+            numba.set_num_threads(min(worker_threads, numba.config.NUMBA_NUM_THREADS))
+
+
+def _execute_in_worker(job_id: str, target: Callable[..., Any], args: tuple) -> Any:
+    """Pool-process entrypoint: runs the target with a progress callback wired to the parent"""
+
+    def report(stage: str, progress: float) -> None:
+        if _worker_progress_queue is not None:
+            _worker_progress_queue.put((job_id, stage, progress))
+
+    report("started", 0.0)
+    try:
+        return target(*args, progress=report)
+    except Exception as e:
+        raise JobExecutionError(str(getattr(e, "detail", None) or e), getattr(e, "status_code", 500)) from None
+
+
+def _format_timestamp(timestamp: Optional[float]) -> Optional[str]:
+    if timestamp is None:
+        return None
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(timestamp))
@@ -0,0 +1,324 @@
+"""
+Incremental kNN Graph
+V11.0 Cosmos: Reuse the cosine nearest-neighbour graph across UMAP refits
+
+The GraphProjectionWorker refits every UMAP_INTERVAL new nodes, so almost all of a user's
+neighbour graph is unchanged between fits. Graphs are kept per graph_id (keyed by node id)
+and updated for added, removed and changed nodes with exact cosine matmuls, then handed to
+UMAP as a precomputed kNN together with a search index seeded from the same graph.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, List, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    # pre_reduction imports this module
+    from pre_reduction import PreReducer
+
+logger = logging.getLogger(__name__)
+
+# Rows are compared with the previous fit through a blake2b digest of the bytes of the
+# normalized embedding, so a node counts as unchanged only if its embedding is identical
+# up to scale
+_FINGERPRINT_BYTES = 16
+
+# Above this fraction of rows to recompute, a cold build is as cheap as patching
+MAX_INCREMENTAL_FRACTION = 0.5
+
+# Rows per matmul block when computing exact neighbours
+KNN_CHUNK_ROWS = 1024
+
+# Cold builds above this size use NN-descent, like UMAP's own small/large data split
+EXACT_COLD_BUILD_MAX_SAMPLES = 4096
+
+
+class KnnGraph:
+    """Cosine kNN graph of one user's nodes, with self as the first neighbour of each row"""
+
+    def __init__(self, graph_id: str, node_ids: np.ndarray, fingerprints: np.ndarray, indices: np.ndarray, dists: np.ndarray):
+        self.graph_id = graph_id
+        self.node_ids = node_ids
+        self.fingerprints = fingerprints
+        self.indices = indices
+        self.dists = dists
+        # Projector of the space the graph was built in, when fits are pre-reduced
+        self.pre_reducer: Optional["PreReducer"] = None
+
+    @property
+    def n_neighbors(self) -> int:
+        return self.indices.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.fingerprints.nbytes + self.indices.nbytes + self.dists.nbytes + 64 * len(self.node_ids))
+
+
+class KnnGraphStore:
+    """Bounded LRU of KnnGraph objects keyed by graph_id"""
+
+    def __init__(self, max_graphs: int = 64):
+        self._max_graphs = max(1, max_graphs)
+        self._graphs: "OrderedDict[str, KnnGraph]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, graph_id: str) -> Optional[KnnGraph]:
+        with self._lock:
+            graph = self._graphs.get(graph_id)
+            if graph is not None:
+                self._graphs.move_to_end(graph_id)
+            return graph
+
+    def put(self, graph: KnnGraph) -> None:
+        with self._lock:
+            self._graphs[graph.graph_id] = graph
+            self._graphs.move_to_end(graph.graph_id)
+            while len(self._graphs) > self._max_graphs:
+                self._graphs.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "graphs": len(self._graphs),
+                "max_graphs": self._max_graphs,
+                "total_bytes": sum(graph.nbytes for graph in self._graphs.values()),
+            }
+
+
+def normalize_rows(X: np.ndarray) -> np.ndarray:
+    """L2-normalize rows for cosine similarity via dot products (zero rows stay zero)"""
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (X / norms).astype(np.float32, copy=False)
+
+
+def row_norms(X: np.ndarray) -> np.ndarray:
+    """
+    L2 norms of X's rows without a full-size temporary, for scaling similarities block by
+    block instead of normalizing a copy of X (zero rows report 1, as normalize_rows keeps
+    them zero)
+    """
+    norms = np.sqrt(np.einsum("ij,ij->i", X, X, dtype=np.float64)).astype(np.float32)
+    norms[norms == 0] = 1.0
+    return norms
+
+
+def exact_knn(queries: np.ndarray, data: np.ndarray, k: int, chunk_rows: int = KNN_CHUNK_ROWS, data_norms: Optional[np.ndarray] = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Exact cosine kNN of normalized query rows against normalized data rows.
+
+    Args:
+        data_norms: Row norms of data (see row_norms) when data is not normalized
+
+    Returns:
+        (indices, dists) of shape [n_queries, k], sorted by ascending cosine distance
+    """
+    k = min(k, data.shape[0])
+    indices = np.empty((queries.shape[0], k), dtype=np.int32)
+    dists = np.empty((queries.shape[0], k), dtype=np.float32)
+
+    for start in range(0, queries.shape[0], chunk_rows):
+        similarity = queries[start:start + chunk_rows] @ data.T
+        if data_norms is not None:
+            similarity /= data_norms
+        block = 1.0 - similarity
+        block_indices, block_dists = _top_k(block, k)
+        indices[start:start + chunk_rows] = block_indices
+        dists[start:start + chunk_rows] = block_dists
+
+    return indices, dists
+
+
+def update_knn_graph(
+    graph_id: str,
+    node_ids: List[str],
+    X: np.ndarray,
+    k: int,
+    previous: Optional[KnnGraph] = None,
+    random_state: Optional[int] = None,
+    nn_descent: Optional[dict] = None,
+) -> tuple[KnnGraph, dict, object]:
+    """
+    Build or incrementally update the cosine kNN graph for the current node set.
+
+    Rows of nodes that are new or whose embedding changed are computed exactly against
+    all nodes. Rows of unchanged nodes keep their previous neighbours, re-indexed to the
+    current order; if one of those neighbours was removed or changed the row is recomputed,
+    otherwise it is merged with the new nodes as extra candidates.
+
+    nn_descent holds extra NNDescent arguments (n_trees, n_iters, max_candidates, low_memory,
+    n_jobs) for cold builds of large graphs.
+
+    Returns:
+        (graph, stats, search_index) - stats reports how many rows were recomputed or
+        merged; search_index is a pynndescent index when a cold build produced one
+    """
+    n_samples = X.shape[0]
+    k = min(k, n_samples)
+    Xn = normalize_rows(X)
+    fingerprints = _fingerprint(Xn)
+    node_id_array = np.asarray(node_ids, dtype=object)
+
+    positions = _match_previous(previous, node_id_array, fingerprints, k)
+    if positions is None or previous is None:
+        return _cold_build(graph_id, node_id_array, fingerprints, X, Xn, k, random_state, nn_descent)
+
+    # positions[i] is the previous row of current node i, or -1 if new/changed
+    kept = positions >= 0
+    new_rows = np.flatnonzero(~kept)
+
+    # Map previous row numbers to current ones (-1 for removed or changed nodes)
+    previous_to_current = np.full(previous.indices.shape[0], -1, dtype=np.int64)
+    previous_to_current[positions[kept]] = np.flatnonzero(kept)
+
+    kept_rows = np.flatnonzero(kept)
+    previous_indices = previous.indices[positions[kept_rows], :k]
+    # NN-descent marks missing neighbours with -1; those rows are treated as dirty below
+    remapped = np.where(previous_indices >= 0, previous_to_current[previous_indices], -1)
+    kept_dists = previous.dists[positions[kept_rows], :k]
+
+    # Kept rows that lost a neighbour need a full recompute
+    dirty_mask = (remapped < 0).any(axis=1)
+    dirty_rows = kept_rows[dirty_mask]
+    clean_rows = kept_rows[~dirty_mask]
+    recompute_rows = np.concatenate([new_rows, dirty_rows])
+
+    if recompute_rows.shape[0] > MAX_INCREMENTAL_FRACTION * n_samples:
+        return _cold_build(graph_id, node_id_array, fingerprints, X, Xn, k, random_state, nn_descent)
+
+    indices = np.empty((n_samples, k), dtype=np.int32)
+    dists = np.empty((n_samples, k), dtype=np.float32)
+
+    if recompute_rows.shape[0]:
+        indices[recompute_rows], dists[recompute_rows] = exact_knn(Xn[recompute_rows], Xn, k)
+
+    clean_indices = remapped[~dirty_mask].astype(np.int32)
+    clean_dists = kept_dists[~dirty_mask]
+    if new_rows.shape[0] and clean_rows.shape[0]:
+        # New nodes are the only candidates that can displace an unchanged neighbour
+        for start in range(0, clean_rows.shape[0], KNN_CHUNK_ROWS):
+            stop = start + KNN_CHUNK_ROWS
+            candidate_dists = 1.0 - Xn[clean_rows[start:stop]] @ Xn[new_rows].T
+            merged_dists = np.concatenate([clean_dists[start:stop], candidate_dists], axis=1)
+            merged_indices = np.concatenate(
+                [clean_indices[start:stop], np.broadcast_to(new_rows.astype(np.int32), candidate_dists.shape)], axis=1
+            )
+            order, top_dists = _top_k(merged_dists, k)
+            clean_indices[start:stop] = np.take_along_axis(merged_indices, order, axis=1)
+            clean_dists[start:stop] = top_dists
+
+    indices[clean_rows] = clean_indices
+    dists[clean_rows] = clean_dists
+
+    graph = KnnGraph(graph_id, node_id_array, fingerprints, indices, dists)
+    stats = _stats(
+        cold_build=False,
+        n_samples=n_samples,
+        rows_recomputed=int(recompute_rows.shape[0]),
+        rows_merged=int(clean_rows.shape[0]) if new_rows.shape[0] else 0,
+        nodes_added=int(new_rows.shape[0]),
+        nodes_removed=int(previous.indices.shape[0] - kept_rows.shape[0]),
+    )
+    return graph, stats, None
+
+
+def build_search_index(X: np.ndarray, graph: KnnGraph, random_state: Optional[int] = None):
+    """
+    Create a pynndescent search index seeded with the graph, without running NN-descent.
+
+    UMAP needs an NNDescent index next to a precomputed kNN to support transform().
+    pynndescent stores cosine distances as -log2(similarity) internally, so the seed
+    distances are converted into that space.
+    """
+    from pynndescent import NNDescent
+
+    similarity = np.clip(1.0 - graph.dists, np.finfo(np.float32).tiny, 1.0)
+    internal_dists = (-np.log2(similarity)).astype(np.float32)
+    index = NNDescent(
+        X,
+        metric="cosine",
+        n_neighbors=graph.n_neighbors,
+        init_graph=graph.indices,
+        init_dist=internal_dists,
+        n_iters=0,
+        random_state=random_state,
+    )
+    # NNDescent disables tree init when given an init_graph, which leaves queries without a
+    # search forest and starting from random candidates (poor recall); build one on prepare
+    index.tree_init = True
+    return index
+
+
+def _cold_build(graph_id: str, node_ids: np.ndarray, fingerprints: np.ndarray, X: np.ndarray, Xn: np.ndarray, k: int, random_state: Optional[int], nn_descent: Optional[dict] = None) -> tuple[KnnGraph, dict, object]:
+    """Build the graph from scratch: exact for small inputs, NN-descent otherwise"""
+    search_index = None
+    if X.shape[0] <= EXACT_COLD_BUILD_MAX_SAMPLES:
+        indices, dists = exact_knn(Xn, Xn, k)
+    else:
+        from pynndescent import NNDescent
+
+        search_index = NNDescent(X, metric="cosine", n_neighbors=k, random_state=random_state, **{"low_memory": True, **(nn_descent or {})})
+        neighbor_graph = search_index.neighbor_graph
+        if neighbor_graph is None:
+            # Only compressed indexes drop their graph
+            raise RuntimeError("NN-descent index has no neighbour graph")
+        indices, dists = neighbor_graph
+        indices = indices.astype(np.int32, copy=False)
+        dists = dists.astype(np.float32, copy=False)
+
+    graph = KnnGraph(graph_id, node_ids, fingerprints, indices, dists)
+    return graph, _stats(cold_build=True, n_samples=X.shape[0], rows_recomputed=X.shape[0]), search_index
+
+
+def _match_previous(previous: Optional[KnnGraph], node_ids: np.ndarray, fingerprints: np.ndarray, k: int) -> Optional[np.ndarray]:
+    """Previous row of each current node, -1 if new or changed; None if the graph can't be reused"""
+    if previous is None or previous.n_neighbors < k:
+        return None
+
+    previous_rows = {node_id: row for row, node_id in enumerate(previous.node_ids)}
+    positions = np.fromiter((previous_rows.get(node_id, -1) for node_id in node_ids), dtype=np.int64, count=len(node_ids))
+
+    matched = positions >= 0
+    if previous.fingerprints.shape[1:] != fingerprints.shape[1:]:
+        # Graphs kept from before a change of the fingerprint layout
+        return None
+    changed = (previous.fingerprints[positions[matched]] != fingerprints[matched]).any(axis=1)
+    matched_rows = np.flatnonzero(matched)
+    positions[matched_rows[changed]] = -1
+    return positions
+
+
+def _fingerprint(Xn: np.ndarray) -> np.ndarray:
+    """[n_rows, 2] uint64 blake2b digests of the rows' float32 bytes"""
+    rows = np.ascontiguousarray(Xn, dtype=np.float32)
+    digests = b"".join(hashlib.blake2b(row.tobytes(), digest_size=_FINGERPRINT_BYTES).digest() for row in rows)
+    return np.frombuffer(digests, dtype=np.uint64).reshape(rows.shape[0], _FINGERPRINT_BYTES // 8)
+
+
+def _top_k(dist_block: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Column positions and values of the k smallest entries per row, sorted ascending"""
+    if k < dist_block.shape[1]:
+        candidates = np.argpartition(dist_block, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(dist_block.shape[1]), dist_block.shape).copy()
+    candidate_dists = np.take_along_axis(dist_block, candidates, axis=1)
+    order = np.argsort(candidate_dists, axis=1, kind="stable")
+    top_positions = np.take_along_axis(candidates, order, axis=1)
+    top_dists = np.maximum(np.take_along_axis(candidate_dists, order, axis=1), 0.0)
+    return top_positions, top_dists
+
+
+def _stats(cold_build: bool, n_samples: int, rows_recomputed: int, rows_merged: int = 0, nodes_added: int = 0, nodes_removed: int = 0) -> dict:
+    return {
+        "reused": not cold_build,
+        "n_samples": n_samples,
+        "rows_recomputed": rows_recomputed,
+        "rows_merged": rows_merged,
+        "rows_reused": n_samples - rows_recomputed,
+        "nodes_added": nodes_added,
+        "nodes_removed": nodes_removed,
+    }
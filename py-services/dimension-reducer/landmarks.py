@@ -0,0 +1,167 @@
+"""
+Landmark Mode
+V11.0 Cosmos: Fit UMAP on a representative sample and place the rest in chunks
+
+For graphs past ~100k nodes a full fit exceeds the container's memory and time budget.
+Landmark mode fits UMAP on a sample of landmark_count rows and positions every other row
+with the fitted model, streaming fixed-size chunks through a thread pool. Inputs may be
+memory-mapped .npy files, so only the landmarks, one chunk per worker and the output
+coordinates are ever resident.
+
+Selection strategies:
+- kmeans++: D² sampling (k-means++ seeding) over a random candidate pool, which spreads
+  landmarks over the whole manifold including small clusters
+- stratified: rows are bucketed by random-hyperplane signatures (cosine LSH) in one
+  streaming pass and landmarks are drawn from every bucket in proportion to its size
+- random: uniform sample
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import numpy as np
+
+from knn_graph import normalize_rows
+
+logger = logging.getLogger(__name__)
+
+LANDMARK_STRATEGY_KMEANS_PP = "kmeans++"
+LANDMARK_STRATEGY_STRATIFIED = "stratified"
+LANDMARK_STRATEGY_RANDOM = "random"
+
+# k-means++ seeds from a pool of this many candidates per landmark (bounded memory)
+KMEANS_PP_CANDIDATES_PER_LANDMARK = 4
+# Centres added per D² sampling round; each round is one matmul against the pool
+KMEANS_PP_BATCH = 64
+# Hyperplanes used for stratification (up to 2**bits strata)
+STRATIFIED_HYPERPLANE_BITS = 8
+# Rows read at a time when streaming over the full input
+SCAN_CHUNK_ROWS = 16384
+
+
+def select_landmarks(X: np.ndarray, n_landmarks: int, strategy: str, random_state: Optional[int] = None) -> np.ndarray:
+    """Sorted row indices of the landmarks (X may be a memmap)"""
+    n_samples = X.shape[0]
+    if n_landmarks >= n_samples:
+        return np.arange(n_samples)
+
+    rng = np.random.default_rng(random_state)
+    if strategy == LANDMARK_STRATEGY_KMEANS_PP:
+        landmarks = _kmeans_pp(X, n_landmarks, rng)
+    elif strategy == LANDMARK_STRATEGY_STRATIFIED:
+        landmarks = _stratified(X, n_landmarks, rng)
+    elif strategy == LANDMARK_STRATEGY_RANDOM:
+        landmarks = rng.choice(n_samples, size=n_landmarks, replace=False)
+    else:
+        raise ValueError(f"Unknown landmark strategy: {strategy}")
+    return np.sort(landmarks)
+
+
+def place_in_chunks(
+    transform: Callable[[np.ndarray], np.ndarray],
+    X: np.ndarray,
+    rows: np.ndarray,
+    output: np.ndarray,
+    chunk_rows: int,
+    workers: int,
+    progress: Optional[Callable[[float], None]] = None,
+) -> dict:
+    """
+    Transform X[rows] chunk by chunk across a thread pool, writing into output[rows].
+
+    Each chunk is read (from a memmap, if X is one) only when its task runs, so resident
+    input is bounded by chunk_rows * workers. transform must be thread-safe; NumPy's BLAS
+    calls release the GIL, so chunks run in parallel.
+    """
+    start = time.perf_counter()
+    chunks = [rows[i:i + chunk_rows] for i in range(0, rows.shape[0], chunk_rows)]
+    completed = 0
+
+    def run(chunk: np.ndarray) -> None:
+        output[chunk] = transform(np.asarray(X[chunk], dtype=np.float32))
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="landmark") as executor:
+        for future in [executor.submit(run, chunk) for chunk in chunks]:
+            future.result()
+            completed += 1
+            if progress:
+                progress(completed / max(1, len(chunks)))
+
+    return {
+        "placed_rows": int(rows.shape[0]),
+        "chunks": len(chunks),
+        "chunk_rows": chunk_rows,
+        "workers": workers,
+        "placement_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+def _kmeans_pp(X: np.ndarray, n_landmarks: int, rng: np.random.Generator) -> np.ndarray:
+    """Batched k-means++ (D² sampling) in cosine space over a random candidate pool"""
+    n_samples = X.shape[0]
+    pool_size = min(n_samples, n_landmarks * KMEANS_PP_CANDIDATES_PER_LANDMARK)
+    pool = np.sort(rng.choice(n_samples, size=pool_size, replace=False))
+    P = normalize_rows(np.asarray(X[pool], dtype=np.float32))
+
+    chosen = [int(rng.integers(pool_size))]
+    min_dist = np.maximum(1.0 - P @ P[chosen[0]], 0.0)
+    min_dist[chosen[0]] = 0.0
+
+    while len(chosen) < n_landmarks:
+        batch = min(KMEANS_PP_BATCH, n_landmarks - len(chosen))
+        weights = min_dist ** 2
+        total = weights.sum()
+        if total <= 0:
+            # Remaining candidates duplicate chosen ones; fill uniformly
+            remaining = np.setdiff1d(np.arange(pool_size), chosen)
+            chosen.extend(rng.choice(remaining, size=n_landmarks - len(chosen), replace=False).tolist())
+            break
+        picks = rng.choice(pool_size, size=min(batch, int(np.count_nonzero(weights))), replace=False, p=weights / total)
+        chosen.extend(int(pick) for pick in picks)
+        min_dist = np.minimum(min_dist, np.maximum(1.0 - P @ P[picks].T, 0.0).min(axis=1))
+        min_dist[picks] = 0.0
+
+    return pool[np.asarray(chosen[:n_landmarks])]
+
+
+def _stratified(X: np.ndarray, n_landmarks: int, rng: np.random.Generator) -> np.ndarray:
+    """Proportional sample from cosine-LSH buckets computed in one streaming pass"""
+    n_samples = X.shape[0]
+    hyperplanes = rng.standard_normal((X.shape[1], STRATIFIED_HYPERPLANE_BITS)).astype(np.float32)
+    bit_values = (1 << np.arange(STRATIFIED_HYPERPLANE_BITS)).astype(np.int64)
+
+    strata = np.empty(n_samples, dtype=np.int64)
+    for start in range(0, n_samples, SCAN_CHUNK_ROWS):
+        chunk = np.asarray(X[start:start + SCAN_CHUNK_ROWS], dtype=np.float32)
+        strata[start:start + chunk.shape[0]] = ((chunk @ hyperplanes) > 0) @ bit_values
+
+    labels, counts = np.unique(strata, return_counts=True)
+    # Largest-remainder allocation, at least one landmark per stratum while budget allows
+    quotas = counts * (n_landmarks / n_samples)
+    allocation = np.minimum(np.maximum(np.floor(quotas).astype(np.int64), 1), counts)
+    remainder = n_landmarks - allocation.sum()
+    if remainder > 0:
+        order = np.argsort(-(quotas - np.floor(quotas)))
+        for index in order:
+            if remainder == 0:
+                break
+            if allocation[index] < counts[index]:
+                allocation[index] += 1
+                remainder -= 1
+    elif remainder < 0:
+        order = np.argsort(counts)
+        for index in order[::-1]:
+            if remainder == 0:
+                break
+            if allocation[index] > 1:
+                take = min(allocation[index] - 1, -remainder)
+                allocation[index] -= take
+                remainder += take
+
+    landmarks = []
+    for label, quota in zip(labels, allocation):
+        members = np.flatnonzero(strata == label)
+        landmarks.append(rng.choice(members, size=int(quota), replace=False))
+    return np.concatenate(landmarks)[:n_landmarks]
@@ -0,0 +1,216 @@
+"""
+Incremental Linear Projection
+V11.0 Cosmos: Closed-form ridge projection maintained from sufficient statistics
+
+The hybrid system maps embeddings to UMAP coordinates with a ridge regression
+W = (XᵀX + αI)⁻¹ XᵀY. Everything the solution (and its R² score) needs is contained in a
+few accumulators - XᵀX, XᵀY, YᵀY, ΣY and the sample count - so the projection of a graph
+is kept as those accumulators, which new nodes and their UMAP coordinates are added to
+without another pass over the full history. The system is re-solved on the first read of
+the matrix after an update, so a burst of umap_transform calls pays for one solve.
+
+Accumulators describe one UMAP frame: a refit resets them, and updates from a transform
+with a different model are ignored. A retried umap_transform would add the same rows
+again, so content hashes of the most recently folded rows are remembered and rows seen
+before are skipped.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Same regularization as the previous sklearn Ridge(alpha=0.1, fit_intercept=False)
+RIDGE_ALPHA = 0.1
+
+# Keys of this many recently folded rows are remembered to skip retried updates
+MAX_TRACKED_ROWS = 16384
+# Rough per-key footprint of the tracked rows (8-byte digest object plus its dict slot)
+_TRACKED_ROW_BYTES = 80
+
+
+class LinearProjection:
+    """Ridge projection of one graph plus the sufficient statistics it was solved from"""
+
+    def __init__(self, graph_id: Optional[str], input_dimensions: int, output_dimensions: int, alpha: float = RIDGE_ALPHA):
+        self.graph_id = graph_id
+        self.model_id: Optional[str] = None
+        self.alpha = alpha
+        self.xtx = np.zeros((input_dimensions, input_dimensions), dtype=np.float64)
+        self.xty = np.zeros((input_dimensions, output_dimensions), dtype=np.float64)
+        self.yty = np.zeros(output_dimensions, dtype=np.float64)
+        self.y_sum = np.zeros(output_dimensions, dtype=np.float64)
+        self.n_samples = 0
+        self._folded_rows: dict[bytes, None] = {}
+        self._matrix = np.zeros((input_dimensions, output_dimensions), dtype=np.float64)
+        self._stale = False
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        # Projections fitted in worker processes are pickled back to the parent
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def input_dimensions(self) -> int:
+        return self.xtx.shape[0]
+
+    @property
+    def output_dimensions(self) -> int:
+        return self.xty.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.xtx.nbytes + self.xty.nbytes + self._matrix.nbytes + len(self._folded_rows) * _TRACKED_ROW_BYTES)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """The [input_dim, output_dim] ridge solution of all rows added so far"""
+        with self._lock:
+            return self._solve_locked()
+
+    def update(self, X: np.ndarray, Y: np.ndarray, keys: Optional[Sequence[bytes]] = None) -> int:
+        """
+        Accumulate new rows; the matrix is re-solved when next read
+
+        Args:
+            keys: Per-row keys (see row_keys); rows whose key was folded in recently, or
+                repeats within X, are skipped
+
+        Returns:
+            Number of rows added
+        """
+        X = np.asarray(X, dtype=np.float64)
+        Y = np.asarray(Y, dtype=np.float64)
+        with self._lock:
+            if keys is not None:
+                fresh = []
+                for row, key in enumerate(keys):
+                    if key not in self._folded_rows:
+                        self._folded_rows[key] = None
+                        fresh.append(row)
+                while len(self._folded_rows) > MAX_TRACKED_ROWS:
+                    del self._folded_rows[next(iter(self._folded_rows))]
+                if len(fresh) < X.shape[0]:
+                    X, Y = X[fresh], Y[fresh]
+                if X.shape[0] == 0:
+                    return 0
+            self.xtx += X.T @ X
+            self.xty += X.T @ Y
+            self.yty += np.einsum("ij,ij->j", Y, Y)
+            self.y_sum += Y.sum(axis=0)
+            self.n_samples += X.shape[0]
+            self._stale = True
+            return X.shape[0]
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        return (np.asarray(X, dtype=np.float64) @ self.matrix).astype(np.float32)
+
+    def r2_score(self) -> float:
+        """Training R² (uniform average over outputs, as sklearn's score) from the accumulators"""
+        with self._lock:
+            if self.n_samples == 0:
+                return 0.0
+            W = self._solve_locked()
+            ss_res = self.yty - 2.0 * np.einsum("ij,ij->j", W, self.xty) + np.einsum("ij,ij->j", W, self.xtx @ W)
+            ss_tot = self.yty - self.y_sum ** 2 / self.n_samples
+            valid = ss_tot > 0
+            if not valid.any():
+                return 0.0
+            return float(np.mean(1.0 - ss_res[valid] / ss_tot[valid]))
+
+    def _solve_locked(self) -> np.ndarray:
+        if self._stale:
+            self._matrix = solve_ridge(self.xtx, self.xty, self.alpha)
+            self._stale = False
+        return self._matrix
+
+
+class LinearProjectionStore:
+    """
+    LRU of LinearProjection objects keyed by graph_id, bounded by count and by bytes
+
+    Each projection holds a d×d XᵀX (about 19 MB in float64 at 1536 dimensions), so the
+    byte bound is what limits memory; the newest projection is always kept. Sizes are
+    taken when a projection is put, as updates only grow it by its tracked row keys.
+    """
+
+    def __init__(self, max_projections: int = 32, max_bytes: int = 512 * 1024 * 1024):
+        self._max_projections = max(1, max_projections)
+        self._max_bytes = max_bytes
+        self._projections: "OrderedDict[str, LinearProjection]" = OrderedDict()
+        self._sizes: dict[str, int] = {}
+        self._total_bytes = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, graph_id: str) -> Optional[LinearProjection]:
+        with self._lock:
+            projection = self._projections.get(graph_id)
+            if projection is not None:
+                self._projections.move_to_end(graph_id)
+            return projection
+
+    def put(self, projection: LinearProjection) -> None:
+        graph_id = projection.graph_id
+        if graph_id is None:
+            raise ValueError("Only projections of a graph_id can be stored")
+        size_bytes = projection.nbytes
+        with self._lock:
+            self._total_bytes += size_bytes - self._sizes.get(graph_id, 0)
+            self._sizes[graph_id] = size_bytes
+            self._projections[graph_id] = projection
+            self._projections.move_to_end(graph_id)
+            while len(self._projections) > 1 and (len(self._projections) > self._max_projections or self._total_bytes > self._max_bytes):
+                evicted_id, _ = self._projections.popitem(last=False)
+                self._total_bytes -= self._sizes.pop(evicted_id)
+                self._evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "projections": len(self._projections),
+                "max_projections": self._max_projections,
+                "total_bytes": self._total_bytes,
+                "max_bytes": self._max_bytes,
+                "evictions": self._evictions,
+            }
+
+
+def fit_linear_projection(graph_id: Optional[str], X: np.ndarray, Y: np.ndarray, alpha: float = RIDGE_ALPHA) -> LinearProjection:
+    """Start a projection from a full fit (one pass over X)"""
+    projection = LinearProjection(graph_id, X.shape[1], Y.shape[1], alpha)
+    projection.update(X, Y)
+    return projection
+
+
+def row_keys(X: np.ndarray) -> list[bytes]:
+    """
+    Per-row update keys: content hashes of the float32 rows
+
+    Hashing the vectors rather than node ids keys a retry the same way whether it arrives
+    as JSON or binary, alone or inside a coalesced batch.
+    """
+    rows = np.ascontiguousarray(X, dtype=np.float32)
+    return [hashlib.blake2b(row.tobytes(), digest_size=8).digest() for row in rows]
+
+
+def solve_ridge(xtx: np.ndarray, xty: np.ndarray, alpha: float) -> np.ndarray:
+    """Solve (XᵀX + αI) W = XᵀY; the system is symmetric positive definite for alpha > 0"""
+    system = xtx + alpha * np.eye(xtx.shape[0])
+    try:
+        from scipy.linalg import cho_factor, cho_solve
+
+        return cho_solve(cho_factor(system, check_finite=False), xty, check_finite=False)
+    except Exception:
+        return np.linalg.solve(system, xty)
@@ -0,0 +1,165 @@
+"""
+Reduction Metrics
+V11.0 Cosmos: Per-stage timings and Prometheus exposition for /reduce
+
+Every reduction records how long each phase took (payload parsing, vector conversion,
+kNN graph, UMAP fit, Ridge, model serialization, response encoding, ...) in a StageTimer.
+Timers travel with the result from worker processes back to the parent, where they are
+folded into histograms labelled by method and by n_samples / dimension buckets and served
+in the Prometheus text format at /metrics.
+
+The exposition format is written directly so the service needs no metrics client library.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans sub-millisecond transforms up to multi-minute landmark fits
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# Upper bounds of the n_samples and input dimension label buckets
+SAMPLE_BUCKETS = (100, 1000, 10000, 100000)
+DIMENSION_BUCKETS = (384, 768, 1536)
+
+
+class StageTimer:
+    """Accumulates wall-clock milliseconds per named stage of one reduction"""
+
+    def __init__(self):
+        self._stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000)
+
+    def record(self, name: str, elapsed_ms: float) -> None:
+        self._stages[name] = self._stages.get(name, 0.0) + elapsed_ms
+
+    def merge(self, stages: Optional[Dict[str, float]]) -> None:
+        for name, elapsed_ms in (stages or {}).items():
+            self.record(name, elapsed_ms)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: round(elapsed_ms, 3) for name, elapsed_ms in self._stages.items()}
+
+
+def size_bucket(value: Optional[int], bounds: Sequence[int]) -> str:
+    """Label for the smallest bound that value fits under, e.g. "le_1000" or "gt_100000" """
+    if value is None:
+        return "unknown"
+    for bound in bounds:
+        if value <= bound:
+            return f"le_{bound}"
+    return f"gt_{bounds[-1]}"
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...], amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...], buckets: Sequence[float] = DURATION_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        # Per label set: non-cumulative bucket counts (+Inf last), sum, count
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        index = len(self.buckets)
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = position
+                break
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        label_names = self.label_names + ("le",)
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if math.isinf(bound) else _format_value(bound)
+                    lines.append(f"{self.name}_bucket{_format_labels(label_names, labels + (le,))} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+class ReductionMetrics:
+    """Request and stage metrics of the dimension reducer"""
+
+    def __init__(self, prefix: str = "dimension_reducer"):
+        self.requests = Counter(f"{prefix}_requests_total", "Reduction requests by method and outcome", ("method", "status"))
+        self.samples = Counter(f"{prefix}_samples_total", "Vectors processed by method", ("method",))
+        self.request_duration = Histogram(
+            f"{prefix}_request_duration_seconds", "End-to-end reduction request duration", ("method", "samples", "dims")
+        )
+        self.stage_duration = Histogram(
+            f"{prefix}_stage_duration_seconds", "Duration of each reduction stage", ("method", "stage", "samples", "dims")
+        )
+
+    def observe(self, method: str, status: str, n_samples: Optional[int], dims: Optional[int], stages: Dict[str, float], total_ms: Optional[float] = None) -> None:
+        """Record one finished request; stages and total_ms are in milliseconds"""
+        samples_label = size_bucket(n_samples, SAMPLE_BUCKETS)
+        dims_label = size_bucket(dims, DIMENSION_BUCKETS)
+        self.requests.inc((method, status))
+        if n_samples and status != "error":
+            self.samples.inc((method,), n_samples)
+        if total_ms is not None:
+            self.request_duration.observe((method, samples_label, dims_label), total_ms / 1000)
+        for stage, elapsed_ms in stages.items():
+            self.stage_duration.observe((method, stage, samples_label, dims_label), elapsed_ms / 1000)
+
+    def render(self) -> str:
+        lines = []
+        for metric in (self.requests, self.samples, self.request_duration, self.stage_duration):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() and abs(value) < 1e15 else repr(value)
@@ -0,0 +1,183 @@
+"""
+Transform Micro-Batching
+V11.0 Cosmos: Coalesce concurrent umap_transform requests for the same model
+
+During ingestion bursts several GraphProjectionWorker instances transform a few nodes of
+the same user at nearly the same moment, and each call pays the fixed cost of a model
+lookup and a transform dispatch. The batcher holds requests that share a key (model and
+transform settings) for at most window_ms, or until max_batch_rows rows are waiting, runs
+a single transform on the stacked vectors and hands every caller its own slice, so only
+transforms that place each row independently of its batch may be submitted. If the
+coalesced transform fails, each caller is retried on its own, so one bad request only
+fails itself.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Hashable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BatchRunner = Callable[[List[Any], np.ndarray], Awaitable[dict]]
+
+
+class BatchSlice:
+    """A caller's view of a coalesced transform result"""
+
+    def __init__(self, result: dict, start: int, stop: int, batch_requests: int, wait_ms: float):
+        self.result = result
+        self.start = start
+        self.stop = stop
+        self.batch_requests = batch_requests
+        self.wait_ms = wait_ms
+
+
+class _PendingBatch:
+    def __init__(self):
+        self.contexts: list[Any] = []
+        self.parts: list[np.ndarray] = []
+        self.futures: list[asyncio.Future] = []
+        self.arrivals: list[float] = []
+        self.rows = 0
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.flushed = False
+
+
+class TransformMicroBatcher:
+    """
+    Per-key request coalescing on the event loop.
+
+    Args:
+        run: Coroutine running one transform for the batch; receives the contexts of the
+            batch's requests (in submission order) and the stacked vectors, returns
+            response data whose "coordinates" are sliced per caller. Requests sharing a
+            key must produce the same response fields whichever context the run uses.
+        window_ms: Maximum time the first request of a batch waits for company
+        max_batch_rows: A batch is flushed immediately once this many rows are waiting
+    """
+
+    def __init__(self, run: BatchRunner, window_ms: float = 2.0, max_batch_rows: int = 4096):
+        self._run = run
+        self.window_ms = max(0.0, window_ms)
+        self.max_batch_rows = max(1, max_batch_rows)
+        self._pending: dict[Hashable, _PendingBatch] = {}
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._requests = 0
+        self._rows = 0
+        self._coalesced_requests = 0
+        self._split_batches = 0
+        self._largest_batch_requests = 0
+        self._total_wait_ms = 0.0
+        self._max_wait_ms = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_ms > 0
+
+    async def submit(self, key: Hashable, context: Any, X: np.ndarray) -> BatchSlice:
+        """Queue X under key and wait for the coalesced result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = _PendingBatch()
+            self._pending[key] = batch
+            batch.timer = loop.call_later(self.window_ms / 1000.0, self._flush, key, batch)
+
+        batch.contexts.append(context)
+        batch.parts.append(X)
+        batch.futures.append(future)
+        batch.arrivals.append(time.perf_counter())
+        batch.rows += X.shape[0]
+
+        if batch.rows >= self.max_batch_rows:
+            self._flush(key, batch)
+
+        return await future
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "window_ms": self.window_ms,
+                "max_batch_rows": self.max_batch_rows,
+                "batches": self._batches,
+                "requests": self._requests,
+                "rows": self._rows,
+                "coalesced_requests": self._coalesced_requests,
+                "split_batches": self._split_batches,
+                "coalescing_ratio": round(self._requests / self._batches, 3) if self._batches else None,
+                "largest_batch_requests": self._largest_batch_requests,
+                "average_wait_ms": round(self._total_wait_ms / self._requests, 3) if self._requests else None,
+                "max_wait_ms": round(self._max_wait_ms, 3),
+            }
+
+    def _flush(self, key: Hashable, batch: _PendingBatch) -> None:
+        if batch.flushed:
+            return
+        batch.flushed = True
+        if batch.timer is not None:
+            batch.timer.cancel()
+        if self._pending.get(key) is batch:
+            del self._pending[key]
+        asyncio.get_running_loop().create_task(self._execute(batch))
+
+    async def _execute(self, batch: _PendingBatch) -> None:
+        started = time.perf_counter()
+        waits = [(started - arrival) * 1000 for arrival in batch.arrivals]
+        n_requests = len(batch.futures)
+
+        with self._lock:
+            self._batches += 1
+            self._requests += n_requests
+            self._rows += batch.rows
+            if n_requests > 1:
+                self._coalesced_requests += n_requests
+            self._largest_batch_requests = max(self._largest_batch_requests, n_requests)
+            self._total_wait_ms += sum(waits)
+            self._max_wait_ms = max(self._max_wait_ms, max(waits))
+
+        try:
+            X = batch.parts[0] if n_requests == 1 else np.concatenate(batch.parts, axis=0)
+            result = await self._run(batch.contexts, X)
+        except Exception as e:
+            if n_requests == 1:
+                if not batch.futures[0].done():
+                    batch.futures[0].set_exception(e)
+                return
+            # The error may belong to a single caller (bad vectors, unusable model bytes)
+            logger.warning(f"Micro-batching: coalesced transform of {n_requests} requests failed ({str(e)}), retrying them one by one")
+            with self._lock:
+                self._split_batches += 1
+            await asyncio.gather(*(
+                self._execute_one(context, part, future, wait_ms)
+                for context, part, future, wait_ms in zip(batch.contexts, batch.parts, batch.futures, waits)
+            ))
+            return
+
+        if n_requests > 1:
+            logger.info(f"Micro-batching: coalesced {n_requests} transform requests ({batch.rows} rows)")
+
+        start = 0
+        for part, future, wait_ms in zip(batch.parts, batch.futures, waits):
+            stop = start + part.shape[0]
+            if not future.done():
+                future.set_result(BatchSlice(result, start, stop, n_requests, wait_ms))
+            start = stop
+
+    async def _execute_one(self, context: Any, X: np.ndarray, future: asyncio.Future, wait_ms: float) -> None:
+        """Run a single caller of a failed batch on its own"""
+        try:
+            result = await self._run([context], X)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(BatchSlice(result, 0, X.shape[0], 1, wait_ms))
@@ -0,0 +1,310 @@
+"""
+Fitted Model Registry
+V11.0 Cosmos: Server-side cache of fitted UMAP models
+
+Models produced by umap_learning are registered under a content-hash model_id so
+that umap_transform callers can reference them by id instead of re-sending and
+re-unpickling the serialized model on every incremental batch.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+_MODEL_ID_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class FittedModelRegistry:
+    """
+    Bounded in-memory LRU of deserialized fitted models, optionally persisted to local disk.
+
+    Entries are bounded both by count and by the serialized size of the models they hold,
+    plus memory derived from a model that lives as long as it does (account_derived_bytes).
+    When a persist directory is configured, registered models are written there and an
+    in-memory miss falls back to the on-disk copy before reporting a miss.
+
+    The persist directory is bounded by bytes too: once it holds more than max_disk_bytes,
+    the least recently used files are deleted. Files left by a previous process are indexed
+    at startup, oldest first.
+
+    Models registered without their deserialized object (e.g. fitted in a worker process)
+    are kept as bytes and deserialized on first use. A file_loader, when given, loads
+    persisted models from their path instead of from bytes read into memory (e.g. to
+    memory-map compact models).
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[bytes], Any],
+        max_entries: int = 32,
+        max_bytes: int = 512 * 1024 * 1024,
+        persist_dir: Optional[str] = None,
+        file_loader: Optional[Callable[[str], Any]] = None,
+        max_disk_bytes: int = 4 * 1024 * 1024 * 1024,
+    ):
+        self._loader = loader
+        self._file_loader = file_loader
+        self._max_entries = max(1, max_entries)
+        self._max_bytes = max(1, max_bytes)
+        self._persist_dir = persist_dir
+        self._max_disk_bytes = max(1, max_disk_bytes)
+        # model_id -> (model or None, model bytes or None, size_bytes)
+        self._entries: "OrderedDict[str, tuple[Any, Optional[bytes], int]]" = OrderedDict()
+        self._total_bytes = 0
+        # model_id -> bytes charged by account_derived_bytes (included in the entry's size)
+        self._derived_bytes: dict[str, int] = {}
+        # model_id -> file size of persisted models, least recently used first
+        self._persisted: "OrderedDict[str, int]" = OrderedDict()
+        self._persisted_bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._disk_evictions = 0
+
+        if self._persist_dir:
+            os.makedirs(self._persist_dir, exist_ok=True)
+            self._index_persist_dir(self._persist_dir)
+
+    @staticmethod
+    def compute_model_id(model_bytes: bytes) -> str:
+        """Content hash used as the model_id"""
+        return hashlib.sha256(model_bytes).hexdigest()
+
+    def register(self, model_bytes: bytes, model: Any = None) -> str:
+        """
+        Register a serialized model and return its model_id.
+
+        If the deserialized model is already at hand (e.g. right after fitting) it is
+        stored directly, otherwise the bytes are kept and deserialized on first get().
+        """
+        model_id = self.compute_model_id(model_bytes)
+        with self._lock:
+            if model_id in self._entries:
+                self._entries.move_to_end(model_id)
+                return model_id
+
+        self._persist(model_id, model_bytes)
+        self._insert(model_id, model, len(model_bytes), None if model is not None else model_bytes)
+        return model_id
+
+    def get(self, model_id: str) -> Optional[Any]:
+        """Return the deserialized model for model_id, or None on a cache miss"""
+        with self._lock:
+            entry = self._entries.get(model_id)
+            if entry is not None:
+                self._entries.move_to_end(model_id)
+                self._hits += 1
+        if entry is not None:
+            model, pending_bytes, size_bytes = entry
+            if model is None and pending_bytes is not None:
+                # Lazily registered entry: deserialize once and drop the bytes
+                model = self._loader(pending_bytes)
+                with self._lock:
+                    if model_id in self._entries:
+                        self._entries[model_id] = (model, None, size_bytes)
+            return model
+
+        loaded = self._load_persisted(model_id)
+        if loaded is None:
+            with self._lock:
+                self._misses += 1
+            return None
+
+        # Disk hit: repopulate memory so subsequent calls skip deserialization
+        model, size_bytes = loaded
+        self._insert(model_id, model, size_bytes)
+        with self._lock:
+            self._hits += 1
+        return model
+
+    def get_or_register(self, model_id: Optional[str], model_bytes: Optional[bytes]) -> tuple[Optional[str], Any, bool]:
+        """
+        Resolve a model from its id, falling back to the serialized bytes on a miss.
+
+        Returns:
+            (model_id, model, cache_hit) - model is None if neither source resolved
+        """
+        if model_id:
+            model = self.get(model_id)
+            if model is not None:
+                return model_id, model, True
+        elif model_bytes:
+            # Callers sending only bytes still benefit when the same model was seen before
+            candidate_id = self.compute_model_id(model_bytes)
+            model = self.get(candidate_id)
+            if model is not None:
+                return candidate_id, model, True
+
+        if not model_bytes:
+            return model_id, None, False
+
+        model = self._loader(model_bytes)
+        registered_id = self.register(model_bytes, model)
+        if model_id and model_id != registered_id:
+            logger.warning(f"Model registry: supplied model_id {model_id[:12]} does not match content hash {registered_id[:12]}")
+        return registered_id, model, False
+
+    def account_derived_bytes(self, model_id: str, model: Any, nbytes: int) -> None:
+        """
+        Charge memory derived from a registered model to its entry, e.g. the NumPy transform
+        engine's normalized training copy, which is cached for as long as the model object
+        is alive. nbytes is the model's derived total so far; charging it may evict older
+        entries. Ignored if the entry no longer holds this model object.
+        """
+        with self._lock:
+            entry = self._entries.get(model_id)
+            if entry is None or entry[0] is not model:
+                return
+            delta = nbytes - self._derived_bytes.get(model_id, 0)
+            if delta <= 0:
+                return
+            self._derived_bytes[model_id] = nbytes
+            self._entries[model_id] = (entry[0], entry[1], entry[2] + delta)
+            self._total_bytes += delta
+            self._evict_locked()
+
+    def stats(self) -> dict:
+        """Cache counters for health and diagnostics"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "total_bytes": self._total_bytes,
+                "derived_bytes": sum(self._derived_bytes.values()),
+                "max_entries": self._max_entries,
+                "max_bytes": self._max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "persist_dir": self._persist_dir,
+                "persisted_entries": len(self._persisted),
+                "persisted_bytes": self._persisted_bytes,
+                "max_disk_bytes": self._max_disk_bytes,
+                "disk_evictions": self._disk_evictions,
+            }
+
+    def _insert(self, model_id: str, model: Any, size_bytes: int, model_bytes: Optional[bytes] = None) -> None:
+        with self._lock:
+            if model_id in self._entries:
+                self._entries.move_to_end(model_id)
+                return
+            self._entries[model_id] = (model, model_bytes, size_bytes)
+            self._total_bytes += size_bytes
+            self._evict_locked()
+
+    def _evict_locked(self) -> None:
+        # Always keep the newest entry, even if it alone exceeds the byte bound
+        while len(self._entries) > 1 and (
+            len(self._entries) > self._max_entries or self._total_bytes > self._max_bytes
+        ):
+            evicted_id, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._derived_bytes.pop(evicted_id, None)
+            self._total_bytes -= evicted_size
+            self._evictions += 1
+            logger.info(f"Model registry: evicted {evicted_id[:12]} ({evicted_size} bytes)")
+
+    def _model_path(self, model_id: str) -> Optional[str]:
+        # model_id comes from clients, so only accept well-formed content hashes as file names
+        if not self._persist_dir or not _MODEL_ID_PATTERN.match(model_id):
+            return None
+        return os.path.join(self._persist_dir, f"{model_id}.model")
+
+    def _persist(self, model_id: str, model_bytes: bytes) -> None:
+        path = self._model_path(model_id)
+        if path is None:
+            return
+        if os.path.exists(path):
+            self._touch_persisted(model_id, path)
+            return
+        try:
+            # Write-then-rename so concurrent readers never see a partial file
+            tmp_path = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+            with open(tmp_path, "wb") as f:
+                f.write(model_bytes)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Model registry: failed to persist {model_id[:12]}: {str(e)}")
+            return
+        self._track_persisted(model_id, len(model_bytes))
+
+    def _track_persisted(self, model_id: str, size_bytes: int) -> None:
+        """Record a persisted file as the most recently used one"""
+        with self._lock:
+            if model_id in self._persisted:
+                self._persisted_bytes -= self._persisted.pop(model_id)
+            self._persisted[model_id] = size_bytes
+            self._persisted_bytes += size_bytes
+        self._evict_persisted()
+
+    def _touch_persisted(self, model_id: str, path: str) -> None:
+        """Mark a persisted file as recently used (in the index, and by mtime for the next process)"""
+        with self._lock:
+            tracked = model_id in self._persisted
+            if tracked:
+                self._persisted.move_to_end(model_id)
+        try:
+            os.utime(path)
+            if not tracked:
+                # Written by another process sharing the directory
+                self._track_persisted(model_id, os.path.getsize(path))
+        except OSError:
+            pass
+
+    def _evict_persisted(self) -> None:
+        """Delete the least recently used files while the directory exceeds max_disk_bytes"""
+        removed = []
+        with self._lock:
+            # Always keep the newest file, even if it alone exceeds the bound
+            while len(self._persisted) > 1 and self._persisted_bytes > self._max_disk_bytes:
+                removed_id, removed_size = self._persisted.popitem(last=False)
+                self._persisted_bytes -= removed_size
+                self._disk_evictions += 1
+                removed.append(removed_id)
+        for removed_id in removed:
+            path = self._model_path(removed_id)
+            if path is None:
+                continue
+            try:
+                os.remove(path)
+                logger.info(f"Model registry: deleted persisted {removed_id[:12]}")
+            except OSError:
+                pass
+
+    def _index_persist_dir(self, persist_dir: str) -> None:
+        """Pick up models persisted by a previous process, least recently used first"""
+        persisted = []
+        for name in os.listdir(persist_dir):
+            model_id, extension = os.path.splitext(name)
+            if extension != ".model" or not _MODEL_ID_PATTERN.match(model_id):
+                continue
+            try:
+                stat = os.stat(os.path.join(persist_dir, name))
+            except OSError:
+                continue
+            persisted.append((stat.st_mtime, model_id, stat.st_size))
+        for _, model_id, size in sorted(persisted):
+            self._persisted[model_id] = size
+            self._persisted_bytes += size
+        # The bound may have been lowered since those files were written
+        self._evict_persisted()
+
+    def _load_persisted(self, model_id: str) -> Optional[tuple[Any, int]]:
+        path = self._model_path(model_id)
+        if path is None or not os.path.exists(path):
+            return None
+        self._touch_persisted(model_id, path)
+        try:
+            if self._file_loader is not None:
+                return self._file_loader(path), os.path.getsize(path)
+            with open(path, "rb") as f:
+                model_bytes = f.read()
+        except OSError as e:
+            logger.warning(f"Model registry: failed to read {model_id[:12]}: {str(e)}")
+            return None
+        return self._loader(model_bytes), len(model_bytes)
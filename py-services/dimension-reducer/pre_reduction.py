@@ -0,0 +1,161 @@
+"""
+Dimensionality Pre-Reduction
+V11.0 Cosmos: Project embeddings to a few dozen dimensions before UMAP
+
+kNN construction, the UMAP fit and the stored model all scale with the embedding width
+(768 or 1536 dims). A randomized PCA or sparse random projection to 32-128 dims keeps
+cosine neighbourhoods largely intact at a fraction of the cost. Both are linear maps, so
+the fitted projector is kept as a mean vector and a component matrix, stored with the
+model and applied in umap_transform before any neighbour search.
+"""
+
+import logging
+import time
+from typing import Any, Optional
+
+import numpy as np
+
+from knn_graph import exact_knn, normalize_rows, row_norms
+
+logger = logging.getLogger(__name__)
+
+PRE_REDUCTION_PCA = "pca"
+PRE_REDUCTION_RANDOM_PROJECTION = "random_projection"
+
+# Rows sampled when measuring neighbourhood preservation
+PRESERVATION_SAMPLE_ROWS = 1000
+# Sampled rows scored per distance block: 64 x 100k rows is a 25 MB block, where all
+# sampled rows at once would take 400 MB
+PRESERVATION_CHUNK_ROWS = 64
+
+
+class PreReducer:
+    """Fitted linear projector: (X - mean) @ components.T"""
+
+    def __init__(self, method: str, components: np.ndarray, mean: Optional[np.ndarray] = None, explained_variance_ratio: Optional[float] = None):
+        self.method = method
+        self.components = np.asarray(components, dtype=np.float32)
+        self.mean = np.asarray(mean, dtype=np.float32) if mean is not None else None
+        self.explained_variance_ratio = explained_variance_ratio
+
+    @property
+    def input_dimensions(self) -> int:
+        return self.components.shape[1]
+
+    @property
+    def output_dimensions(self) -> int:
+        return self.components.shape[0]
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        if X.shape[1] != self.input_dimensions:
+            raise ValueError(f"Pre-reduction expects {self.input_dimensions}D vectors, got {X.shape[1]}D")
+        if self.mean is not None:
+            X = X - self.mean
+        return X @ self.components.T
+
+    def matches(self, method: str, input_dimensions: int, output_dimensions: int) -> bool:
+        return self.method == method and self.input_dimensions == input_dimensions and self.output_dimensions == output_dimensions
+
+
+class PreReducedUMAP:
+    """
+    A fitted umap.UMAP whose input is pre-reduced.
+
+    transform() projects new vectors first; every other attribute is the wrapped reducer's,
+    so the wrapper can stand in for the reducer wherever a fitted model is expected.
+    """
+
+    def __init__(self, pre_reducer: PreReducer, reducer: Any):
+        self.pre_reducer = pre_reducer
+        self.reducer = reducer
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        return self.reducer.transform(self.pre_reducer.transform(X))
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes not found on the wrapper itself
+        if name in ("pre_reducer", "reducer"):
+            raise AttributeError(name)
+        return getattr(self.reducer, name)
+
+
+def fit_pre_reducer(X: np.ndarray, method: str, n_components: int, random_state: Optional[int] = None) -> PreReducer:
+    """Fit a randomized PCA or sparse random projection of X to n_components dims"""
+    n_components = min(n_components, X.shape[1], X.shape[0])
+
+    if method == PRE_REDUCTION_PCA:
+        from sklearn.decomposition import PCA
+
+        pca = PCA(n_components=n_components, svd_solver="randomized", random_state=random_state)
+        pca.fit(X)
+        return PreReducer(method, np.asarray(pca.components_), pca.mean_, float(np.sum(pca.explained_variance_ratio_)))
+
+    if method == PRE_REDUCTION_RANDOM_PROJECTION:
+        from sklearn.random_projection import SparseRandomProjection
+
+        # pyright infers n_components: str from sklearn's "auto" default
+        projection = SparseRandomProjection(n_components=n_components, random_state=random_state)  # pyright: ignore[reportArgumentType]
+        projection.fit(X)
+        components = projection.components_
+        if hasattr(components, "toarray"):
+            components = components.toarray()
+        return PreReducer(method, components)
+
+    raise ValueError(f"Unknown pre-reduction method: {method}")
+
+
+def pre_reduce(X: np.ndarray, method: str, n_components: int, random_state: Optional[int] = None, previous: Optional[PreReducer] = None) -> tuple[np.ndarray, PreReducer, dict]:
+    """
+    Project X, reusing a previous projector of the same configuration when given.
+
+    Reusing the projector across refits keeps the reduced space stable, which is what
+    lets the incremental kNN graph recognise unchanged nodes.
+
+    Returns:
+        (X_reduced, pre_reducer, stats)
+    """
+    start = time.perf_counter()
+    if previous is not None and previous.matches(method, X.shape[1], min(n_components, X.shape[1], X.shape[0])):
+        pre_reducer, reused = previous, True
+    else:
+        pre_reducer, reused = fit_pre_reducer(X, method, n_components, random_state), False
+    X_reduced = pre_reducer.transform(X)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    stats = {
+        "method": method,
+        "input_dimensions": int(X.shape[1]),
+        "output_dimensions": pre_reducer.output_dimensions,
+        "projector_reused": reused,
+        "fit_ms": round(elapsed_ms, 2),
+        "explained_variance_ratio": pre_reducer.explained_variance_ratio,
+    }
+    return X_reduced, pre_reducer, stats
+
+
+def neighbourhood_preservation(X: np.ndarray, X_reduced: np.ndarray, k: int, random_state: Optional[int] = None) -> float:
+    """
+    Mean fraction of each sampled row's k cosine neighbours in X that are still among its
+    k neighbours in X_reduced (1.0 = neighbourhoods fully preserved).
+    """
+    n_samples = X.shape[0]
+    k = min(k, n_samples - 1)
+    if k < 1:
+        return 1.0
+
+    rng = np.random.default_rng(random_state)
+    sample = rng.choice(n_samples, size=min(PRESERVATION_SAMPLE_ROWS, n_samples), replace=False)
+
+    # Only the sampled rows are normalized; the data is scaled by its row norms one
+    # distance block at a time rather than copied whole
+    # k + 1 neighbours include the row itself, which is dropped on both sides
+    original, _ = exact_knn(normalize_rows(X[sample]), X, k + 1, chunk_rows=PRESERVATION_CHUNK_ROWS, data_norms=row_norms(X))
+    reduced, _ = exact_knn(normalize_rows(X_reduced[sample]), X_reduced, k + 1, chunk_rows=PRESERVATION_CHUNK_ROWS, data_norms=row_norms(X_reduced))
+
+    overlaps = []
+    for row, original_row, reduced_row in zip(sample, original, reduced):
+        original_set = set(original_row.tolist()) - {row}
+        reduced_set = set(reduced_row.tolist()) - {row}
+        overlaps.append(len(original_set & reduced_set) / max(1, len(original_set)))
+    return float(np.mean(overlaps))
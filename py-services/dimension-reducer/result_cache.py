@@ -0,0 +1,199 @@
+"""
+Reduction Result Cache
+V11.0 Cosmos: Content-addressed cache for idempotent /reduce retries
+
+GraphProjectionWorker retries /reduce on client-side timeouts and re-runs forced UMAP
+learning on unchanged data. Reductions are deterministic for a fixed random_state, so
+results are cached under a hash of the vector buffer, the method, every reduction
+parameter and the model identity. The in-memory tier is an LRU bounded by bytes; evicted
+entries can spill to a local directory (itself bounded by bytes) instead of being dropped.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_KEY_PATTERN_LENGTH = 64
+# Hash the vector buffer in slices so memory-mapped inputs are streamed, not loaded
+_HASH_CHUNK_ROWS = 65536
+
+
+def compute_result_key(X: np.ndarray, parameters: dict, model_bytes: Optional[bytes] = None) -> str:
+    """sha256 over the vectors (dtype, shape and data), the canonical parameters and the model bytes"""
+    digest = hashlib.sha256()
+    digest.update(f"{X.dtype.str}:{X.shape}".encode("utf-8"))
+    for start in range(0, X.shape[0], _HASH_CHUNK_ROWS):
+        digest.update(np.ascontiguousarray(X[start:start + _HASH_CHUNK_ROWS]).tobytes())
+    digest.update(json.dumps(parameters, sort_keys=True, default=str).encode("utf-8"))
+    if model_bytes:
+        digest.update(hashlib.sha256(model_bytes).digest())
+    return digest.hexdigest()
+
+
+class ReductionResultCache:
+    """
+    Bytes-bounded LRU of /reduce response data with optional disk spill.
+
+    Args:
+        max_bytes: Bound on the estimated size of in-memory entries
+        spill_dir: Directory receiving entries evicted from memory (None disables spilling)
+        max_spill_bytes: Bound on the total size of spilled files
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, spill_dir: Optional[str] = None, max_spill_bytes: int = 2 * 1024 * 1024 * 1024):
+        self._max_bytes = max(1, max_bytes)
+        # "" disables spilling, like None
+        self._spill_dir = spill_dir or ""
+        self._max_spill_bytes = max(0, max_spill_bytes)
+        self._entries: "OrderedDict[str, tuple[dict, int]]" = OrderedDict()
+        self._spilled: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._spilled_bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        if self._spill_dir:
+            os.makedirs(self._spill_dir, exist_ok=True)
+            self._index_spill_dir()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[0]
+            spilled = key in self._spilled
+
+        if spilled:
+            response_data = self._read_spilled(key)
+            if response_data is not None:
+                with self._lock:
+                    self._hits += 1
+                    self._disk_hits += 1
+                self.put(key, response_data)
+                return response_data
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def put(self, key: str, response_data: dict) -> None:
+        size_bytes = _estimate_size(response_data)
+        evicted = []
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+            self._entries[key] = (response_data, size_bytes)
+            self._total_bytes += size_bytes
+            # Always keep the newest entry, even if it alone exceeds the bound
+            while len(self._entries) > 1 and self._total_bytes > self._max_bytes:
+                evicted_key, (evicted_data, evicted_size) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_size
+                self._evictions += 1
+                evicted.append((evicted_key, evicted_data))
+
+        for evicted_key, evicted_data in evicted:
+            self._spill(evicted_key, evicted_data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "total_bytes": self._total_bytes,
+                "max_bytes": self._max_bytes,
+                "spilled_entries": len(self._spilled),
+                "spilled_bytes": self._spilled_bytes,
+                "spill_dir": self._spill_dir or None,
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+            }
+
+    def _spill_path(self, key: str) -> str:
+        return os.path.join(self._spill_dir, f"{key}.result")
+
+    def _spill(self, key: str, response_data: dict) -> None:
+        if not self._spill_dir or self._max_spill_bytes == 0:
+            return
+        path = self._spill_path(key)
+        try:
+            payload = pickle.dumps(response_data, protocol=pickle.HIGHEST_PROTOCOL)
+            # Write-then-rename so concurrent readers never see a partial file
+            tmp_path = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except (OSError, pickle.PicklingError) as e:
+            logger.warning(f"Result cache: failed to spill {key[:12]}: {str(e)}")
+            return
+
+        removed = []
+        with self._lock:
+            if key in self._spilled:
+                self._spilled_bytes -= self._spilled.pop(key)
+            self._spilled[key] = len(payload)
+            self._spilled_bytes += len(payload)
+            while len(self._spilled) > 1 and self._spilled_bytes > self._max_spill_bytes:
+                removed_key, removed_size = self._spilled.popitem(last=False)
+                self._spilled_bytes -= removed_size
+                removed.append(removed_key)
+        for removed_key in removed:
+            try:
+                os.remove(self._spill_path(removed_key))
+            except OSError:
+                pass
+
+    def _read_spilled(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._spill_path(key), "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            logger.warning(f"Result cache: failed to read spilled {key[:12]}: {str(e)}")
+            with self._lock:
+                if key in self._spilled:
+                    self._spilled_bytes -= self._spilled.pop(key)
+            return None
+
+    def _index_spill_dir(self) -> None:
+        """Pick up entries spilled by a previous process, oldest first"""
+        spilled = []
+        for name in os.listdir(self._spill_dir):
+            key, extension = os.path.splitext(name)
+            if extension != ".result" or len(key) != _KEY_PATTERN_LENGTH:
+                continue
+            try:
+                stat = os.stat(os.path.join(self._spill_dir, name))
+            except OSError:
+                continue
+            spilled.append((stat.st_mtime, key, stat.st_size))
+        for _, key, size in sorted(spilled):
+            self._spilled[key] = size
+            self._spilled_bytes += size
+
+
+def _estimate_size(response_data: dict) -> int:
+    """Approximate retained size: array and bytes payloads plus a flat allowance for metadata"""
+    size = 1024
+    for value in response_data.values():
+        if isinstance(value, np.ndarray):
+            size += value.nbytes
+        elif isinstance(value, (bytes, bytearray)):
+            size += len(value)
+        elif isinstance(value, list):
+            size += 32 * len(value)
+    return size
@@ -0,0 +1,251 @@
+"""
+Streaming Transform Transport
+V11.0 Cosmos: Chunked request and response bodies for /reduce/stream
+
+A backfill of tens of thousands of nodes through umap_transform used to travel as one JSON
+document each way, so both sides held every vector and every coordinate at once and the
+client saw nothing until the whole batch was done. /reduce/stream reads vectors as they
+arrive, transforms them chunk_rows at a time and writes each chunk's coordinates back
+before reading further. Two body formats are accepted, and the response uses the same one:
+
+NDJSON (application/x-ndjson), one JSON value per line:
+
+    {"model_id": "...", "transform_engine": "auto", ...}     first line: request fields
+    [0.12, -0.03, ...]                                         a vector
+    {"vector": [0.12, ...], "node_id": "n1"}                   a vector with its node id
+    {"vectors": [[...], ...], "node_ids": ["n2", ...]}         a block of vectors
+
+Length-prefixed frames (application/x-2d1l-frames), each a little-endian uint32 byte length
+followed by a msgpack map; the first frame holds the request fields (the model as raw bytes),
+every other frame a block of vectors as an array envelope (see wire_format.py):
+
+    {"vectors": {"dtype": "float32", "shape": [n, d], "data": <bytes>}, "node_ids": [...]}
+"""
+
+import json
+import logging
+import struct
+from typing import Any, AsyncIterator, List, Optional
+
+import numpy as np
+
+from wire_format import MSGPACK_AVAILABLE, WireFormatError, decode_array, encode_reduce_response, msgpack
+
+logger = logging.getLogger(__name__)
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+FRAMES_CONTENT_TYPE = "application/x-2d1l-frames"
+
+STREAM_FORMAT_NDJSON = "ndjson"
+STREAM_FORMAT_FRAMES = "frames"
+
+_FRAME_LENGTH = struct.Struct("<I")
+
+
+class StreamFormatError(ValueError):
+    """Raised when a streamed body cannot be decoded"""
+
+
+def stream_format(content_type: Optional[str]) -> Optional[str]:
+    """Stream format designated by a Content-Type header value, or None if not a streaming type"""
+    if not content_type:
+        return None
+    if FRAMES_CONTENT_TYPE in content_type:
+        return STREAM_FORMAT_FRAMES
+    if NDJSON_CONTENT_TYPE in content_type or "application/jsonl" in content_type:
+        return STREAM_FORMAT_NDJSON
+    return None
+
+
+def stream_media_type(format_name: str) -> str:
+    return FRAMES_CONTENT_TYPE if format_name == STREAM_FORMAT_FRAMES else NDJSON_CONTENT_TYPE
+
+
+async def iter_messages(body: AsyncIterator[bytes], format_name: str, max_message_bytes: int) -> AsyncIterator[Any]:
+    """
+    Split a streamed body into decoded messages (NDJSON values or msgpack frame maps).
+
+    Only the message being assembled is buffered, so memory is bounded by max_message_bytes
+    plus one network chunk, whatever the length of the stream.
+    """
+    if format_name == STREAM_FORMAT_FRAMES and not MSGPACK_AVAILABLE:
+        raise StreamFormatError("msgpack not available on this server")
+
+    buffer = bytearray()
+    async for chunk in body:
+        buffer.extend(chunk)
+        offset = 0
+        if format_name == STREAM_FORMAT_FRAMES:
+            while len(buffer) - offset >= _FRAME_LENGTH.size:
+                (length,) = _FRAME_LENGTH.unpack_from(buffer, offset)
+                if length > max_message_bytes:
+                    raise StreamFormatError(f"Frame of {length} bytes exceeds the {max_message_bytes} byte limit")
+                end = offset + _FRAME_LENGTH.size + length
+                if len(buffer) < end:
+                    break
+                yield _unpack_frame(bytes(buffer[offset + _FRAME_LENGTH.size:end]))
+                offset = end
+        else:
+            while True:
+                newline = buffer.find(b"\n", offset)
+                if newline < 0:
+                    break
+                line = bytes(buffer[offset:newline])
+                offset = newline + 1
+                if line.strip():
+                    yield _parse_line(line)
+        del buffer[:offset]
+        if len(buffer) > max_message_bytes + _FRAME_LENGTH.size:
+            raise StreamFormatError(f"Message exceeds the {max_message_bytes} byte limit")
+
+    if format_name == STREAM_FORMAT_FRAMES:
+        if buffer:
+            raise StreamFormatError(f"Stream ended inside a frame ({len(buffer)} trailing bytes)")
+    elif buffer.strip():
+        # The last line doesn't need a trailing newline
+        yield _parse_line(bytes(buffer))
+
+
+async def iter_row_chunks(messages: AsyncIterator[Any], chunk_rows: int) -> AsyncIterator[tuple[np.ndarray, Optional[List[str]]]]:
+    """
+    Regroup the vector messages of a stream into float32 chunks of chunk_rows rows.
+
+    Yields:
+        (X, node_ids) - node_ids is None when the stream carries no node ids; either every
+        vector has a node id or none does
+    """
+    chunker = _RowChunker(chunk_rows)
+    async for message in messages:
+        for chunk in chunker.add(message):
+            yield chunk
+    for chunk in chunker.finish():
+        yield chunk
+
+
+def encode_message(message: dict, format_name: str) -> bytes:
+    """Encode one response message (ndarray values as lists in NDJSON, as array envelopes in frames)"""
+    if format_name == STREAM_FORMAT_FRAMES:
+        payload = encode_reduce_response(message)
+        return _FRAME_LENGTH.pack(len(payload)) + payload
+    json_message = {key: value.tolist() if isinstance(value, np.ndarray) else value for key, value in message.items()}
+    return json.dumps(json_message, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+class _RowChunker:
+    def __init__(self, chunk_rows: int):
+        self.chunk_rows = max(1, chunk_rows)
+        # Single NDJSON vectors are collected as lists and converted once per chunk
+        self._row_buffer: list = []
+        self._row_node_ids: list = []
+        self._blocks: List[np.ndarray] = []
+        self._block_node_ids: list = []
+        # Rows held in _blocks (the row buffer never reaches chunk_rows)
+        self._pending_rows = 0
+        self._has_node_ids: Optional[bool] = None
+        self._dimensions: Optional[int] = None
+
+    def add(self, message: Any) -> list:
+        if isinstance(message, list):
+            self._add_row(message, None)
+        elif isinstance(message, dict) and "vector" in message:
+            self._add_row(message["vector"], message.get("node_id"))
+        elif isinstance(message, dict) and "vectors" in message:
+            self._add_block(message["vectors"], message.get("node_ids"))
+        else:
+            raise StreamFormatError("Stream messages after the first must be a vector, {vector, node_id} or {vectors, node_ids}")
+        return self._drain(final=False)
+
+    def finish(self) -> list:
+        return self._drain(final=True)
+
+    def _add_row(self, vector: Any, node_id: Optional[str]) -> None:
+        self._check_node_ids(node_id is not None)
+        self._row_buffer.append(vector)
+        self._row_node_ids.append(node_id)
+        if len(self._row_buffer) >= self.chunk_rows:
+            self._flush_rows()
+
+    def _add_block(self, vectors: Any, node_ids: Optional[list]) -> None:
+        try:
+            X = decode_array(vectors) if isinstance(vectors, dict) else np.array(vectors, dtype=np.float32)
+        except WireFormatError as e:
+            raise StreamFormatError(str(e))
+        except (ValueError, TypeError) as e:
+            raise StreamFormatError(f"Invalid vector format: {str(e)}")
+        if X.ndim != 2:
+            raise StreamFormatError("Vector blocks must be 2-dimensional")
+        self._check_node_ids(node_ids is not None)
+        if node_ids is not None and len(node_ids) != X.shape[0]:
+            raise StreamFormatError(f"node_ids has {len(node_ids)} entries for {X.shape[0]} vectors")
+        # Keep rows in arrival order around any single vectors received so far
+        self._flush_rows()
+        self._append_block(X, node_ids)
+
+    def _flush_rows(self) -> None:
+        if not self._row_buffer:
+            return
+        try:
+            X = np.array(self._row_buffer, dtype=np.float32)
+        except (ValueError, TypeError) as e:
+            raise StreamFormatError(f"Invalid vector format: {str(e)}")
+        if X.ndim != 2:
+            raise StreamFormatError("Vectors must be flat lists of numbers of equal length")
+        node_ids = self._row_node_ids if self._has_node_ids else None
+        self._row_buffer, self._row_node_ids = [], []
+        self._append_block(X, node_ids)
+
+    def _append_block(self, X: np.ndarray, node_ids: Optional[list]) -> None:
+        if self._dimensions is None:
+            self._dimensions = X.shape[1]
+        elif X.shape[1] != self._dimensions:
+            raise StreamFormatError(f"Vector dimension changed mid-stream from {self._dimensions} to {X.shape[1]}")
+        self._blocks.append(X)
+        self._block_node_ids.append(node_ids)
+        self._pending_rows += X.shape[0]
+
+    def _check_node_ids(self, has_node_ids: bool) -> None:
+        if self._has_node_ids is None:
+            self._has_node_ids = has_node_ids
+        elif self._has_node_ids != has_node_ids:
+            raise StreamFormatError("Either every vector carries a node id or none does")
+
+    def _drain(self, final: bool) -> list:
+        if final:
+            self._flush_rows()
+        chunks = []
+        while self._blocks and (self._pending_rows >= self.chunk_rows or final):
+            take = min(self.chunk_rows, self._pending_rows)
+            parts, node_id_parts = [], []
+            while take > 0:
+                block, block_node_ids = self._blocks[0], self._block_node_ids[0]
+                if block.shape[0] <= take:
+                    self._blocks.pop(0)
+                    self._block_node_ids.pop(0)
+                    parts.append(block)
+                    node_id_parts.append(block_node_ids)
+                    take -= block.shape[0]
+                else:
+                    parts.append(block[:take])
+                    node_id_parts.append(block_node_ids[:take] if block_node_ids is not None else None)
+                    self._blocks[0] = block[take:]
+                    self._block_node_ids[0] = block_node_ids[take:] if block_node_ids is not None else None
+                    take = 0
+            X = parts[0] if len(parts) == 1 else np.concatenate(parts, axis=0)
+            self._pending_rows -= X.shape[0]
+            node_ids = [node_id for part in node_id_parts for node_id in part] if self._has_node_ids else None
+            chunks.append((X, node_ids))
+        return chunks
+
+
+def _parse_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        raise StreamFormatError(f"Invalid NDJSON line: {str(e)}")
+
+
+def _unpack_frame(frame: bytes) -> Any:
+    try:
+        return msgpack.unpackb(frame, raw=False)
+    except Exception as e:
+        raise StreamFormatError(f"Invalid msgpack frame: {str(e)}")
@@ -0,0 +1,61 @@
+"""
+Shared pytest setup for the dimension-reducer service tests.
+
+The service modules live next to app.py rather than in a package, so the service
+directory is put on sys.path here. Kernel warm-up is disabled so importing app does
+not spend its startup compiling numba kernels.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+os.environ.setdefault("REDUCER_WARMUP", "false")
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SERVICE_DIR not in sys.path:
+    sys.path.insert(0, SERVICE_DIR)
+
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient over the service app, started once for the whole session"""
+    from fastapi.testclient import TestClient
+
+    import app
+
+    with TestClient(app.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def clustered_vectors():
+    """400 vectors in four well-separated clusters: (vectors, cluster labels)"""
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(4, 32)) * 4
+    labels = rng.integers(0, 4, 400)
+    vectors = (centers[labels] + rng.normal(size=(400, 32))).astype(np.float32)
+    return vectors, labels
+
+
+@pytest.fixture(scope="session")
+def fitted_umap(clustered_vectors):
+    """Seeded cosine UMAP fitted on the first 300 clustered vectors (fitted once, numba compiles are slow)"""
+    import umap
+
+    vectors, _ = clustered_vectors
+    return umap.UMAP(n_neighbors=15, metric="cosine", random_state=42, n_epochs=100, n_jobs=1).fit(vectors[:300])
+
+
+def nearest_cluster_agreement(coordinates: np.ndarray, reducer, labels: np.ndarray) -> float:
+    """Share of placed rows whose nearest training point in the layout has their own cluster label"""
+    training_labels, placed_labels = labels[:reducer.embedding_.shape[0]], labels[reducer.embedding_.shape[0]:]
+    sq_dists = ((coordinates[:, None, :] - reducer.embedding_[None, :, :]) ** 2).sum(axis=-1)
+    return float(np.mean(training_labels[sq_dists.argmin(axis=1)] == placed_labels))
+
+
+def layout_spread(reducer) -> float:
+    """Diagonal of the training layout's bounding box"""
+    return float(np.linalg.norm(np.ptp(reducer.embedding_, axis=0)))
@@ -0,0 +1,163 @@
+"""Admission control: per-method queues, timeouts, slot hand-over and the memory budget"""
+
+import asyncio
+
+import pytest
+
+from admission import AdmissionController, AdmissionRejected, MethodLimit, estimate_memory_bytes
+
+
+def _controller(max_concurrent: int = 1, max_queue: int = 2, **kwargs) -> AdmissionController:
+    return AdmissionController({"umap_learning": MethodLimit(max_concurrent, max_queue)}, MethodLimit(4, 4), **kwargs)
+
+
+def _method_stats(controller: AdmissionController, method: str = "umap_learning") -> dict:
+    return controller.stats()["methods"][method]
+
+
+def test_release_hands_slots_to_waiters_in_fifo_order():
+    async def main():
+        controller = _controller()
+        order = []
+        first = await controller.acquire("umap_learning")
+
+        async def wait_turn(name):
+            ticket = await controller.acquire("umap_learning")
+            order.append(name)
+            return ticket
+
+        waiters = [asyncio.create_task(wait_turn(name)) for name in ("second", "third")]
+        await asyncio.sleep(0)
+        assert _method_stats(controller)["queued"] == 2
+
+        first.release()
+        second = await waiters[0]
+        # The slot moved to the waiter without ever being free
+        assert _method_stats(controller)["in_flight"] == 1
+        assert not waiters[1].done()
+
+        second.release()
+        (await waiters[1]).release()
+        assert order == ["second", "third"]
+        assert _method_stats(controller)["in_flight"] == 0
+        assert _method_stats(controller)["admitted"] == 3
+
+    asyncio.run(main())
+
+
+def test_full_queue_is_rejected_with_429():
+    async def main():
+        controller = _controller(max_queue=1)
+        running = await controller.acquire("umap_learning")
+        queued = asyncio.create_task(controller.acquire("umap_learning"))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("umap_learning")
+        assert rejected.value.status_code == 429
+        assert rejected.value.retry_after_seconds == 5
+
+        running.release()
+        (await queued).release()
+        assert _method_stats(controller)["rejected_queue_full"] == 1
+
+    asyncio.run(main())
+
+
+def test_wait_times_out_with_503_and_leaves_the_queue():
+    async def main():
+        controller = _controller(max_wait_seconds=0.01)
+        running = await controller.acquire("umap_learning", estimated_bytes=100)
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("umap_learning", estimated_bytes=50)
+        assert rejected.value.status_code == 503
+
+        stats = _method_stats(controller)
+        assert (stats["queued"], stats["in_flight"], stats["rejected_timeout"]) == (0, 1, 1)
+        assert controller.stats()["reserved_memory_bytes"] == 100
+        running.release()
+        assert controller.stats()["reserved_memory_bytes"] == 0
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def main():
+        controller = _controller()
+        running = await controller.acquire("umap_learning")
+        waiter = asyncio.create_task(controller.acquire("umap_learning"))
+        await asyncio.sleep(0)
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        running.release()
+        running.release()
+
+        assert _method_stats(controller)["in_flight"] == 0
+        (await controller.acquire("umap_learning")).release()
+
+    asyncio.run(main())
+
+
+def test_methods_queue_independently():
+    async def main():
+        controller = _controller(max_queue=0)
+        fit = await controller.acquire("umap_learning")
+        # Transforms use the default limit and never wait behind fits
+        transforms = [await controller.acquire("umap_transform") for _ in range(4)]
+        with pytest.raises(AdmissionRejected):
+            await controller.acquire("umap_learning")
+        for ticket in [fit, *transforms]:
+            ticket.release()
+
+    asyncio.run(main())
+
+
+def test_memory_budget_rejects_but_admits_oversized_requests_alone():
+    async def main():
+        controller = _controller(max_concurrent=4, max_memory_bytes=1000)
+        alone = await controller.acquire("umap_learning", estimated_bytes=5000)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("umap_learning", estimated_bytes=1)
+        assert rejected.value.status_code == 503
+        alone.release()
+
+        first = await controller.acquire("umap_learning", estimated_bytes=600)
+        with pytest.raises(AdmissionRejected):
+            await controller.acquire("umap_learning", estimated_bytes=500)
+        second = await controller.acquire("umap_learning", estimated_bytes=400)
+        assert controller.stats()["reserved_memory_bytes"] == 1000
+        first.release()
+        second.release()
+        assert _method_stats(controller)["rejected_memory"] == 2
+
+    asyncio.run(main())
+
+
+def test_reserve_counts_as_in_flight_and_respects_the_queue_bound():
+    async def main():
+        controller = _controller(max_concurrent=1, max_queue=1)
+        jobs = [controller.reserve("umap_learning"), controller.reserve("umap_learning")]
+        with pytest.raises(AdmissionRejected):
+            controller.reserve("umap_learning")
+
+        # A /reduce caller queues behind the reserved job slots
+        waiter = asyncio.create_task(controller.acquire("umap_learning"))
+        await asyncio.sleep(0)
+        jobs[0].release()
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        jobs[1].release()
+        (await waiter).release()
+        assert _method_stats(controller)["in_flight"] == 0
+
+    asyncio.run(main())
+
+
+def test_memory_estimates_grow_with_input_and_shrink_with_landmarks():
+    assert estimate_memory_bytes("umap_learning", 0, 768) == 0
+    assert estimate_memory_bytes("umap_learning", 20000, 768) > estimate_memory_bytes("umap_learning", 10000, 768)
+    assert estimate_memory_bytes("umap_learning", 100000, 768, landmark_count=5000) < estimate_memory_bytes("umap_learning", 100000, 768)
+    assert estimate_memory_bytes("umap_transform", 1000, 768) < estimate_memory_bytes("umap_learning", 1000, 768)
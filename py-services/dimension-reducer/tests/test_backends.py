@@ -0,0 +1,130 @@
+"""Layout backends: automatic selection, PCA and t-SNE fits, and transform engine resolution"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from backends import (
+    BACKEND_PCA,
+    BACKEND_TSNE,
+    BACKEND_UMAP,
+    LAYOUT_RANGE,
+    PCABackend,
+    TSNEBackend,
+    model_backend,
+    select_backend,
+)
+from conftest import nearest_cluster_agreement
+
+
+def test_small_graphs_only_consider_pca():
+    backend, selection = select_backend(20, 32, 2)
+    assert backend.name == BACKEND_PCA
+    assert selection["candidates"] == [BACKEND_PCA]
+
+
+def test_auto_prefers_quality_without_a_budget_and_speed_within_one():
+    backend, selection = select_backend(5000, 64, 2)
+    assert backend.name == BACKEND_UMAP
+    assert selection["reason"] == "best quality"
+
+    estimates = selection["estimated_fit_ms"]
+    backend, selection = select_backend(5000, 64, 2, time_budget_ms=estimates[BACKEND_PCA] + 0.1)
+    assert backend.name == BACKEND_PCA
+    assert selection["reason"] == "best quality within budget"
+
+    backend, selection = select_backend(5000, 64, 2, time_budget_ms=estimates[BACKEND_PCA] / 2)
+    assert backend.name == BACKEND_PCA
+    assert selection["reason"] == "no backend fits the budget; fastest"
+
+
+def test_cost_scale_moves_the_choice():
+    _, selection = select_backend(5000, 64, 2)
+    budget = selection["estimated_fit_ms"][BACKEND_UMAP] * 1.5
+    assert select_backend(5000, 64, 2, time_budget_ms=budget)[0].name == BACKEND_UMAP
+    assert select_backend(5000, 64, 2, time_budget_ms=budget, cost_scale=4.0)[0].name != BACKEND_UMAP
+
+
+def test_method_auto_fits_with_the_selected_backend(client):
+    vectors = np.random.default_rng(0).normal(size=(30, 16)).tolist()
+    response = client.post("/reduce", json={"vectors": vectors, "method": "auto", "target_dimensions": 2})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["method"] == "umap_learning"
+    assert body["backend"] == BACKEND_PCA
+    assert body["model_metadata"]["backend_selection"]["selected"] == BACKEND_PCA
+    assert body["model_metadata"]["backend_selection"]["requested"] == "auto"
+
+
+def test_pca_layout_transform_reproduces_the_fit(clustered_vectors):
+    vectors, _ = clustered_vectors
+    coordinates, model, parameters = PCABackend().fit(vectors, 3, random_state=0)
+
+    assert coordinates.shape == (400, 3)
+    assert np.max(np.abs(coordinates)) == pytest.approx(LAYOUT_RANGE, rel=1e-5)
+    np.testing.assert_allclose(model.transform(vectors), coordinates, atol=1e-4)
+    assert model_backend(model) == BACKEND_PCA
+    assert parameters["backend"] == BACKEND_PCA
+
+
+def test_pca_layout_pads_missing_axes_with_zeros():
+    vectors = np.random.default_rng(1).normal(size=(3, 8)).astype(np.float32)
+    coordinates, model, _ = PCABackend().fit(vectors, 5, random_state=0)
+    assert coordinates.shape == (3, 5)
+    np.testing.assert_array_equal(coordinates[:, 3:], 0.0)
+    assert model.transform(vectors).shape == (3, 5)
+
+
+def test_tsne_layout_places_new_points_in_their_cluster(clustered_vectors):
+    vectors, labels = clustered_vectors
+    coordinates, model, parameters = TSNEBackend().fit(vectors[:150], 2, random_state=0)
+
+    assert coordinates.shape == (150, 2)
+    assert np.max(np.abs(coordinates)) == pytest.approx(LAYOUT_RANGE, rel=1e-5)
+    assert parameters["backend"] == BACKEND_TSNE
+    assert model_backend(model) == BACKEND_TSNE
+    assert nearest_cluster_agreement(model.transform(vectors[150:]), model, labels) > 0.9
+
+
+def _stub_umap(n_training: int = 300, metric: str = "cosine"):
+    return SimpleNamespace(embedding_=np.zeros((n_training, 2), dtype=np.float32), metric=metric)
+
+
+def test_transform_engine_follows_the_model_backend(clustered_vectors):
+    import app
+
+    vectors, _ = clustered_vectors
+    _, pca_model, _ = PCABackend().fit(vectors[:50], 2, random_state=0)
+    for requested in ("auto", "umap", "numpy"):
+        assert app._select_transform_engine(requested, 10, pca_model) == BACKEND_PCA
+
+
+def test_auto_transform_engine_falls_back_to_umap(monkeypatch):
+    import app
+
+    assert app._select_transform_engine("auto", app.NUMPY_TRANSFORM_MAX_BATCH, _stub_umap()) == "numpy"
+    assert app._select_transform_engine("auto", app.NUMPY_TRANSFORM_MAX_BATCH + 1, _stub_umap()) == "umap"
+    assert app._select_transform_engine("auto", 10, _stub_umap(metric="euclidean")) == "umap"
+    monkeypatch.setattr(app, "NUMPY_TRANSFORM_MAX_TRAINING_ROWS", 299)
+    assert app._select_transform_engine("auto", 10, _stub_umap()) == "umap"
+
+
+def test_explicit_numpy_engine_requires_a_cosine_model():
+    import app
+
+    assert app._select_transform_engine("numpy", 10_000, _stub_umap()) == "numpy"
+    assert app._select_transform_engine("umap", 1, _stub_umap()) == "umap"
+    with pytest.raises(HTTPException) as error:
+        app._select_transform_engine("numpy", 10, _stub_umap(metric="euclidean"))
+    assert error.value.status_code == 400
+
+
+def test_transform_of_a_pca_model_reports_its_engine(client):
+    rng = np.random.default_rng(2)
+    fit = client.post("/reduce", json={"vectors": rng.normal(size=(40, 8)).tolist(), "method": "umap_learning", "backend": "pca", "target_dimensions": 2})
+    assert fit.status_code == 200
+    response = client.post("/reduce", json={"vectors": rng.normal(size=(5, 8)).tolist(), "method": "umap_transform", "model_id": fit.json()["model_id"], "transform_engine": "numpy"})
+    assert response.status_code == 200
+    assert response.json()["transform_engine"] == BACKEND_PCA
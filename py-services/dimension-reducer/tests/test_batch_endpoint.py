@@ -0,0 +1,91 @@
+"""/reduce/batch: groups of different models, per-group error isolation and result order"""
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture(scope="module")
+def batch_models(client, fitted_umap):
+    """(pca model_id, umap model_id) of two models with different backends and widths"""
+    import app
+    import cloudpickle
+
+    rng = np.random.default_rng(5)
+    fit = client.post("/reduce", json={"vectors": rng.normal(size=(60, 12)).tolist(), "method": "umap_learning", "backend": "pca", "target_dimensions": 2})
+    assert fit.status_code == 200
+    umap_model_id = app.model_registry.register(cloudpickle.dumps(fitted_umap), fitted_umap)
+    return fit.json()["model_id"], umap_model_id
+
+
+def _solo_coordinates(client, model_id: str, vectors: list) -> list:
+    response = client.post("/reduce", json={"vectors": vectors, "method": "umap_transform", "model_id": model_id})
+    assert response.status_code == 200
+    return response.json()["coordinates"]
+
+
+def test_groups_of_different_models_match_solo_transforms_in_request_order(client, batch_models, clustered_vectors):
+    pca_model_id, umap_model_id = batch_models
+    vectors, _ = clustered_vectors
+    rng = np.random.default_rng(6)
+    groups = [
+        {"group_id": "pca-a", "model_id": pca_model_id, "vectors": rng.normal(size=(3, 12)).tolist()},
+        {"group_id": "umap-a", "model_id": umap_model_id, "vectors": vectors[300:307].tolist()},
+        {"group_id": "pca-b", "model_id": pca_model_id, "vectors": rng.normal(size=(1, 12)).tolist()},
+        {"model_id": umap_model_id, "vectors": vectors[350:352].tolist()},
+    ]
+
+    response = client.post("/reduce/batch", json={"groups": groups})
+    assert response.status_code == 200
+    body = response.json()
+
+    assert body["n_groups"] == 4 and body["n_failed"] == 0
+    assert body["n_models"] == 2
+    assert body["n_samples"] == 13
+    assert [result["index"] for result in body["results"]] == [0, 1, 2, 3]
+    assert [result["group_id"] for result in body["results"]] == ["pca-a", "umap-a", "pca-b", None]
+    assert [result["result"]["transform_engine"] for result in body["results"]] == ["pca", "numpy", "pca", "numpy"]
+    for group, result in zip(groups, body["results"]):
+        assert result["status"] == "ok" and result["status_code"] == 200
+        assert result["result"]["n_samples"] == len(group["vectors"])
+        np.testing.assert_allclose(result["result"]["coordinates"], _solo_coordinates(client, group["model_id"], group["vectors"]), atol=1e-5)
+
+
+def test_failed_groups_only_fail_themselves(client, batch_models):
+    pca_model_id, _ = batch_models
+    vectors = np.random.default_rng(7).normal(size=(2, 12)).tolist()
+    groups = [
+        {"group_id": "ok-first", "model_id": pca_model_id, "vectors": vectors},
+        {"group_id": "unknown-model", "model_id": "0" * 64, "vectors": vectors},
+        {"group_id": "fit", "method": "umap_learning", "vectors": vectors},
+        {"group_id": "no-model", "vectors": vectors},
+        {"group_id": "invalid-field", "model_id": pca_model_id, "vectors": vectors, "target_dimensions": "three"},
+        {"group_id": "wrong-width", "model_id": pca_model_id, "vectors": [[1.0, 2.0]]},
+        {"group_id": "ok-last", "model_id": pca_model_id, "vectors": vectors},
+    ]
+
+    response = client.post("/reduce/batch", json={"groups": groups})
+    assert response.status_code == 200
+    body = response.json()
+
+    statuses = {result["group_id"]: (result["status"], result["status_code"]) for result in body["results"]}
+    assert statuses["ok-first"] == ("ok", 200)
+    assert statuses["ok-last"] == ("ok", 200)
+    assert statuses["unknown-model"] == ("error", 404)
+    assert statuses["fit"] == ("error", 400)
+    assert statuses["no-model"] == ("error", 400)
+    assert statuses["invalid-field"] == ("error", 422)
+    assert statuses["wrong-width"][0] == "error" and statuses["wrong-width"][1] >= 400
+    assert [result["group_id"] for result in body["results"]] == [group["group_id"] for group in groups]
+    assert body["n_failed"] == 5
+    assert body["n_samples"] == 4
+
+    for result in body["results"]:
+        if result["status"] == "error":
+            assert result["error"] and result["result"] is None
+    expected = _solo_coordinates(client, pca_model_id, vectors)
+    np.testing.assert_allclose(body["results"][0]["result"]["coordinates"], expected, atol=1e-5)
+    np.testing.assert_allclose(body["results"][-1]["result"]["coordinates"], expected, atol=1e-5)
+
+
+def test_empty_batches_are_rejected(client):
+    assert client.post("/reduce/batch", json={"groups": []}).status_code == 400
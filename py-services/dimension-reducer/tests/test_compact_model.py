@@ -0,0 +1,65 @@
+"""Compact transform-only models against the pickled umap.UMAP they were extracted from"""
+
+import cloudpickle
+import numpy as np
+import pytest
+
+from compact_model import CompactModelError, CompactUMAPModel, is_compact_model, load_compact_model, load_compact_model_file
+from conftest import layout_spread, nearest_cluster_agreement
+
+
+@pytest.fixture(scope="module")
+def pickle_transform(fitted_umap, clustered_vectors):
+    vectors, _ = clustered_vectors
+    return cloudpickle.loads(cloudpickle.dumps(fitted_umap)).transform(vectors[300:])
+
+
+def test_neighbours_match_umap_transform_graph(fitted_umap, clustered_vectors):
+    vectors, _ = clustered_vectors
+    compact = CompactUMAPModel.from_umap(fitted_umap, vectors[:300], dtype="float32")
+    indices, _ = compact.nearest_neighbors(vectors[300:])
+
+    fitted_umap.transform_mode = "graph"
+    try:
+        graph = fitted_umap.transform(vectors[300:]).tocsr()
+    finally:
+        fitted_umap.transform_mode = "embedding"
+    expected = np.vstack([np.sort(graph.indices[graph.indptr[i]:graph.indptr[i + 1]]) for i in range(graph.shape[0])])
+    np.testing.assert_array_equal(np.sort(indices, axis=1), expected)
+
+
+@pytest.mark.parametrize("dtype, compress", [("float32", True), ("float16", True), ("float16", False)])
+def test_transform_matches_pickle_transform(fitted_umap, clustered_vectors, pickle_transform, dtype, compress):
+    vectors, labels = clustered_vectors
+    model_bytes = CompactUMAPModel.from_umap(fitted_umap, vectors[:300], dtype=dtype).to_bytes(compress=compress)
+    assert is_compact_model(model_bytes)
+
+    coordinates = load_compact_model(model_bytes).transform(vectors[300:])
+
+    # Both run UMAP's SGD, which amplifies float-level differences in the membership
+    # weights, so placements agree closely rather than bit for bit
+    displacement = np.linalg.norm(coordinates - pickle_transform, axis=1)
+    assert np.median(displacement) < 0.1 * layout_spread(fitted_umap)
+    assert nearest_cluster_agreement(coordinates, fitted_umap, labels) >= 0.95
+
+
+def test_round_trip_keeps_state_and_memory_maps_raw_files(fitted_umap, clustered_vectors, tmp_path):
+    vectors, _ = clustered_vectors
+    compact = CompactUMAPModel.from_umap(fitted_umap, vectors[:300], dtype="float32")
+
+    loaded = load_compact_model(compact.to_bytes())
+    assert loaded.params == compact.params
+    np.testing.assert_array_equal(loaded.training_embeddings, compact.training_embeddings)
+    np.testing.assert_array_equal(loaded.embedding_, compact.embedding_)
+
+    path = tmp_path / "model.compact"
+    path.write_bytes(compact.to_bytes(compress=False))
+    mapped = load_compact_model_file(str(path))
+    np.testing.assert_array_equal(mapped.embedding_, compact.embedding_)
+    np.testing.assert_array_equal(mapped.transform(vectors[300:310]), loaded.transform(vectors[300:310]))
+
+
+def test_rejects_foreign_buffers():
+    assert not is_compact_model(b"\x80\x05not a compact model")
+    with pytest.raises(CompactModelError):
+        load_compact_model(b"\x80\x05not a compact model")
@@ -0,0 +1,135 @@
+"""Drift scoring: baselines, trustworthiness and refit recommendations on shifted data"""
+
+import numpy as np
+import pytest
+from sklearn.manifold import trustworthiness as sklearn_trustworthiness
+
+from drift import DriftAccumulator, DriftRows, compute_baseline, model_baseline, placement_baseline, score_rows, summarize_drift
+from knn_graph import normalize_rows, row_norms
+
+
+def _baseline(training: np.ndarray, embedding: np.ndarray, n_neighbors: int) -> dict:
+    baseline = compute_baseline(training, embedding, n_neighbors)
+    assert baseline is not None
+    return baseline
+
+
+def _rows(model, batch: np.ndarray, coordinates: np.ndarray, max_rows: int = 2048) -> DriftRows:
+    rows = score_rows(model, batch, coordinates, max_rows=max_rows)
+    assert rows is not None
+    return rows
+
+
+def _summarize(model, batch: np.ndarray) -> dict:
+    baseline = model_baseline(model)
+    assert baseline is not None
+    return summarize_drift(_rows(model, batch, model.transform(batch)), baseline)
+
+
+def test_leave_one_out_trustworthiness_matches_sklearn(fitted_umap, clustered_vectors):
+    vectors, _ = clustered_vectors
+    training = normalize_rows(vectors[:300])
+
+    baseline = _baseline(training, fitted_umap.embedding_, n_neighbors=10)
+
+    expected = sklearn_trustworthiness(training, fitted_umap.embedding_, n_neighbors=10, metric="cosine")
+    assert baseline["sample_size"] == 300
+    assert baseline["trustworthiness"] == pytest.approx(expected, abs=1e-3)
+
+
+def test_leave_one_out_distances_exclude_the_row_itself():
+    training = normalize_rows(np.random.default_rng(0).normal(size=(50, 8)).astype(np.float32))
+    baseline = _baseline(training, training[:, :2], n_neighbors=5)
+
+    distances = 1.0 - training @ training.T
+    np.fill_diagonal(distances, np.inf)
+    assert baseline["nn_distance"]["p50"] == pytest.approx(np.percentile(distances.min(axis=1), 50), abs=1e-5)
+    assert compute_baseline(training[:1], training[:1, :2], n_neighbors=5) is None
+
+
+def test_baseline_of_unnormalized_rows_matches_normalized(fitted_umap, clustered_vectors):
+    vectors, _ = clustered_vectors
+    training = vectors[:300]
+    expected = _baseline(normalize_rows(training), fitted_umap.embedding_, n_neighbors=10)
+
+    baseline = compute_baseline(training, fitted_umap.embedding_, 10, sample_size=100, training_norms=row_norms(training))
+    assert baseline is not None
+    subsample = compute_baseline(normalize_rows(training), fitted_umap.embedding_, 10, sample_size=100)
+    assert subsample is not None
+    assert baseline["nn_distance"] == pytest.approx(subsample["nn_distance"], abs=1e-5)
+    assert baseline["trustworthiness"] == pytest.approx(subsample["trustworthiness"], abs=1e-5)
+
+    full = compute_baseline(training, fitted_umap.embedding_, 10, training_norms=row_norms(training))
+    assert full is not None
+    assert full["trustworthiness"] == pytest.approx(expected["trustworthiness"], abs=1e-5)
+
+
+def test_in_distribution_batch_does_not_recommend_refit(fitted_umap, clustered_vectors):
+    vectors, _ = clustered_vectors
+    summary = _summarize(fitted_umap, vectors[300:])
+
+    assert summary["n_scored"] == 100
+    assert summary["out_of_distribution_fraction"] < 0.25
+    assert summary["refit_recommended"] is False
+
+
+def test_shifted_batch_recommends_refit(fitted_umap):
+    # A new topic: points around a direction none of the training clusters share
+    rng = np.random.default_rng(5)
+    shifted = (rng.normal(size=32) * 4 + rng.normal(size=(60, 32))).astype(np.float32)
+    summary = _summarize(fitted_umap, shifted)
+
+    assert summary["out_of_distribution_fraction"] > 0.5
+    assert summary["nn_distance_ratio"] > 1.0
+    assert summary["refit_recommended"] is True
+    assert "out_of_distribution" in summary["reasons"]
+
+
+def test_small_batches_never_recommend_refit(fitted_umap):
+    shifted = np.random.default_rng(6).normal(size=(3, 32)).astype(np.float32) + 10.0
+    summary = _summarize(fitted_umap, shifted)
+    assert summary["out_of_distribution_fraction"] == 1.0
+    assert summary["refit_recommended"] is False
+
+
+def test_large_batches_are_scored_on_a_sample(fitted_umap, clustered_vectors):
+    vectors, _ = clustered_vectors
+    batch = np.repeat(vectors[300:], 5, axis=0)
+    rows = _rows(fitted_umap, batch, fitted_umap.transform(batch[:100]).repeat(5, axis=0), max_rows=50)
+    assert rows.n_rows == 500
+    assert rows.nn_distance.shape[0] == 50
+
+
+def test_rows_slice_and_accumulate_round_trip():
+    rows = DriftRows(np.array([0, 2, 5, 7]), np.array([0.1, 0.2, 0.3, 0.4]), np.array([1.0, 0.9, 0.8, 0.7]), 8)
+    head, tail = rows.slice(0, 4), rows.slice(4, 8)
+    np.testing.assert_array_equal(tail.row_index, [1, 3])
+
+    accumulator = DriftAccumulator()
+    accumulator.add(head)
+    accumulator.add(tail)
+    joined = accumulator.rows()
+    np.testing.assert_array_equal(joined.row_index, rows.row_index)
+    np.testing.assert_array_equal(joined.trustworthiness, rows.trustworthiness)
+    assert joined.n_rows == 8
+
+    baseline = placement_baseline(joined, n_training=100, n_neighbors=15)
+    assert baseline is not None
+    assert baseline["source"] == "placed_rows"
+    assert baseline["sample_size"] == 4
+
+
+def test_accumulator_thins_long_streams_evenly():
+    accumulator = DriftAccumulator(max_rows=100)
+    for start in range(0, 1000, 30):
+        n_rows = min(30, 1000 - start)
+        accumulator.add(DriftRows(np.arange(n_rows), np.arange(start, start + n_rows, dtype=np.float32), None, n_rows))
+
+    rows = accumulator.rows()
+    assert rows.n_rows == 1000
+    assert 50 <= rows.nn_distance.shape[0] <= 100
+    assert rows.trustworthiness is None
+    # Every kept row is a whole stride apart, over the whole stream
+    np.testing.assert_array_equal(rows.row_index, rows.nn_distance.astype(np.int64))
+    assert np.unique(np.diff(rows.row_index)).shape[0] == 1
+    assert rows.row_index[0] == 0 and rows.row_index[-1] >= 1000 - np.diff(rows.row_index)[0]
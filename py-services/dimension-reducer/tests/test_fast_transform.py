@@ -0,0 +1,92 @@
+"""NumPy transform engine against UMAP's own transform"""
+
+import numpy as np
+import pytest
+
+from compact_model import CompactUMAPModel
+from conftest import layout_spread, nearest_cluster_agreement
+from fast_transform import NumpyTransformEngine, cached_engine_nbytes, get_numpy_engine, membership_weights
+from knn_graph import exact_knn, normalize_rows
+
+
+def test_membership_weights_match_umap(clustered_vectors):
+    from umap.umap_ import compute_membership_strengths, smooth_knn_dist
+
+    vectors, _ = clustered_vectors
+    Xn = normalize_rows(vectors)
+    indices, dists = exact_knn(Xn[300:], Xn[:300], 15)
+
+    sigmas, rhos = smooth_knn_dist(dists, 15.0, local_connectivity=0.0)
+    _, _, expected, _ = compute_membership_strengths(indices.astype(np.int64), dists, sigmas, rhos, bipartite=True)
+    np.testing.assert_allclose(membership_weights(dists, 15).ravel(), expected, rtol=1e-3, atol=1e-5)
+
+
+def test_matches_umap_transform_initialization(fitted_umap, clustered_vectors):
+    from umap.umap_ import init_graph_transform
+
+    vectors, _ = clustered_vectors
+    fitted_umap.transform_mode = "graph"
+    try:
+        graph = fitted_umap.transform(vectors[300:]).tocsr()
+    finally:
+        fitted_umap.transform_mode = "embedding"
+    graph.eliminate_zeros()
+
+    expected = init_graph_transform(graph, fitted_umap.embedding_)
+    np.testing.assert_allclose(NumpyTransformEngine.from_model(fitted_umap).transform(vectors[300:]), expected, atol=1e-3)
+
+
+def test_close_to_umap_transform(fitted_umap, clustered_vectors):
+    vectors, labels = clustered_vectors
+    coordinates = get_numpy_engine(fitted_umap).transform(vectors[300:])
+    reference = fitted_umap.transform(vectors[300:])
+
+    # The engine skips UMAP's refinement epochs, so it lands near, not on, UMAP's placement
+    displacement = np.linalg.norm(coordinates - reference, axis=1)
+    assert np.median(displacement) < 0.1 * layout_spread(fitted_umap)
+    assert nearest_cluster_agreement(coordinates, fitted_umap, labels) >= 0.95
+
+
+def test_compact_model_engine_matches_umap_engine(fitted_umap, clustered_vectors):
+    vectors, _ = clustered_vectors
+    compact = CompactUMAPModel.from_umap(fitted_umap, vectors[:300], dtype="float32")
+    np.testing.assert_allclose(
+        NumpyTransformEngine.from_model(compact).transform(vectors[300:]),
+        NumpyTransformEngine.from_model(fitted_umap).transform(vectors[300:]),
+        atol=1e-4,
+    )
+
+
+def test_engine_is_cached_per_model(fitted_umap):
+    assert get_numpy_engine(fitted_umap) is get_numpy_engine(fitted_umap)
+
+
+def test_engine_reports_the_memory_it_adds_to_the_model(fitted_umap, clustered_vectors):
+    vectors, _ = clustered_vectors
+    engine = NumpyTransformEngine.from_model(fitted_umap)
+    assert engine.nbytes == engine.training_embeddings.nbytes
+    engine.layout_index()
+    assert engine.nbytes > engine.training_embeddings.nbytes
+
+    # Compact float32 models already hold the normalized training rows the engine uses
+    compact = CompactUMAPModel.from_umap(fitted_umap, vectors[:300], dtype="float32")
+    assert NumpyTransformEngine.from_model(compact).nbytes == 0
+    assert cached_engine_nbytes(compact) == 0
+    get_numpy_engine(compact).layout_index()
+    assert cached_engine_nbytes(compact) > 0
+
+
+def test_rejects_non_cosine_models():
+    class EuclideanModel:
+        metric = "euclidean"
+
+    with pytest.raises(ValueError):
+        NumpyTransformEngine.from_model(EuclideanModel())
+
+
+def test_auto_engine_picks_numpy_for_small_batches(fitted_umap):
+    import app
+
+    assert app._select_transform_engine("auto", 10, fitted_umap) == "numpy"
+    assert app._select_transform_engine("auto", app.NUMPY_TRANSFORM_MAX_BATCH + 1, fitted_umap) == "umap"
+    assert app._select_transform_engine("umap", 10, fitted_umap) == "umap"
@@ -0,0 +1,72 @@
+"""Time-budget planner: larger budgets never buy a cheaper fit"""
+
+import numpy as np
+import pytest
+
+from fit_budget import NN_DESCENT_PRECISION, QUALITY_MIN_EPOCHS, default_epochs, estimate_umap_fit_ms, plan_umap_fit
+
+PRECISION_RANK = {name: rank for rank, (name, _) in enumerate(NN_DESCENT_PRECISION)}
+
+
+def _quality(plan: dict) -> tuple:
+    """Sortable fit quality: epoch tier, then neighbour-search precision, then epochs (higher is better)"""
+    tier = 1 if plan["n_epochs"] >= QUALITY_MIN_EPOCHS else 0
+    precision = -PRECISION_RANK.get(plan["nn_descent_precision"], 0)
+    return tier, precision, plan["n_epochs"]
+
+
+def _budgets(n_samples: int, dims: int, n_jobs: int = 1) -> np.ndarray:
+    full = estimate_umap_fit_ms(n_samples, dims, n_jobs=n_jobs)
+    return np.geomspace(full / 50, full * 2, 200)
+
+
+@pytest.mark.parametrize("n_samples, dims", [(2000, 64), (50000, 768), (200000, 256)])
+@pytest.mark.parametrize("allow_parallel", [False, True])
+def test_larger_budgets_never_lower_fit_quality(n_samples, dims, allow_parallel):
+    plans = [
+        plan_umap_fit(n_samples, dims, 15, time_budget_ms=float(budget), allow_parallel=allow_parallel, max_threads=4)
+        for budget in _budgets(n_samples, dims)
+    ]
+
+    for smaller, larger in zip(plans, plans[1:]):
+        assert _quality(larger) >= _quality(smaller)
+        # Threads are only added to rescue a budget the defaults miss
+        assert larger["n_jobs"] <= smaller["n_jobs"]
+        assert larger["within_budget"] or not smaller["within_budget"]
+
+    assert plans[-1]["n_epochs"] == default_epochs(n_samples)
+    assert plans[-1]["adjusted"] == []
+
+
+@pytest.mark.parametrize("n_samples", [2000, 50000])
+def test_plans_within_budget_fit_it(n_samples):
+    for budget in _budgets(n_samples, 256):
+        plan = plan_umap_fit(n_samples, 256, 15, time_budget_ms=float(budget))
+        if plan["within_budget"]:
+            assert plan["estimated_fit_ms"] <= budget + 0.1
+
+
+def test_estimates_grow_with_work():
+    base = estimate_umap_fit_ms(50000, 256)
+    assert estimate_umap_fit_ms(100000, 256) > base
+    assert estimate_umap_fit_ms(50000, 512) > base
+    assert estimate_umap_fit_ms(50000, 256, n_epochs=400) > base
+    assert estimate_umap_fit_ms(50000, 256, n_jobs=4) < base
+    assert estimate_umap_fit_ms(50000, 256, incremental_knn=True) < base
+
+
+def test_explicit_settings_are_kept():
+    plan = plan_umap_fit(50000, 768, 15, time_budget_ms=1.0, n_epochs=300, n_jobs=1, allow_parallel=True, max_threads=4)
+    assert plan["n_epochs"] == 300
+    assert plan["n_jobs"] == 1
+    assert plan["within_budget"] is False
+
+    plan = plan_umap_fit(50000, 768, 15, nn_descent={"n_trees": 8, "n_iters": None})
+    assert plan["nn_descent"]["n_trees"] == 8
+    assert plan["nn_descent_precision"] == "custom"
+
+
+def test_seeded_fits_stay_single_threaded():
+    plan = plan_umap_fit(200000, 768, 15, time_budget_ms=1000.0, allow_parallel=False, max_threads=8)
+    assert plan["n_jobs"] == 1
+    assert plan["n_epochs"] < default_epochs(200000)
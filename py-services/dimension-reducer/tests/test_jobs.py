@@ -0,0 +1,138 @@
+"""Reduction jobs: submit, poll, completion, failure and expiry"""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from jobs import JOB_STATUS_COMPLETED, JOB_STATUS_FAILED, JobExecutionError, JobManager, JobQueueFullError
+
+
+def _square(value, progress):
+    progress("squaring", 0.5)
+    return value * value
+
+
+def _fail(status_code, progress):
+    raise JobExecutionError("bad input", status_code)
+
+
+def _wait_finished(manager: JobManager, job_id: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.get(job_id)
+        if job is None or job.is_finished:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish within {timeout}s")
+
+
+@pytest.fixture
+def manager():
+    job_manager = JobManager(max_workers=1, max_pending=2)
+    yield job_manager
+    job_manager.shutdown()
+
+
+def test_thread_job_completes_with_finalized_result(manager):
+    job = manager.submit(_square, (7,), method="test", use_process_pool=False, finalize=lambda result: {"value": result})
+    job = _wait_finished(manager, job.job_id)
+
+    assert job is not None
+    assert job.status == JOB_STATUS_COMPLETED
+    assert job.result == {"value": 49}
+    assert job.progress == 1.0
+    status = job.to_dict()
+    assert status["completed_at"] is not None and status["error"] is None
+
+
+def test_process_job_reports_failures_with_their_status_code(manager):
+    job = _wait_finished(manager, manager.submit(_fail, (422,), method="test").job_id)
+    assert job is not None
+    assert job.status == JOB_STATUS_FAILED
+    assert job.error == "bad input"
+    assert job.error_status_code == 422
+
+    job = _wait_finished(manager, manager.submit(_square, (3,), method="test").job_id)
+    assert job is not None and job.result == 9
+
+
+def test_pending_jobs_are_bounded(manager):
+    release = threading.Event()
+    blocked = [manager.submit(lambda progress: release.wait(10), (), method="test", use_process_pool=False) for _ in range(2)]
+    with pytest.raises(JobQueueFullError):
+        manager.submit(_square, (1,), method="test", use_process_pool=False)
+
+    release.set()
+    for job in blocked:
+        _wait_finished(manager, job.job_id)
+    manager.submit(_square, (1,), method="test", use_process_pool=False)
+
+
+def test_finished_jobs_expire_after_their_ttl():
+    manager = JobManager(max_workers=1, result_ttl_seconds=0.05)
+    try:
+        job = _wait_finished(manager, manager.submit(_square, (2,), method="test", use_process_pool=False).job_id)
+        assert job is not None and job.is_finished
+        time.sleep(0.1)
+        assert manager.get(job.job_id) is None
+    finally:
+        manager.shutdown()
+
+
+def test_forgotten_running_job_is_dropped_when_it_finishes(manager):
+    release = threading.Event()
+    job = manager.submit(lambda progress: release.wait(10), (), method="test", use_process_pool=False)
+    manager.forget(job.job_id)
+    assert manager.get(job.job_id) is not None
+
+    release.set()
+    deadline = time.monotonic() + 10
+    while manager.get(job.job_id) is not None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert manager.get(job.job_id) is None
+
+
+def _poll(client, job_id: str, timeout: float = 60.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = client.get(f"/jobs/{job_id}")
+        assert response.status_code == 200
+        status = response.json()
+        if status["status"] in (JOB_STATUS_COMPLETED, JOB_STATUS_FAILED):
+            return status
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish within {timeout}s")
+
+
+def test_job_api_submit_poll_and_complete(client):
+    vectors = np.random.default_rng(0).normal(size=(40, 8)).tolist()
+    request = {"vectors": vectors, "method": "umap_learning", "backend": "pca", "target_dimensions": 2}
+
+    submitted = client.post("/jobs/reduce", json=request)
+    assert submitted.status_code == 202
+    assert submitted.json()["status"] in ("queued", "running", "completed")
+
+    status = _poll(client, submitted.json()["job_id"])
+    assert status["status"] == JOB_STATUS_COMPLETED
+    assert status["progress"] == 1.0
+    result = status["result"]
+    assert result["n_samples"] == 40
+    np.testing.assert_allclose(result["coordinates"], client.post("/reduce", json=request).json()["coordinates"], atol=1e-5)
+    # The fitted model is registered for later transforms
+    assert result["model_id"]
+
+
+def test_job_api_reports_failed_jobs(client):
+    submitted = client.post("/jobs/reduce", json={"vectors": [[0.0, 1.0]], "method": "umap_transform", "fitted_umap_model": [1, 2, 3]})
+    assert submitted.status_code == 202
+
+    status = _poll(client, submitted.json()["job_id"])
+    assert status["status"] == JOB_STATUS_FAILED
+    assert status["error"]
+    assert status["result"] is None
+
+
+def test_job_api_unknown_job_is_404(client):
+    assert client.get("/jobs/0123456789abcdef").status_code == 404
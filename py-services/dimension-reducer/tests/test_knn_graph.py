@@ -0,0 +1,96 @@
+"""Incremental kNN graph updates against cold rebuilds"""
+
+import numpy as np
+
+from knn_graph import exact_knn, normalize_rows, row_norms, update_knn_graph
+
+K = 10
+
+
+def _data(n_samples: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).normal(size=(n_samples, 24)).astype(np.float32)
+
+
+def _assert_same_graph(graph, cold):
+    np.testing.assert_array_equal(graph.node_ids, cold.node_ids)
+    np.testing.assert_allclose(graph.dists, cold.dists, atol=1e-6)
+    np.testing.assert_array_equal(np.sort(graph.indices, axis=1), np.sort(cold.indices, axis=1))
+
+
+def test_exact_knn_matches_brute_force():
+    X = normalize_rows(_data(50))
+    indices, dists = exact_knn(X, X, K, chunk_rows=7)
+
+    brute = 1.0 - X @ X.T
+    expected = np.argsort(brute, axis=1, kind="stable")[:, :K]
+    np.testing.assert_array_equal(np.sort(indices, axis=1), np.sort(expected, axis=1))
+    np.testing.assert_allclose(dists, np.maximum(np.take_along_axis(brute, expected, axis=1), 0.0), atol=1e-6)
+
+
+def test_exact_knn_scales_unnormalized_data_by_row_norms():
+    X = _data(60, seed=1) * np.random.default_rng(2).uniform(0.5, 3.0, size=(60, 1)).astype(np.float32)
+    X[5] = 0.0
+    expected_indices, expected_dists = exact_knn(normalize_rows(X[:10]), normalize_rows(X), K, chunk_rows=4)
+    indices, dists = exact_knn(normalize_rows(X[:10]), X, K, chunk_rows=4, data_norms=row_norms(X))
+
+    np.testing.assert_array_equal(np.sort(indices, axis=1), np.sort(expected_indices, axis=1))
+    np.testing.assert_allclose(dists, expected_dists, atol=1e-6)
+
+
+def test_incremental_update_matches_cold_rebuild():
+    X = _data(400)
+    node_ids = [f"n{i}" for i in range(400)]
+    previous, stats, _ = update_knn_graph("g", node_ids[:360], X[:360], K)
+    assert not stats["reused"]
+
+    # Add 40 nodes, drop 10 and change 5 embeddings
+    current_ids = node_ids[10:]
+    current_X = X[10:].copy()
+    current_X[:5] += 0.5
+
+    graph, stats, _ = update_knn_graph("g", current_ids, current_X, K, previous=previous)
+    cold, _, _ = update_knn_graph("g", current_ids, current_X, K)
+
+    assert stats["reused"]
+    assert stats["nodes_added"] == 45
+    assert stats["nodes_removed"] == 15
+    assert stats["rows_reused"] > 0
+    _assert_same_graph(graph, cold)
+
+
+def test_reordered_nodes_reuse_every_row():
+    X = _data(200, seed=1)
+    node_ids = [f"n{i}" for i in range(200)]
+    previous, _, _ = update_knn_graph("g", node_ids, X, K)
+
+    order = np.random.default_rng(2).permutation(200)
+    graph, stats, _ = update_knn_graph("g", [node_ids[i] for i in order], X[order], K, previous=previous)
+    cold, _, _ = update_knn_graph("g", [node_ids[i] for i in order], X[order], K)
+
+    assert stats["rows_recomputed"] == 0
+    _assert_same_graph(graph, cold)
+
+
+def test_tiny_embedding_change_is_detected():
+    X = _data(100, seed=3)
+    node_ids = [f"n{i}" for i in range(100)]
+    previous, _, _ = update_knn_graph("g", node_ids, X, K)
+
+    changed = X.copy()
+    changed[17, 0] += 1e-6
+    _, stats, _ = update_knn_graph("g", node_ids, changed, K, previous=previous)
+    assert stats["rows_recomputed"] >= 1
+    assert stats["nodes_added"] == 1
+
+
+def test_large_changes_fall_back_to_cold_build():
+    X = _data(100, seed=4)
+    node_ids = [f"n{i}" for i in range(100)]
+    previous, _, _ = update_knn_graph("g", node_ids, X, K)
+
+    _, stats, _ = update_knn_graph("g", node_ids, X + 1.0, K, previous=previous)
+    assert not stats["reused"]
+
+    # A previous graph with fewer neighbours than requested can't be reused either
+    _, stats, _ = update_knn_graph("g", node_ids, X, K + 5, previous=previous)
+    assert not stats["reused"]
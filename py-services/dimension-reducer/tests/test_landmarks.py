@@ -0,0 +1,93 @@
+"""Landmark selection strategies and chunked placement of the remaining rows"""
+
+import numpy as np
+import pytest
+
+from landmarks import (
+    LANDMARK_STRATEGY_KMEANS_PP,
+    LANDMARK_STRATEGY_RANDOM,
+    LANDMARK_STRATEGY_STRATIFIED,
+    place_in_chunks,
+    select_landmarks,
+)
+
+STRATEGIES = [LANDMARK_STRATEGY_KMEANS_PP, LANDMARK_STRATEGY_STRATIFIED, LANDMARK_STRATEGY_RANDOM]
+
+
+@pytest.mark.parametrize("strategy", STRATEGIES)
+@pytest.mark.parametrize("n_landmarks", [1, 7, 64, 250])
+def test_landmarks_are_unique_sorted_rows(clustered_vectors, strategy, n_landmarks):
+    vectors, _ = clustered_vectors
+    landmarks = select_landmarks(vectors, n_landmarks, strategy, random_state=0)
+
+    assert landmarks.shape == (n_landmarks,)
+    assert np.unique(landmarks).shape[0] == n_landmarks
+    np.testing.assert_array_equal(landmarks, np.sort(landmarks))
+    assert landmarks.min() >= 0 and landmarks.max() < vectors.shape[0]
+
+
+@pytest.mark.parametrize("strategy", STRATEGIES)
+def test_landmarks_from_a_memmap(tmp_path, clustered_vectors, strategy):
+    vectors, _ = clustered_vectors
+    np.save(tmp_path / "vectors.npy", vectors)
+    mapped = np.load(tmp_path / "vectors.npy", mmap_mode="r")
+
+    np.testing.assert_array_equal(
+        select_landmarks(mapped, 40, strategy, random_state=3), select_landmarks(vectors, 40, strategy, random_state=3)
+    )
+
+
+def test_all_rows_are_landmarks_when_asking_for_more(clustered_vectors):
+    vectors, _ = clustered_vectors
+    np.testing.assert_array_equal(select_landmarks(vectors, 1000, LANDMARK_STRATEGY_KMEANS_PP), np.arange(vectors.shape[0]))
+
+
+def test_unknown_strategy_is_rejected(clustered_vectors):
+    vectors, _ = clustered_vectors
+    with pytest.raises(ValueError):
+        select_landmarks(vectors, 10, "farthest-first")
+
+
+def test_stratified_allocation_follows_cluster_sizes():
+    # Clusters of 600, 300 and 100 rows on separate axes land in separate strata
+    rng = np.random.default_rng(1)
+    sizes = [600, 300, 100]
+    centers = np.eye(3, 16, dtype=np.float32) * 20
+    labels = np.repeat(np.arange(3), sizes)
+    vectors = centers[labels] + rng.normal(size=(sum(sizes), 16)).astype(np.float32) * 0.1
+
+    landmarks = select_landmarks(vectors, 100, LANDMARK_STRATEGY_STRATIFIED, random_state=0)
+
+    assert landmarks.shape[0] == 100
+    np.testing.assert_array_equal(np.bincount(labels[landmarks], minlength=3), [60, 30, 10])
+
+
+def test_stratified_with_more_strata_than_landmarks_still_returns_the_budget():
+    vectors = np.random.default_rng(2).normal(size=(2000, 32)).astype(np.float32)
+    landmarks = select_landmarks(vectors, 5, LANDMARK_STRATEGY_STRATIFIED, random_state=0)
+    assert landmarks.shape[0] == 5
+    assert np.unique(landmarks).shape[0] == 5
+
+
+def test_kmeans_pp_covers_every_cluster(clustered_vectors):
+    vectors, labels = clustered_vectors
+    landmarks = select_landmarks(vectors, 8, LANDMARK_STRATEGY_KMEANS_PP, random_state=0)
+    assert set(labels[landmarks].tolist()) == set(labels.tolist())
+
+
+@pytest.mark.parametrize("chunk_rows,workers", [(1, 1), (7, 3), (1000, 2)])
+def test_place_in_chunks_writes_every_row(tmp_path, chunk_rows, workers):
+    vectors = np.random.default_rng(4).normal(size=(103, 6)).astype(np.float32)
+    np.save(tmp_path / "vectors.npy", vectors)
+    mapped = np.load(tmp_path / "vectors.npy", mmap_mode="r")
+    rows = np.setdiff1d(np.arange(103), select_landmarks(vectors, 20, LANDMARK_STRATEGY_RANDOM, random_state=0))
+    output = np.full((103, 2), np.nan, dtype=np.float32)
+    progress = []
+
+    stats = place_in_chunks(lambda X: X[:, :2] * 2, mapped, rows, output, chunk_rows, workers, progress.append)
+
+    np.testing.assert_allclose(output[rows], vectors[rows, :2] * 2)
+    assert np.isnan(np.delete(output, rows, axis=0)).all()
+    assert stats["placed_rows"] == rows.shape[0]
+    assert stats["chunks"] == -(-rows.shape[0] // chunk_rows)
+    assert progress[-1] == 1.0 and len(progress) == stats["chunks"]
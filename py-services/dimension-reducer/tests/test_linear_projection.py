@@ -0,0 +1,100 @@
+"""Incremental ridge projection against closed-form refits"""
+
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.linear_model import Ridge
+from sklearn.metrics import r2_score
+
+from linear_projection import RIDGE_ALPHA, LinearProjection, LinearProjectionStore, fit_linear_projection, row_keys
+
+
+def _rows(n_samples: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_samples, 16))
+    Y = X @ rng.normal(size=(16, 3)) + 0.1 * rng.normal(size=(n_samples, 3))
+    return X, Y
+
+
+def test_incremental_updates_equal_closed_form_refit():
+    X, Y = _rows(300)
+    projection = fit_linear_projection("g", X[:100], Y[:100])
+    projection.update(X[100:250], Y[100:250])
+    projection.update(X[250:], Y[250:])
+
+    expected = Ridge(alpha=RIDGE_ALPHA, fit_intercept=False).fit(X, Y).coef_.T
+    np.testing.assert_allclose(projection.matrix, expected, atol=1e-10)
+    np.testing.assert_allclose(projection.matrix, fit_linear_projection("g", X, Y).matrix, atol=1e-12)
+    assert projection.n_samples == 300
+
+
+def test_matrix_reflects_updates_after_a_read():
+    X, Y = _rows(200, seed=1)
+    projection = fit_linear_projection("g", X[:100], Y[:100])
+    before = projection.matrix.copy()
+
+    projection.update(X[100:], Y[100:])
+    assert not np.allclose(projection.matrix, before)
+    np.testing.assert_allclose(projection.matrix, fit_linear_projection("g", X, Y).matrix, atol=1e-12)
+
+
+def test_r2_score_matches_sklearn():
+    X, Y = _rows(250, seed=2)
+    projection = fit_linear_projection("g", X[:50], Y[:50])
+    projection.update(X[50:], Y[50:])
+
+    expected = r2_score(Y, projection.transform(X).astype(np.float64))
+    assert projection.r2_score() == pytest.approx(expected, abs=1e-5)
+    assert LinearProjection("g", 16, 3).r2_score() == 0.0
+
+
+def test_pickle_round_trip_keeps_pending_updates():
+    X, Y = _rows(120, seed=3)
+    projection = fit_linear_projection("g", X, Y)
+    restored = pickle.loads(pickle.dumps(projection))
+    np.testing.assert_array_equal(restored.matrix, projection.matrix)
+
+
+def test_store_is_a_bounded_lru():
+    store = LinearProjectionStore(max_projections=2)
+    for graph_id in ("a", "b"):
+        store.put(LinearProjection(graph_id, 4, 2))
+    assert store.get("a") is not None
+    store.put(LinearProjection("c", 4, 2))
+
+    assert store.get("b") is None
+    assert store.get("a") is not None
+    assert store.stats()["projections"] == 2
+
+    with pytest.raises(ValueError):
+        store.put(LinearProjection(None, 4, 2))
+
+
+def test_repeated_rows_are_folded_in_once():
+    X, Y = _rows(200, seed=4)
+    projection = fit_linear_projection("g", X[:100], Y[:100])
+    assert projection.update(X[100:150], Y[100:150], row_keys(X[100:150])) == 50
+    # A retry of the same rows, overlapping new ones and a repeat within the batch
+    retry = np.concatenate([X[120:200], X[190:191]])
+    assert projection.update(retry, np.concatenate([Y[120:200], Y[190:191]]), row_keys(retry)) == 50
+
+    assert projection.n_samples == 200
+    np.testing.assert_allclose(projection.matrix, fit_linear_projection("g", X, Y).matrix, atol=1e-12)
+
+
+def test_store_is_bounded_by_bytes():
+    one_projection = LinearProjection("a", 64, 2).nbytes
+    store = LinearProjectionStore(max_projections=10, max_bytes=int(one_projection * 2.5))
+    for graph_id in ("a", "b", "c"):
+        store.put(LinearProjection(graph_id, 64, 2))
+
+    assert store.get("a") is None
+    assert store.stats()["projections"] == 2
+    assert store.stats()["total_bytes"] == 2 * one_projection
+    assert store.stats()["evictions"] == 1
+
+    # The newest projection is kept even when it alone exceeds the bound
+    store.put(LinearProjection("big", 256, 2))
+    assert store.get("big") is not None
+    assert store.stats()["projections"] == 1
@@ -0,0 +1,182 @@
+"""Transform micro-batching: coalescing, per-caller slices and split retries"""
+
+import asyncio
+
+import httpx
+import numpy as np
+import pytest
+
+from micro_batching import BatchSlice, TransformMicroBatcher
+
+
+def _doubling_runner(calls):
+    async def run(contexts, X):
+        calls.append(list(contexts))
+        if "bad" in contexts:
+            raise ValueError("bad request in batch")
+        return {"coordinates": X * 2}
+    return run
+
+
+def _submit_all(batcher, submissions) -> list:
+    """Results of concurrent submissions: a BatchSlice or the exception of each caller"""
+    async def main():
+        return await asyncio.gather(
+            *(batcher.submit(key, context, X) for key, context, X in submissions),
+            return_exceptions=True,
+        )
+    return asyncio.run(main())
+
+
+def _caller_rows(batch_slice) -> np.ndarray:
+    assert isinstance(batch_slice, BatchSlice), f"caller failed: {batch_slice!r}"
+    return batch_slice.result["coordinates"][batch_slice.start:batch_slice.stop]
+
+
+def test_coalesces_same_key_and_slices_per_caller():
+    calls = []
+    batcher = TransformMicroBatcher(_doubling_runner(calls), window_ms=20)
+    parts = [np.full((n, 2), i, dtype=np.float32) for i, n in enumerate([1, 3, 2])]
+
+    slices = _submit_all(batcher, [("model", f"caller{i}", part) for i, part in enumerate(parts)])
+
+    assert calls == [["caller0", "caller1", "caller2"]]
+    for part, batch_slice in zip(parts, slices):
+        np.testing.assert_array_equal(_caller_rows(batch_slice), part * 2)
+        assert batch_slice.batch_requests == 3
+    assert batcher.stats()["coalesced_requests"] == 3
+
+
+def test_different_keys_run_separately():
+    calls = []
+    batcher = TransformMicroBatcher(_doubling_runner(calls), window_ms=20)
+    slices = _submit_all(batcher, [("a", "a0", np.ones((1, 2))), ("b", "b0", np.ones((1, 2))), ("a", "a1", np.ones((1, 2)))])
+
+    assert sorted(calls) == [["a0", "a1"], ["b0"]]
+    assert [batch_slice.batch_requests for batch_slice in slices] == [2, 1, 2]
+
+
+def test_max_batch_rows_flushes_early():
+    calls = []
+    batcher = TransformMicroBatcher(_doubling_runner(calls), window_ms=10_000, max_batch_rows=4)
+    _submit_all(batcher, [("model", "c0", np.ones((2, 2))), ("model", "c1", np.ones((2, 2)))])
+    assert calls == [["c0", "c1"]]
+
+
+def test_failed_batch_is_retried_caller_by_caller():
+    calls = []
+    batcher = TransformMicroBatcher(_doubling_runner(calls), window_ms=20)
+    parts = [np.full((2, 2), i, dtype=np.float32) for i in range(3)]
+
+    results = _submit_all(batcher, [("model", context, part) for context, part in zip(["good0", "bad", "good1"], parts)])
+
+    assert calls[0] == ["good0", "bad", "good1"]
+    assert sorted(calls[1:]) == [["bad"], ["good0"], ["good1"]]
+    assert isinstance(results[1], ValueError)
+    for index in (0, 2):
+        np.testing.assert_array_equal(_caller_rows(results[index]), parts[index] * 2)
+        assert results[index].batch_requests == 1
+    assert batcher.stats()["split_batches"] == 1
+
+
+def test_single_caller_failure_is_not_retried():
+    calls = []
+    batcher = TransformMicroBatcher(_doubling_runner(calls), window_ms=1)
+    results = _submit_all(batcher, [("model", "bad", np.ones((1, 2)))])
+    assert isinstance(results[0], ValueError)
+    assert len(calls) == 1
+
+
+@pytest.fixture
+def wide_batch_window():
+    import app
+
+    window_ms = app.transform_batcher.window_ms
+    app.transform_batcher.window_ms = 100
+    yield
+    app.transform_batcher.window_ms = window_ms
+
+
+def test_concurrent_transforms_return_their_own_coordinates(client, wide_batch_window):
+    import app
+
+    rng = np.random.default_rng(0)
+    fit = client.post("/reduce", json={"vectors": rng.normal(size=(60, 12)).tolist(), "method": "umap_learning", "backend": "pca", "target_dimensions": 2})
+    assert fit.status_code == 200
+    model_id = fit.json()["model_id"]
+    assert model_id
+
+    batches = [rng.normal(size=(n, 12)).tolist() for n in (1, 4, 2, 3)]
+    expected = []
+    for vectors in batches:
+        response = client.post("/reduce", json={"vectors": vectors, "method": "umap_transform", "model_id": model_id})
+        assert response.status_code == 200
+        expected.append(response.json()["coordinates"])
+
+    async def transform_concurrently():
+        transport = httpx.ASGITransport(app=app.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+            return await asyncio.gather(*(
+                async_client.post("/reduce", json={"vectors": vectors, "method": "umap_transform", "model_id": model_id})
+                for vectors in batches
+            ))
+
+    responses = asyncio.run(transform_concurrently())
+    for response, coordinates in zip(responses, expected):
+        assert response.status_code == 200
+        body = response.json()
+        assert body["batched_requests"] == len(batches)
+        assert body["n_samples"] == len(coordinates)
+        np.testing.assert_allclose(body["coordinates"], coordinates, atol=1e-5)
+
+
+def _transform_concurrently(batches, **fields) -> list:
+    import app
+
+    async def main():
+        transport = httpx.ASGITransport(app=app.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+            return await asyncio.gather(*(
+                async_client.post("/reduce", json={"vectors": vectors, "method": "umap_transform", **fields})
+                for vectors in batches
+            ))
+    return asyncio.run(main())
+
+
+def test_numpy_engine_batches_match_solo_transforms(client, wide_batch_window, fitted_umap, clustered_vectors):
+    import app
+    import cloudpickle
+
+    model_id = app.model_registry.register(cloudpickle.dumps(fitted_umap), fitted_umap)
+    vectors, _ = clustered_vectors
+    batches = [vectors[start:start + n].tolist() for start, n in ((300, 3), (310, 20), (340, 1), (350, 8))]
+    solo = []
+    for batch in batches:
+        response = client.post("/reduce", json={"vectors": batch, "method": "umap_transform", "model_id": model_id})
+        assert response.status_code == 200
+        assert response.json()["transform_engine"] == "numpy"
+        solo.append(response.json()["coordinates"])
+
+    responses = _transform_concurrently(batches, model_id=model_id)
+    for response, coordinates in zip(responses, solo):
+        assert response.status_code == 200
+        body = response.json()
+        assert body["batched_requests"] == len(batches)
+        assert body["transform_engine"] == "numpy"
+        np.testing.assert_allclose(body["coordinates"], coordinates, atol=1e-5)
+
+
+def test_umap_engine_transforms_are_not_coalesced(client, wide_batch_window, fitted_umap, clustered_vectors):
+    import app
+    import cloudpickle
+
+    model_id = app.model_registry.register(cloudpickle.dumps(fitted_umap), fitted_umap)
+    vectors, _ = clustered_vectors
+    batches = [vectors[start:start + 5].tolist() for start in (300, 320)]
+
+    responses = _transform_concurrently(batches, model_id=model_id, transform_engine="umap")
+    for response in responses:
+        assert response.status_code == 200
+        body = response.json()
+        assert body["transform_engine"] == "umap"
+        assert body["batched_requests"] is None
@@ -0,0 +1,158 @@
+"""Fitted model registry: LRU bounds, lazy deserialization and disk reload"""
+
+import os
+import pickle
+
+from model_registry import FittedModelRegistry
+
+
+class CountingLoader:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, model_bytes: bytes):
+        self.calls += 1
+        return pickle.loads(model_bytes)
+
+
+def _model_bytes(name: str, size: int = 0) -> bytes:
+    return pickle.dumps({"name": name, "payload": b"x" * size})
+
+
+def _name(registry: FittedModelRegistry, model_id: str) -> str:
+    model = registry.get(model_id)
+    assert model is not None, f"{model_id[:12]} missing from the registry"
+    return model["name"]
+
+
+def test_evicts_least_recently_used_by_count():
+    registry = FittedModelRegistry(CountingLoader(), max_entries=2)
+    first = registry.register(_model_bytes("a"))
+    second = registry.register(_model_bytes("b"))
+
+    # Touch the first model so the second becomes least recently used
+    assert _name(registry, first) == "a"
+    registry.register(_model_bytes("c"))
+
+    assert registry.get(second) is None
+    assert _name(registry, first) == "a"
+    stats = registry.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+
+
+def test_evicts_by_bytes_but_keeps_newest_entry():
+    small = _model_bytes("small", 100)
+    large = _model_bytes("large", 10_000)
+    registry = FittedModelRegistry(CountingLoader(), max_bytes=len(small) + 10)
+
+    small_id = registry.register(small)
+    large_id = registry.register(large)
+
+    # The large model alone exceeds the bound, yet stays as the newest entry
+    assert registry.get(small_id) is None
+    assert _name(registry, large_id) == "large"
+    stats = registry.stats()
+    assert stats["entries"] == 1
+    assert stats["total_bytes"] == len(large)
+
+
+def test_register_without_model_deserializes_once_on_first_get():
+    loader = CountingLoader()
+    registry = FittedModelRegistry(loader)
+    model_id = registry.register(_model_bytes("lazy"))
+    assert loader.calls == 0
+
+    assert _name(registry, model_id) == "lazy"
+    assert _name(registry, model_id) == "lazy"
+    assert loader.calls == 1
+
+
+def test_reloads_evicted_model_from_persist_dir(tmp_path):
+    loader = CountingLoader()
+    registry = FittedModelRegistry(loader, max_entries=1, persist_dir=str(tmp_path))
+    first = registry.register(_model_bytes("a"))
+    registry.register(_model_bytes("b"))
+    assert registry.stats()["evictions"] == 1
+
+    assert _name(registry, first) == "a"
+    assert (tmp_path / f"{first}.model").exists()
+
+    # A fresh registry over the same directory serves models fitted by an earlier process
+    restarted = FittedModelRegistry(CountingLoader(), persist_dir=str(tmp_path))
+    assert _name(restarted, first) == "a"
+    assert restarted.stats()["hits"] == 1
+
+
+def test_persist_dir_ignores_malformed_model_ids(tmp_path):
+    registry = FittedModelRegistry(CountingLoader(), persist_dir=str(tmp_path))
+    assert registry.get("../../etc/passwd") is None
+    assert registry.stats()["misses"] == 1
+
+
+def test_get_or_register_resolves_by_id_then_bytes():
+    loader = CountingLoader()
+    registry = FittedModelRegistry(loader)
+    model_bytes = _model_bytes("a")
+
+    model_id, model, hit = registry.get_or_register(None, model_bytes)
+    assert not hit and model["name"] == "a"
+    assert model_id == FittedModelRegistry.compute_model_id(model_bytes)
+
+    assert registry.get_or_register(model_id, None)[2]
+    # Bytes alone hit too once the same model has been seen
+    assert registry.get_or_register(None, model_bytes)[2]
+    assert loader.calls == 1
+
+    assert registry.get_or_register("f" * 64, None) == ("f" * 64, None, False)
+
+
+def test_persist_dir_is_bounded_by_bytes(tmp_path):
+    models = [_model_bytes(name, 1000) for name in "abc"]
+    registry = FittedModelRegistry(CountingLoader(), max_entries=1, persist_dir=str(tmp_path), max_disk_bytes=2 * len(models[0]) + 10)
+    ids = [registry.register(model_bytes) for model_bytes in models[:2]]
+
+    # Reloading the first model from disk makes the second the least recently used file
+    assert _name(registry, ids[0]) == "a"
+    third = registry.register(models[2])
+
+    assert sorted(path.stem for path in tmp_path.glob("*.model")) == sorted([ids[0], third])
+    stats = registry.stats()
+    assert stats["persisted_entries"] == 2
+    assert stats["persisted_bytes"] == 2 * len(models[0])
+    assert stats["disk_evictions"] == 1
+
+
+def test_restart_indexes_persisted_files_and_applies_a_lowered_bound(tmp_path):
+    registry = FittedModelRegistry(CountingLoader(), persist_dir=str(tmp_path))
+    ids = [registry.register(_model_bytes(name, 1000)) for name in "abc"]
+    for age, model_id in enumerate(reversed(ids)):
+        # Oldest first: a, then b, then c
+        mtime = 1_000_000 - age * 100
+        os.utime(tmp_path / f"{model_id}.model", (mtime, mtime))
+
+    restarted = FittedModelRegistry(CountingLoader(), persist_dir=str(tmp_path), max_disk_bytes=1)
+    assert [path.stem for path in tmp_path.glob("*.model")] == [ids[2]]
+    assert restarted.stats()["persisted_entries"] == 1
+    assert _name(restarted, ids[2]) == "c"
+
+
+def test_derived_bytes_count_against_the_byte_bound():
+    first, second = _model_bytes("a", 100), _model_bytes("b", 100)
+    registry = FittedModelRegistry(CountingLoader(), max_bytes=len(first) + len(second) + 500)
+    first_id = registry.register(first)
+    second_id = registry.register(second)
+    model = registry.get(second_id)
+
+    registry.account_derived_bytes(second_id, model, 200)
+    registry.account_derived_bytes(second_id, model, 200)
+    assert registry.stats()["total_bytes"] == len(first) + len(second) + 200
+    # Only growth is charged, and charges for a model object the entry no longer holds are ignored
+    registry.account_derived_bytes(second_id, {"name": "b"}, 10_000)
+    assert registry.stats()["derived_bytes"] == 200
+
+    registry.account_derived_bytes(second_id, model, 1000)
+    assert registry.get(first_id) is None
+    stats = registry.stats()
+    assert stats["entries"] == 1
+    assert stats["total_bytes"] == len(second) + 1000
@@ -0,0 +1,108 @@
+"""Reduction result cache: keys, hits, byte-bound eviction and disk spill"""
+
+import numpy as np
+
+from result_cache import ReductionResultCache, compute_result_key
+
+# _estimate_size counts 1 KiB of metadata allowance per entry
+ENTRY_OVERHEAD = 1024
+
+
+def _result(rows: int, value: float = 0.0) -> dict:
+    return {"coordinates": np.full((rows, 2), value, dtype=np.float32), "method": "umap_learning"}
+
+
+def _key(seed: int) -> str:
+    return compute_result_key(np.full((2, 2), seed, dtype=np.float32), {"method": "umap_learning"})
+
+
+def test_key_covers_vectors_parameters_and_model():
+    X = np.arange(12, dtype=np.float32).reshape(4, 3)
+    key = compute_result_key(X, {"method": "umap_learning", "n_neighbors": 15})
+
+    assert key == compute_result_key(X.copy(), {"n_neighbors": 15, "method": "umap_learning"})
+    assert key != compute_result_key(X.reshape(3, 4), {"method": "umap_learning", "n_neighbors": 15})
+    assert key != compute_result_key(X.astype(np.float64), {"method": "umap_learning", "n_neighbors": 15})
+    assert key != compute_result_key(X, {"method": "umap_learning", "n_neighbors": 16})
+    assert key != compute_result_key(X, {"method": "umap_learning", "n_neighbors": 15}, b"model")
+
+
+def test_hit_and_miss():
+    cache = ReductionResultCache()
+    result = _result(3)
+    cache.put(_key(0), result)
+
+    assert cache.get(_key(0)) is result
+    assert cache.get(_key(1)) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_evicts_least_recently_used_by_bytes():
+    entry_bytes = ENTRY_OVERHEAD + 100 * 2 * 4
+    cache = ReductionResultCache(max_bytes=2 * entry_bytes)
+    for seed in range(2):
+        cache.put(_key(seed), _result(100, seed))
+
+    # Touch the first entry so the second is evicted by the third
+    assert cache.get(_key(0)) is not None
+    cache.put(_key(2), _result(100, 2))
+
+    assert cache.get(_key(1)) is None
+    assert cache.get(_key(0)) is not None
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["total_bytes"] == 2 * entry_bytes
+
+
+def test_oversized_entry_is_kept_alone():
+    cache = ReductionResultCache(max_bytes=ENTRY_OVERHEAD)
+    cache.put(_key(0), _result(1))
+    cache.put(_key(1), _result(1000))
+    assert cache.get(_key(0)) is None
+    assert cache.get(_key(1)) is not None
+    assert cache.stats()["entries"] == 1
+
+
+def test_evicted_entries_spill_to_disk_and_survive_restart(tmp_path):
+    cache = ReductionResultCache(max_bytes=1, spill_dir=str(tmp_path))
+    cache.put(_key(0), _result(5, 7.0))
+    cache.put(_key(1), _result(5, 8.0))
+    assert cache.stats()["spilled_entries"] == 1
+
+    restored = cache.get(_key(0))
+    assert restored is not None
+    np.testing.assert_array_equal(restored["coordinates"], _result(5, 7.0)["coordinates"])
+    assert cache.stats()["disk_hits"] == 1
+
+    restarted = ReductionResultCache(spill_dir=str(tmp_path))
+    assert restarted.stats()["spilled_entries"] == 2
+    restored = restarted.get(_key(1))
+    assert restored is not None
+    assert restored["coordinates"][0, 0] == 8.0
+
+
+def test_spill_directory_is_bounded(tmp_path):
+    cache = ReductionResultCache(max_bytes=1, spill_dir=str(tmp_path), max_spill_bytes=1)
+    for seed in range(4):
+        cache.put(_key(seed), _result(5, seed))
+
+    stats = cache.stats()
+    assert stats["spilled_entries"] == 1
+    assert len(list(tmp_path.glob("*.result"))) == 1
+    assert cache.get(_key(2)) is not None
+    assert cache.get(_key(0)) is None
+
+
+def test_reduce_serves_identical_requests_from_cache(client):
+    vectors = np.random.default_rng(0).normal(size=(30, 8)).tolist()
+    request = {"vectors": vectors, "method": "umap_learning", "backend": "pca", "target_dimensions": 2, "use_result_cache": True}
+
+    first = client.post("/reduce", json=request).json()
+    second = client.post("/reduce", json=request).json()
+    changed = client.post("/reduce", json={**request, "target_dimensions": 3}).json()
+
+    assert first["result_cache_hit"] is False
+    assert second["result_cache_hit"] is True
+    assert second["coordinates"] == first["coordinates"]
+    assert changed["result_cache_hit"] is False
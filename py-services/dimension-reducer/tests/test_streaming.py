@@ -0,0 +1,211 @@
+"""Streamed transform bodies: message framing across chunk boundaries and row regrouping"""
+
+import asyncio
+import json
+from typing import cast
+
+import msgpack
+import numpy as np
+import pytest
+
+from streaming import (
+    FRAMES_CONTENT_TYPE,
+    NDJSON_CONTENT_TYPE,
+    STREAM_FORMAT_FRAMES,
+    STREAM_FORMAT_NDJSON,
+    StreamFormatError,
+    encode_message,
+    iter_messages,
+    iter_row_chunks,
+)
+from wire_format import decode_array, encode_array
+
+
+def _frame(message: dict) -> bytes:
+    # packb only returns None for packers created with autoreset=False
+    payload = cast(bytes, msgpack.packb(message, use_bin_type=True))
+    return len(payload).to_bytes(4, "little") + payload
+
+
+def _chunked(body: bytes, size: int) -> list:
+    return [body[start:start + size] for start in range(0, len(body), size)]
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+def _collect(chunks, format_name: str, max_message_bytes: int = 1 << 20) -> list:
+    async def main():
+        return [message async for message in iter_messages(_aiter(chunks), format_name, max_message_bytes)]
+    return asyncio.run(main())
+
+
+def _regroup(messages, chunk_rows: int) -> list:
+    async def main():
+        return [chunk async for chunk in iter_row_chunks(_aiter(messages), chunk_rows)]
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64, 1 << 16])
+def test_frames_are_reassembled_across_chunk_boundaries(chunk_size):
+    vectors = np.arange(24, dtype=np.float32).reshape(6, 4)
+    messages = [{"model_id": "m"}, {"vectors": encode_array(vectors[:2])}, {"vectors": encode_array(vectors[2:]), "node_ids": list("abcd")}]
+    body = b"".join(_frame(message) for message in messages)
+
+    decoded = _collect(_chunked(body, chunk_size), STREAM_FORMAT_FRAMES)
+
+    assert len(decoded) == 3
+    assert decoded[0] == {"model_id": "m"}
+    np.testing.assert_array_equal(decode_array(decoded[1]["vectors"]), vectors[:2])
+    np.testing.assert_array_equal(decode_array(decoded[2]["vectors"]), vectors[2:])
+    assert decoded[2]["node_ids"] == list("abcd")
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 1 << 16])
+def test_ndjson_lines_are_reassembled_across_chunk_boundaries(chunk_size):
+    lines = [{"model_id": "m"}, [0.5, 1.5], {"vector": [2.0, 3.0], "node_id": "n1"}, {"vectors": [[4.0, 5.0]]}]
+    # Blank lines are skipped and the last line needs no trailing newline
+    body = "\n".join(json.dumps(line) for line in lines[:2]).encode() + b"\n\n" + "\n".join(json.dumps(line) for line in lines[2:]).encode()
+
+    assert _collect(_chunked(body, chunk_size), STREAM_FORMAT_NDJSON) == lines
+
+
+def test_truncated_and_oversized_frames_are_rejected():
+    body = _frame({"model_id": "m"})
+    with pytest.raises(StreamFormatError):
+        _collect([body[:-1]], STREAM_FORMAT_FRAMES)
+    with pytest.raises(StreamFormatError):
+        _collect([body], STREAM_FORMAT_FRAMES, max_message_bytes=4)
+    with pytest.raises(StreamFormatError):
+        _collect([b"not json\n"], STREAM_FORMAT_NDJSON)
+
+
+def test_rows_are_regrouped_into_fixed_chunks_in_arrival_order():
+    vectors = np.arange(20, dtype=np.float32).reshape(10, 2)
+    messages = [
+        vectors[0].tolist(),
+        {"vectors": encode_array(vectors[1:5])},
+        vectors[5].tolist(),
+        vectors[6].tolist(),
+        {"vectors": vectors[7:].tolist()},
+    ]
+
+    chunks = _regroup(messages, chunk_rows=3)
+
+    assert [X.shape[0] for X, _ in chunks] == [3, 3, 3, 1]
+    np.testing.assert_array_equal(np.concatenate([X for X, _ in chunks]), vectors)
+    assert all(node_ids is None for _, node_ids in chunks)
+
+
+def test_node_ids_follow_their_rows():
+    messages = [{"vector": [0.0, 1.0], "node_id": "a"}, {"vectors": [[1.0, 2.0], [2.0, 3.0]], "node_ids": ["b", "c"]}]
+    chunks = _regroup(messages, chunk_rows=2)
+    assert [node_ids for _, node_ids in chunks] == [["a", "b"], ["c"]]
+
+    with pytest.raises(StreamFormatError):
+        _regroup([{"vector": [0.0], "node_id": "a"}, [1.0]], chunk_rows=2)
+    with pytest.raises(StreamFormatError):
+        _regroup([[0.0, 1.0], [1.0]], chunk_rows=1)
+
+
+@pytest.mark.parametrize("format_name", [STREAM_FORMAT_FRAMES, STREAM_FORMAT_NDJSON])
+def test_stream_endpoint_matches_reduce_transform(client, format_name):
+    rng = np.random.default_rng(0)
+    fit = client.post("/reduce", json={"vectors": rng.normal(size=(50, 8)).tolist(), "method": "umap_learning", "backend": "pca", "target_dimensions": 2})
+    model_id = fit.json()["model_id"]
+    vectors = rng.normal(size=(23, 8)).astype(np.float32)
+    node_ids = [f"n{i}" for i in range(23)]
+
+    expected = client.post("/reduce", json={"vectors": vectors.tolist(), "node_ids": node_ids, "method": "umap_transform", "model_id": model_id}).json()
+
+    header = {"model_id": model_id, "stream_chunk_rows": 10}
+    if format_name == STREAM_FORMAT_FRAMES:
+        body = _frame(header) + _frame({"vectors": encode_array(vectors[:15]), "node_ids": node_ids[:15]}) + _frame({"vectors": encode_array(vectors[15:]), "node_ids": node_ids[15:]})
+        content_type = FRAMES_CONTENT_TYPE
+    else:
+        lines = [header] + [{"vector": vector.tolist(), "node_id": node_id} for vector, node_id in zip(vectors, node_ids)]
+        body = b"".join(encode_message(line, STREAM_FORMAT_NDJSON) for line in lines)
+        content_type = NDJSON_CONTENT_TYPE
+
+    response = client.post("/reduce/stream", content=iter(_chunked(body, 13)), headers={"content-type": content_type})
+    assert response.status_code == 200
+
+    messages = _collect([response.content], format_name)
+    chunks, summary = messages[:-1], messages[-1]
+    assert [message["n_samples"] for message in chunks] == [10, 10, 3]
+    assert summary["done"] is True
+    assert summary["n_samples"] == 23
+
+    coordinates = [decode_array(message["coordinates"]) if isinstance(message["coordinates"], dict) else np.asarray(message["coordinates"]) for message in chunks]
+    np.testing.assert_allclose(np.concatenate(coordinates), expected["coordinates"], atol=1e-5)
+    assert [node_id for message in chunks for node_id in message["node_ids"]] == node_ids
+
+
+def test_stream_body_split_over_many_asgi_messages(client):
+    """
+    Servers deliver a streamed body as one http.request message per received chunk;
+    TestClient sends a single message, so the app is driven over raw ASGI here. The scope
+    declares ASGI spec 2.4 (uvicorn >= 0.28): under 2.3, Starlette's disconnect listener
+    competes with the body reads for receive() and drops chunks.
+    """
+    import app
+
+    rng = np.random.default_rng(1)
+    fit = client.post("/reduce", json={"vectors": rng.normal(size=(50, 8)).tolist(), "method": "umap_learning", "backend": "pca", "target_dimensions": 2})
+    model_id = fit.json()["model_id"]
+    vectors = rng.normal(size=(40, 8)).astype(np.float32)
+    expected = client.post("/reduce", json={"vectors": vectors.tolist(), "method": "umap_transform", "model_id": model_id}).json()
+
+    body = _frame({"model_id": model_id, "stream_chunk_rows": 16}) + b"".join(
+        _frame({"vectors": encode_array(vectors[start:start + 5])}) for start in range(0, 40, 5)
+    )
+    body_messages = [{"type": "http.request", "body": part, "more_body": True} for part in _chunked(body, 97)]
+    body_messages.append({"type": "http.request", "body": b"", "more_body": False})
+
+    async def main():
+        sent = []
+        response_complete = asyncio.Event()
+
+        async def receive():
+            if body_messages:
+                # Let the response side run between chunks, as a network read would
+                await asyncio.sleep(0)
+                return body_messages.pop(0)
+            await response_complete.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_complete.set()
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0", "spec_version": "2.4"},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": "/reduce/stream",
+            "raw_path": b"/reduce/stream",
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"content-type", FRAMES_CONTENT_TYPE.encode()), (b"transfer-encoding", b"chunked")],
+            "client": ("testclient", 50000),
+            "server": ("testserver", 80),
+        }
+        await asyncio.wait_for(app.app(scope, receive, send), timeout=60)
+        return sent
+
+    sent = asyncio.run(main())
+    assert sent[0]["type"] == "http.response.start" and sent[0]["status"] == 200
+    assert not body_messages
+
+    messages = _collect([b"".join(message.get("body", b"") for message in sent[1:])], STREAM_FORMAT_FRAMES)
+    chunks, summary = messages[:-1], messages[-1]
+    assert summary["done"] is True
+    assert summary["n_samples"] == 40
+    assert [message["n_samples"] for message in chunks] == [16, 16, 8]
+    coordinates = np.concatenate([decode_array(message["coordinates"]) for message in chunks])
+    np.testing.assert_allclose(coordinates, expected["coordinates"], atol=1e-5)
@@ -0,0 +1,87 @@
+"""Warm-started refits: initial placement and Procrustes alignment onto the previous frame"""
+
+import numpy as np
+
+from warm_start import WarmStart, align_to_previous, place_from_neighbors, prepare_warm_start
+
+
+def _rotation(angle: float) -> np.ndarray:
+    return np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+
+
+def test_alignment_undoes_rotation_reflection_and_translation():
+    rng = np.random.default_rng(0)
+    previous = rng.normal(size=(50, 2)).astype(np.float32) * 5
+    # The refit lands in a rotated, mirrored and shifted frame
+    refit = (previous @ _rotation(1.1) @ np.diag([1.0, -1.0]) + [30.0, -12.0]).astype(np.float32)
+    warm_start = WarmStart(previous, np.arange(40), np.arange(40, 50), previous[:40])
+    node_ids = [f"n{i}" for i in range(50)]
+
+    aligned, stats, moved = align_to_previous(refit, warm_start, node_ids, movement_threshold=0.01)
+
+    np.testing.assert_allclose(aligned, previous, atol=1e-3)
+    assert stats["procrustes_rmsd"] < 1e-3
+    assert stats["known_nodes"] == 40
+    # Only the new nodes count as moved
+    assert moved == node_ids[40:]
+
+
+def test_alignment_reports_known_nodes_that_moved():
+    previous = np.random.default_rng(1).normal(size=(30, 2)).astype(np.float32) * 5
+    refit = previous.copy()
+    refit[3] += 4.0
+    warm_start = WarmStart(previous, np.arange(30), np.arange(0), previous)
+
+    _, stats, moved = align_to_previous(refit, warm_start, [f"n{i}" for i in range(30)], movement_threshold=2.0)
+    assert moved == ["n3"]
+    assert stats["moved_known_nodes"] == 1
+
+
+def test_new_nodes_start_next_to_their_known_neighbours(clustered_vectors):
+    vectors, labels = clustered_vectors
+    previous = {f"n{i}": [float(labels[i]) * 10, 0.0] for i in range(300)}
+    node_ids = [f"n{i}" for i in range(400)]
+
+    warm_start = prepare_warm_start(vectors, node_ids, previous, target_dimensions=2)
+
+    assert warm_start is not None
+    np.testing.assert_array_equal(warm_start.new_rows, np.arange(300, 400))
+    np.testing.assert_array_equal(warm_start.init[:300, 0], labels[:300] * 10)
+    # Each new node lands at its own cluster's position
+    np.testing.assert_allclose(warm_start.init[300:, 0], labels[300:] * 10, atol=0.5)
+
+
+def test_too_few_known_nodes_fall_back_to_a_cold_fit():
+    X = np.random.default_rng(2).normal(size=(10, 4)).astype(np.float32)
+    node_ids = [f"n{i}" for i in range(10)]
+    assert prepare_warm_start(X, node_ids, {"n0": [0.0, 0.0], "n1": [1.0, 1.0]}, target_dimensions=2) is None
+    # Coordinates of the wrong dimensionality don't count as known
+    assert prepare_warm_start(X, node_ids, {node_id: [0.0, 0.0, 0.0] for node_id in node_ids}, target_dimensions=2) is None
+
+
+def test_place_from_neighbors_reproduces_exact_duplicates():
+    reference = np.random.default_rng(3).normal(size=(20, 6)).astype(np.float32)
+    coordinates = np.random.default_rng(4).normal(size=(20, 2)).astype(np.float32)
+    placed = place_from_neighbors(reference[:5], reference, coordinates, k=1)
+    np.testing.assert_allclose(placed, coordinates[:5], atol=1e-4)
+
+
+def test_warm_refit_of_unchanged_data_stays_close(clustered_vectors):
+    import app
+
+    vectors, _ = clustered_vectors
+    X = vectors[:300]
+    node_ids = [f"n{i}" for i in range(300)]
+    fields = {"vectors": [], "method": "umap_learning", "target_dimensions": 2, "node_ids": node_ids, "n_epochs": 100}
+
+    cold = app._run_reduction(app.DimensionReductionRequest(**fields), X)
+    previous = {node_id: coordinate for node_id, coordinate in zip(node_ids, np.asarray(cold["coordinates"]).tolist())}
+    warm = app._run_reduction(app.DimensionReductionRequest(**fields, previous_coordinates=previous), X)
+
+    stats = warm["model_metadata"]["warm_start"]
+    assert stats["known_nodes"] == 300 and stats["new_nodes"] == 0
+    spread = float(np.linalg.norm(np.ptp(np.asarray(cold["coordinates"]), axis=0)))
+    displacement = np.linalg.norm(np.asarray(warm["coordinates"]) - np.asarray(cold["coordinates"]), axis=1)
+    # The reduced-epoch refit relaxes the layout a little, but nodes stay where they were
+    assert np.median(displacement) < 0.1 * spread
+    assert stats["procrustes_rmsd"] < 0.15 * spread
@@ -0,0 +1,113 @@
+"""msgpack wire format: array envelopes and /reduce round trips"""
+
+from typing import cast
+
+import msgpack
+import numpy as np
+import pytest
+
+from wire_format import (
+    MSGPACK_CONTENT_TYPE,
+    WireFormatError,
+    decode_array,
+    decode_batch_payload,
+    decode_reduce_payload,
+    encode_array,
+    encode_reduce_response,
+)
+
+
+def _pack(payload: dict) -> bytes:
+    # packb only returns None for packers created with autoreset=False
+    return cast(bytes, msgpack.packb(payload, use_bin_type=True))
+
+
+def test_array_envelope_round_trip_keeps_values_and_shape():
+    array = np.random.default_rng(0).normal(size=(7, 5)).astype(np.float32)
+    decoded = decode_array(encode_array(array))
+    assert decoded.dtype == np.float32
+    np.testing.assert_array_equal(decoded, array)
+
+
+def test_float64_buffers_are_cast_to_float32():
+    array = np.linspace(0.0, 1.0, 12).reshape(3, 4)
+    decoded = decode_array(encode_array(array, dtype="float64"))
+    assert decoded.dtype == np.float32
+    np.testing.assert_allclose(decoded, array, rtol=1e-6)
+
+
+@pytest.mark.parametrize(
+    "envelope",
+    [
+        {"dtype": "int64", "shape": [1], "data": b"\x00" * 8},
+        {"dtype": "float32", "shape": [2, 2], "data": b"\x00" * 12},
+        {"dtype": "float32", "shape": [-1], "data": b""},
+        {"dtype": "float32", "shape": [1], "data": [0, 0, 0, 0]},
+        [1.0, 2.0],
+    ],
+)
+def test_malformed_envelopes_are_rejected(envelope):
+    with pytest.raises(WireFormatError):
+        decode_array(envelope)
+
+
+def test_reduce_payload_and_response_round_trip():
+    vectors = np.random.default_rng(1).normal(size=(4, 3)).astype(np.float32)
+    body = _pack({"vectors": encode_array(vectors), "fitted_umap_model": b"\x01\x02", "method": "umap_transform", "node_ids": ["a", "b", "c", "d"]})
+
+    fields, X, model_bytes = decode_reduce_payload(body)
+    assert fields == {"method": "umap_transform", "node_ids": ["a", "b", "c", "d"]}
+    assert X is not None
+    np.testing.assert_array_equal(X, vectors)
+    assert model_bytes == b"\x01\x02"
+
+    coordinates = vectors[:, :2] * 2
+    response = msgpack.unpackb(
+        encode_reduce_response({"coordinates": coordinates, "n_samples": np.int64(4), "fitted_umap_model": b"\x03"}),
+        raw=False,
+    )
+    np.testing.assert_array_equal(decode_array(response["coordinates"]), coordinates)
+    assert response["n_samples"] == 4
+    assert response["fitted_umap_model"] == b"\x03"
+
+
+def test_batch_payload_isolates_malformed_groups():
+    good = {"vectors": encode_array(np.ones((2, 3))), "group_id": "good"}
+    bad = {"vectors": {"dtype": "float32", "shape": [2, 3], "data": b""}, "group_id": "bad"}
+    fields, groups = decode_batch_payload(_pack({"groups": [good, bad], "include_stage_timings": True}))
+
+    assert fields == {"include_stage_timings": True}
+    assert groups[0][0] == {"group_id": "good"}
+    assert groups[0][1].shape == (2, 3)
+    assert groups[1][0] == "bad"
+    assert isinstance(groups[1][1], WireFormatError)
+
+
+def test_reduce_endpoint_msgpack_matches_json(client):
+    vectors = np.random.default_rng(2).normal(size=(40, 16)).astype(np.float32)
+    fields = {"method": "umap_learning", "backend": "pca", "target_dimensions": 2}
+
+    json_response = client.post("/reduce", json={**fields, "vectors": vectors.tolist()})
+    assert json_response.status_code == 200
+
+    binary_response = client.post(
+        "/reduce",
+        content=_pack({**fields, "vectors": encode_array(vectors)}),
+        headers={"content-type": MSGPACK_CONTENT_TYPE, "accept": MSGPACK_CONTENT_TYPE},
+    )
+    assert binary_response.status_code == 200
+    assert binary_response.headers["content-type"].startswith(MSGPACK_CONTENT_TYPE)
+
+    payload = msgpack.unpackb(binary_response.content, raw=False)
+    np.testing.assert_allclose(
+        decode_array(payload["coordinates"]),
+        np.asarray(json_response.json()["coordinates"]),
+        atol=1e-5,
+    )
+    assert isinstance(payload["fitted_umap_model"], bytes)
+    assert payload["model_id"] == json_response.json()["model_id"]
+
+
+def test_reduce_endpoint_rejects_invalid_msgpack(client):
+    response = client.post("/reduce", content=b"\xc1", headers={"content-type": MSGPACK_CONTENT_TYPE})
+    assert response.status_code == 400
@@ -0,0 +1,165 @@
+"""
+Warm-Started Refits
+V11.0 Cosmos: Seed UMAP refits from the previous layout and keep the cosmos stable
+
+A cold UMAP fit starts from a spectral embedding with the full epoch count and lands in an
+arbitrary frame, so every refit reshuffles all node positions. A warm start initializes known
+nodes at their previous coordinates and new nodes at a neighbour-weighted average of known
+coordinates (the same initialization UMAP's transform uses), runs a reduced number of epochs,
+and rigidly aligns the result back onto the previous frame.
+
+UMAP rescales any initial layout into a [0, 10] box per axis before optimizing, which undoes
+most of the benefit of a warm start. The fuzzy graph is therefore built by UMAP with zero
+epochs and the layout is optimized here from the unscaled initial coordinates.
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from knn_graph import exact_knn, normalize_rows
+
+logger = logging.getLogger(__name__)
+
+# Neighbours used to place new nodes from known ones
+PLACEMENT_NEIGHBORS = 10
+
+
+class WarmStart:
+    """Initial layout for a refit plus what is needed to align the result afterwards"""
+
+    def __init__(self, init: np.ndarray, known_rows: np.ndarray, new_rows: np.ndarray, previous_coordinates: np.ndarray):
+        self.init = init
+        self.known_rows = known_rows
+        self.new_rows = new_rows
+        self.previous_coordinates = previous_coordinates
+
+
+def prepare_warm_start(
+    X: np.ndarray,
+    node_ids: List[str],
+    previous_coordinates: Dict[str, List[float]],
+    target_dimensions: int,
+) -> Optional[WarmStart]:
+    """
+    Build the initial layout from previous coordinates keyed by node id.
+
+    Returns None when too few nodes are known to define a frame, in which case the
+    caller should fall back to a cold fit.
+    """
+    known_rows = []
+    known_coordinates = []
+    for row, node_id in enumerate(node_ids):
+        coordinate = previous_coordinates.get(node_id)
+        if coordinate is not None and len(coordinate) == target_dimensions:
+            known_rows.append(row)
+            known_coordinates.append(coordinate)
+
+    if len(known_rows) <= target_dimensions:
+        logger.info(f"Warm start skipped: only {len(known_rows)} nodes have previous coordinates")
+        return None
+
+    known_rows = np.asarray(known_rows, dtype=np.int64)
+    previous = np.asarray(known_coordinates, dtype=np.float32)
+    new_mask = np.ones(X.shape[0], dtype=bool)
+    new_mask[known_rows] = False
+    new_rows = np.flatnonzero(new_mask)
+
+    init = np.empty((X.shape[0], target_dimensions), dtype=np.float32)
+    init[known_rows] = previous
+    if new_rows.shape[0]:
+        init[new_rows] = place_from_neighbors(X[new_rows], X[known_rows], previous)
+
+    return WarmStart(init, known_rows, new_rows, previous)
+
+
+def place_from_neighbors(queries: np.ndarray, reference: np.ndarray, reference_coordinates: np.ndarray, k: int = PLACEMENT_NEIGHBORS) -> np.ndarray:
+    """Place query vectors at the inverse-distance weighted mean of their nearest reference nodes"""
+    indices, dists = exact_knn(normalize_rows(queries), normalize_rows(reference), k)
+    weights = 1.0 / (dists + 1e-3)
+    weights /= weights.sum(axis=1, keepdims=True)
+    return np.einsum("ij,ijk->ik", weights, reference_coordinates[indices]).astype(np.float32)
+
+
+def optimize_from_init(reducer, init: np.ndarray, n_epochs: int, learning_rate: float, random_state: Optional[int]) -> np.ndarray:
+    """
+    Run UMAP's layout optimization on a reducer fitted with n_epochs=0, starting from init.
+
+    Mirrors umap.umap_.simplicial_set_embedding without its rescaling of the initial layout.
+    The reducer's embedding_ is replaced and n_epochs reset so transform() uses its defaults.
+    """
+    from umap.layouts import optimize_layout_euclidean
+    from umap.umap_ import make_epochs_per_sample
+
+    graph = reducer.graph_.tocoo()
+    graph.sum_duplicates()
+    if n_epochs > 10:
+        # Same pruning of weak edges UMAP applies before optimizing
+        graph.data[graph.data < (graph.data.max() / float(n_epochs))] = 0.0
+        graph.eliminate_zeros()
+
+    epochs_per_sample = make_epochs_per_sample(graph.data, n_epochs)
+    rng_state = np.random.RandomState(random_state).randint(np.iinfo(np.int32).min + 1, np.iinfo(np.int32).max - 1, 3).astype(np.int64)
+
+    embedding = np.array(init, dtype=np.float32, order="C")
+    embedding = np.asarray(optimize_layout_euclidean(
+        embedding,
+        embedding,
+        graph.row,
+        graph.col,
+        n_epochs,
+        graph.shape[1],
+        epochs_per_sample,
+        reducer._a,
+        reducer._b,
+        rng_state,
+        reducer.repulsion_strength,
+        learning_rate,
+        reducer.negative_sample_rate,
+        parallel=False,
+        move_other=True,
+    ))
+
+    reducer.embedding_ = embedding
+    reducer.n_epochs = None
+    return embedding
+
+
+def align_to_previous(coordinates: np.ndarray, warm_start: WarmStart, node_ids: List[str], movement_threshold: float) -> tuple[np.ndarray, dict, List[str]]:
+    """
+    Rigidly align a refit layout onto the previous frame using the known nodes.
+
+    Uses orthogonal Procrustes (rotation/reflection plus translation, no scaling) so that
+    distances in the fitted embedding are preserved and transform() on the fitted model
+    stays consistent with the aligned coordinates.
+
+    Returns:
+        (aligned_coordinates, stats, moved_node_ids) - moved_node_ids lists known nodes
+        displaced by more than movement_threshold plus all new nodes
+    """
+    source = coordinates[warm_start.known_rows].astype(np.float64)
+    target = warm_start.previous_coordinates.astype(np.float64)
+
+    source_centroid = source.mean(axis=0)
+    target_centroid = target.mean(axis=0)
+    u, _, vt = np.linalg.svd((source - source_centroid).T @ (target - target_centroid))
+    rotation = u @ vt
+
+    aligned = ((coordinates - source_centroid) @ rotation + target_centroid).astype(np.float32)
+
+    displacement = np.linalg.norm(aligned[warm_start.known_rows] - target, axis=1)
+    moved_known = warm_start.known_rows[displacement > movement_threshold]
+    moved_rows = np.concatenate([moved_known, warm_start.new_rows])
+    moved_node_ids = [node_ids[row] for row in moved_rows]
+
+    stats = {
+        "known_nodes": int(warm_start.known_rows.shape[0]),
+        "new_nodes": int(warm_start.new_rows.shape[0]),
+        "procrustes_rmsd": float(np.sqrt(np.mean(displacement ** 2))),
+        "mean_displacement": float(displacement.mean()),
+        "max_displacement": float(displacement.max()),
+        "movement_threshold": movement_threshold,
+        "moved_known_nodes": int(moved_known.shape[0]),
+    }
+    return aligned, stats, moved_node_ids
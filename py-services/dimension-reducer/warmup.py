@@ -0,0 +1,167 @@
+"""
+Cold Start and Warm-Up
+V11.0 Cosmos: Lazy heavy imports, numba compilation cache and a readiness state
+
+Importing umap pulls in pynndescent and numba and compiles part of their kernels at import
+time, and the first fit or transform in a fresh process compiles the rest. On a new replica
+that is several seconds spent inside the first requests. This module lets the service:
+
+- defer umap, scikit-learn and cloudpickle until first use (LazyModule)
+- keep numba's compilation cache in a writable local directory, so worker processes and
+  restarted service processes load compiled kernels instead of recompiling them. A new
+  container starts with an empty cache unless the directory is a volume (the Dockerfile
+  points REDUCER_NUMBA_CACHE_DIR at one)
+- track a background warm-up that exercises those kernels once, so /ready only passes on
+  warm replicas while /health keeps reporting liveness
+"""
+
+import importlib
+import importlib.util
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+WARMUP_STATUS_PENDING = "pending"
+WARMUP_STATUS_RUNNING = "running"
+WARMUP_STATUS_COMPLETED = "completed"
+WARMUP_STATUS_FAILED = "failed"
+WARMUP_STATUS_DISABLED = "disabled"
+
+
+class LazyModule:
+    """
+    Module proxy that imports the real module on first attribute access.
+
+    Stands in for `import name` at module level, so call sites such as umap.UMAP(...) stay
+    unchanged while the import cost moves to the first request (or the warm-up) that needs it.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Any = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._module is not None
+
+    def load(self) -> Any:
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    logger.info(f"Imported {self._name} in {(time.perf_counter() - start) * 1000:.0f}ms")
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attribute: str) -> Any:
+        # Only called for attributes not found on the proxy itself (guards against
+        # recursion when the proxy's own state is looked up before __init__ ran)
+        if attribute in ("_name", "_module", "_lock"):
+            raise AttributeError(attribute)
+        return getattr(self.load(), attribute)
+
+
+def module_available(name: str) -> bool:
+    """Whether a module is installed, without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def configure_numba_cache(cache_dir: Optional[str]) -> Optional[str]:
+    """
+    Point numba's on-disk compilation cache at cache_dir.
+
+    Must run before numba is first imported; spawned worker processes inherit the setting
+    through the environment. An explicit NUMBA_CACHE_DIR in the environment wins.
+
+    Returns:
+        The cache directory in effect, or None if caching stays at numba's default
+    """
+    if os.environ.get("NUMBA_CACHE_DIR"):
+        return os.environ["NUMBA_CACHE_DIR"]
+    if not cache_dir:
+        return None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+    except OSError as e:
+        logger.warning(f"Numba cache directory {cache_dir} not usable: {str(e)}")
+        return None
+    os.environ["NUMBA_CACHE_DIR"] = cache_dir
+    return cache_dir
+
+
+class WarmupState:
+    """
+    Progress of the start-up warm-up, reported on /health and gating /ready.
+
+    Args:
+        enabled: With warm-up disabled the service is ready immediately
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.status = WARMUP_STATUS_PENDING if enabled else WARMUP_STATUS_DISABLED
+        self.step: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.completed_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.step_timings_ms: dict = {}
+        self._lock = threading.Lock()
+
+    @property
+    def is_ready(self) -> bool:
+        # A failed warm-up still leaves a working service, only a cold one
+        return self.status in (WARMUP_STATUS_COMPLETED, WARMUP_STATUS_FAILED, WARMUP_STATUS_DISABLED)
+
+    def start(self) -> None:
+        with self._lock:
+            self.status = WARMUP_STATUS_RUNNING
+            self.started_at = time.time()
+
+    def run_step(self, name: str, step: Callable[[], Any]) -> Any:
+        """Run one named warm-up step and record its duration"""
+        self.begin_step(name)
+        start = time.perf_counter()
+        try:
+            return step()
+        finally:
+            self.record_step(name, (time.perf_counter() - start) * 1000)
+
+    def begin_step(self, name: str) -> None:
+        with self._lock:
+            self.step = name
+
+    def record_step(self, name: str, elapsed_ms: float) -> None:
+        with self._lock:
+            self.step_timings_ms[name] = round(elapsed_ms, 1)
+        logger.info(f"Warm-up: {name} took {elapsed_ms:.0f}ms")
+
+    def finish(self, error: Optional[str] = None) -> None:
+        with self._lock:
+            self.completed_at = time.time()
+            self.error = error
+            self.status = WARMUP_STATUS_FAILED if error is not None else WARMUP_STATUS_COMPLETED
+            self.step = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            duration_ms = None
+            if self.started_at is not None:
+                duration_ms = round(((self.completed_at or time.time()) - self.started_at) * 1000, 1)
+            return {
+                "status": self.status,
+                "ready": self.is_ready,
+                "step": self.step,
+                "duration_ms": duration_ms,
+                "step_timings_ms": dict(self.step_timings_ms),
+                "error": self.error,
+                "numba_cache_dir": os.environ.get("NUMBA_CACHE_DIR"),
+            }
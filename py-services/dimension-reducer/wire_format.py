@@ -0,0 +1,180 @@
+"""
+Binary Wire Format
+V11.0 Cosmos: msgpack envelope for /reduce requests and responses
+
+JSON encodes every float as text and every model byte as an integer, which makes large
+batches and fitted models expensive to parse and serialize. The binary format is a
+msgpack map with the same field names as the JSON schema, except that arrays travel as
+raw little-endian buffers and models as raw bytes:
+
+    {"vectors": {"dtype": "float32", "shape": [n, d], "data": <bytes>},
+     "fitted_umap_model": <bytes>, "method": "umap_transform", ...}
+
+/reduce/batch bodies wrap a list of such maps as {"groups": [...], ...}.
+
+Array buffers are wrapped with np.frombuffer, so no per-element Python objects are created.
+"""
+
+import logging
+from typing import Any, Optional, cast
+
+import numpy as np
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+    msgpack = None
+    logging.warning("msgpack not available - install with: pip install msgpack")
+
+logger = logging.getLogger(__name__)
+
+MSGPACK_CONTENT_TYPE = "application/x-msgpack"
+
+# Content types accepted as msgpack (the first one is used for responses)
+_MSGPACK_CONTENT_TYPES = (MSGPACK_CONTENT_TYPE, "application/msgpack", "application/vnd.msgpack")
+
+# Only plain numeric dtypes are accepted from clients
+_ALLOWED_DTYPES = {"float16", "float32", "float64", "<f2", "<f4", "<f8"}
+
+
+class WireFormatError(ValueError):
+    """Raised when a binary payload cannot be decoded"""
+
+
+def is_msgpack_content_type(content_type: Optional[str]) -> bool:
+    """Whether a Content-Type / Accept header value designates msgpack"""
+    if not content_type:
+        return False
+    return any(media_type in content_type for media_type in _MSGPACK_CONTENT_TYPES)
+
+
+def encode_array(array: np.ndarray, dtype: str = "float32") -> dict:
+    """Wrap an array as a {dtype, shape, data} envelope with a raw little-endian buffer"""
+    contiguous = np.ascontiguousarray(array, dtype=np.dtype(dtype).newbyteorder("<"))
+    return {
+        "dtype": dtype,
+        "shape": list(contiguous.shape),
+        "data": contiguous.tobytes(),
+    }
+
+
+def decode_array(envelope: Any, dtype: type = np.float32) -> np.ndarray:
+    """
+    Decode a {dtype, shape, data} envelope into a NumPy array without copying per element.
+
+    Buffers that already have the requested dtype are returned as read-only views over
+    the message bytes; other float widths are converted once with a single cast.
+    """
+    if not isinstance(envelope, dict):
+        raise WireFormatError("Array fields must be {dtype, shape, data} maps")
+
+    source_dtype = envelope.get("dtype", "float32")
+    shape = envelope.get("shape")
+    data = envelope.get("data")
+
+    if source_dtype not in _ALLOWED_DTYPES:
+        raise WireFormatError(f"Unsupported array dtype: {source_dtype}")
+    if not isinstance(data, (bytes, bytearray, memoryview)):
+        raise WireFormatError("Array data must be a binary buffer")
+    if not isinstance(shape, list) or not all(isinstance(dim, int) and dim >= 0 for dim in shape):
+        raise WireFormatError("Array shape must be a list of non-negative integers")
+
+    wire_dtype = np.dtype(source_dtype).newbyteorder("<")
+    expected_bytes = int(np.prod(shape, dtype=np.int64)) * wire_dtype.itemsize
+    if len(data) != expected_bytes:
+        raise WireFormatError(f"Array buffer has {len(data)} bytes, expected {expected_bytes} for shape {shape} {source_dtype}")
+
+    array = np.frombuffer(data, dtype=wire_dtype).reshape(shape)
+    if array.dtype != np.dtype(dtype):
+        array = array.astype(dtype)
+    return array
+
+
+def decode_reduce_payload(body: bytes) -> tuple[dict, Optional[np.ndarray], Optional[bytes]]:
+    """
+    Split a msgpack /reduce body into plain fields, the vector array and raw model bytes.
+
+    Returns:
+        (fields, vectors, fitted_model_bytes) - fields excludes the two binary members
+    """
+    return _split_binary_fields(_unpack_map(body))
+
+
+def decode_batch_payload(body: bytes) -> tuple[dict, list]:
+    """
+    Split a msgpack /reduce/batch body into its plain fields and its groups.
+
+    Returns:
+        (fields, groups) - fields excludes "groups"; each group is decoded like a /reduce
+        body into (fields, vectors, fitted_model_bytes), or into (group_id, WireFormatError)
+        so that one malformed group doesn't fail the others
+    """
+    payload = _unpack_map(body)
+    groups = payload.pop("groups", None)
+    if not isinstance(groups, list):
+        raise WireFormatError("groups must be an array of maps")
+
+    decoded = []
+    for group in groups:
+        try:
+            if not isinstance(group, dict):
+                raise WireFormatError("Each group must be a map")
+            decoded.append(_split_binary_fields(group))
+        except WireFormatError as e:
+            decoded.append((group.get("group_id") if isinstance(group, dict) else None, e))
+    return payload, decoded
+
+
+def encode_reduce_response(response_data: dict) -> bytes:
+    """
+    Encode /reduce response data as msgpack.
+
+    ndarray values become array envelopes and bytes values (the fitted model) are sent as-is.
+    """
+    if msgpack is None:
+        raise WireFormatError("msgpack not available on this server")
+
+    encoded = {}
+    for key, value in response_data.items():
+        if isinstance(value, np.ndarray):
+            encoded[key] = encode_array(value)
+        else:
+            encoded[key] = value
+    # packb only returns None for packers created with autoreset=False
+    return cast(bytes, msgpack.packb(encoded, use_bin_type=True, default=_encode_default))
+
+
+def _unpack_map(body: bytes) -> dict:
+    if msgpack is None:
+        raise WireFormatError("msgpack not available on this server")
+
+    try:
+        payload = msgpack.unpackb(body, raw=False)
+    except Exception as e:
+        raise WireFormatError(f"Invalid msgpack body: {str(e)}")
+
+    if not isinstance(payload, dict):
+        raise WireFormatError("msgpack body must be a map")
+    return payload
+
+
+def _split_binary_fields(payload: dict) -> tuple[dict, Optional[np.ndarray], Optional[bytes]]:
+    vectors_envelope = payload.pop("vectors", None)
+    vectors = decode_array(vectors_envelope) if vectors_envelope is not None else None
+
+    fitted_model_bytes = payload.pop("fitted_umap_model", None)
+    if fitted_model_bytes is not None and not isinstance(fitted_model_bytes, (bytes, bytearray)):
+        raise WireFormatError("fitted_umap_model must be a binary buffer")
+
+    return payload, vectors, bytes(fitted_model_bytes) if fitted_model_bytes is not None else None
+
+
+def _encode_default(value: Any) -> Any:
+    """Fallback for NumPy scalars nested inside metadata dicts"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return encode_array(value)
+    raise TypeError(f"Cannot msgpack-encode {type(value).__name__}")